@@ -0,0 +1,102 @@
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from .models import Profile
+
+
+class LazyTokenUser(TokenUser):
+    """
+    User built from the claims of a validated access token.
+
+    The id, profile id and staff flags come from the token, so authenticating
+    needs no query. Group checks go through `get_user_groups`, whose per-user
+    cache spares the query once warm; `groups` itself is the full user's
+    relation. Reading anything else (email, password, permissions...) loads
+    the full User row once, so views written against the User model keep working.
+    """
+
+    @cached_property
+    def id(self):
+        # Tokens store the id as a string
+        return User._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def user(self) -> User:
+        """The full User model instance, loaded on first use."""
+        return User.objects.get(pk=self.id)
+
+    @cached_property
+    def profile_id(self):
+        if 'profile_id' in self.token:
+            return self.token['profile_id']
+        return self.user.profile.pk
+
+    @cached_property
+    def profile(self) -> Profile:
+        """
+        The user's profile. When the token names it, this is an instance with only
+        its keys loaded: enough for foreign key assignment, with the other fields
+        loaded on access.
+        """
+        if 'profile_id' not in self.token:
+            return self.user.profile
+        return Profile.from_db(DEFAULT_DB_ALIAS, ['id', 'user_id'], [self.token['profile_id'], self.id])
+
+    @cached_property
+    def username(self) -> str:
+        return self.token.get('username') or self.user.username
+
+    @property
+    def groups(self):
+        return self.user.groups
+
+    @property
+    def user_permissions(self):
+        return self.user.user_permissions
+
+    def get_group_permissions(self, obj=None) -> set:
+        return self.user.get_group_permissions(obj)
+
+    def get_all_permissions(self, obj=None) -> set:
+        return self.user.get_all_permissions(obj)
+
+    def has_perm(self, perm, obj=None) -> bool:
+        return self.user.has_perm(perm, obj)
+
+    def has_perms(self, perm_list, obj=None) -> bool:
+        return self.user.has_perms(perm_list, obj)
+
+    def has_module_perms(self, module) -> bool:
+        return self.user.has_module_perms(module)
+
+    def check_password(self, raw_password) -> bool:
+        return self.user.check_password(raw_password)
+
+    def __getattr__(self, attr):
+        """Read custom claims from the token and anything else from the full user."""
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        if attr in self.token:
+            return self.token[attr]
+        return getattr(self.user, attr)
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication resolving the user from token claims instead of the database.
+    Enabled with JWT_STATELESS_AUTHENTICATION. Tokens stay valid for deactivated
+    users until they expire, like any stateless token.
+    """
+
+    def get_user(self, validated_token) -> LazyTokenUser:
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        return LazyTokenUser(validated_token)
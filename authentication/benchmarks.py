@@ -0,0 +1,56 @@
+import time
+from typing import Dict
+from django.contrib.auth.models import Group, User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from products.permissions import INVENTORY_MANAGERS_GROUP, IsInventoryManager
+from .authentication import StatelessJWTAuthentication
+from .models import Profile
+from .utils import create_token
+
+
+def authenticate_request(authentication, token: str) -> None:
+    """Do what a typical protected write does with the user: authenticate, check permissions, read the profile."""
+    request = Request(
+        APIRequestFactory().post('/', HTTP_AUTHORIZATION=f'Bearer {token}'), authenticators=[authentication]
+    )
+    IsInventoryManager().has_permission(request, None)
+    request.user.profile.pk
+
+
+def benchmark_authentication(requests: int = 1000) -> Dict:
+    """
+    Compare queries and time per request of database-backed and stateless JWT authentication.
+
+    Args:
+        requests (int): Number of timed requests per mode.
+
+    Returns:
+        Dict: Queries per request and requests per second of each mode, and the queries saved.
+    """
+    results = {}
+    with transaction.atomic():
+        user = User.objects.create_user(username='benchmark-auth-user', password='unused')
+        user.groups.add(Group.objects.get_or_create(name=INVENTORY_MANAGERS_GROUP)[0])
+        Profile.objects.create(user=user)
+        token = create_token(User.objects.get(pk=user.pk))['access_token']
+        for mode, authentication in (('database', JWTAuthentication()), ('stateless', StatelessJWTAuthentication())):
+            # Warm the group cache, as on any request after the first
+            authenticate_request(authentication, token)
+            with CaptureQueriesContext(connection) as queries:
+                authenticate_request(authentication, token)
+            start = time.perf_counter()
+            for _ in range(requests):
+                authenticate_request(authentication, token)
+            seconds = time.perf_counter() - start
+            results[mode] = {
+                'queries': len(queries),
+                'seconds': seconds,
+                'requests_per_second': requests / seconds if seconds else 0,
+            }
+        transaction.set_rollback(True)
+    results['queries_saved'] = results['database']['queries'] - results['stateless']['queries']
+    return results
@@ -0,0 +1,38 @@
+from io import BytesIO
+from typing import BinaryIO, Dict
+from PIL import Image, ImageOps
+
+VARIANT_FORMAT = 'WEBP'
+VARIANT_EXTENSION = 'webp'
+
+
+def render_variants(file: BinaryIO, sizes: Dict[str, int], quality: int) -> Dict[str, bytes]:
+    """
+    Decode an image and encode square, center-cropped thumbnails of it.
+
+    The image is rotated according to its EXIF orientation, then every metadata
+    block (EXIF, GPS, XMP, ICC) is dropped from the variants.
+
+    Args:
+        file (BinaryIO): The original image.
+        sizes (Dict[str, int]): Edge length in pixels per variant name.
+        quality (int): Encoder quality, 0-100.
+
+    Returns:
+        Dict[str, bytes]: The encoded variants per name.
+    """
+    largest = max(sizes.values())
+    with Image.open(file) as image:
+        # Lets JPEG decode at a reduced scale when the original is much larger than needed
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+    image.info = {}
+
+    variants = {}
+    for name, size in sizes.items():
+        variant = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        variant.save(buffer, VARIANT_FORMAT, quality=quality, method=4)
+        variants[name] = buffer.getvalue()
+    return variants
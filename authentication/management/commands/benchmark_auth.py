@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from authentication.benchmarks import benchmark_authentication
+
+class Command(BaseCommand):
+    help = 'Benchmark queries per request of database-backed vs. stateless JWT authentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='Timed requests per mode')
+
+    def handle(self, *args, **options):
+        result = benchmark_authentication(requests=options['requests'])
+        for mode in ('database', 'stateless'):
+            timing = result[mode]
+            self.stdout.write(
+                f"{mode:<10}{timing['queries']:>4} queries/request{timing['requests_per_second']:>12.0f} requests/s"
+            )
+        self.stdout.write(f"Queries saved per request: {result['queries_saved']}")
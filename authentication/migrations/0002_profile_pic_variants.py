@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='profile_pic_variants',
+            field=models.JSONField(blank=True, default=dict, help_text="Storage paths of the picture's thumbnails per size name"),
+        ),
+    ]
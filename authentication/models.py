@@ -1,3 +1,5 @@
+from typing import Dict, Optional
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -8,13 +10,40 @@ class Profile(models.Model):
     Attributes:
         user (User): One-to-one link to Django User model.
         profile_pic (ImageField): User's profile picture.
+        profile_pic_variants (JSONField): Storage paths of the picture's thumbnails per size name.
     """
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     profile_pic = models.ImageField(upload_to='profile_pics/', null=True, blank=True, help_text="User's profile picture")
+    profile_pic_variants = models.JSONField(
+        default=dict, blank=True, help_text="Storage paths of the picture's thumbnails per size name"
+    )
 
     class Meta:
         verbose_name = 'Profile'
         verbose_name_plural = 'Profiles'
 
     def __str__(self):
-        return f"{self.user.username}'s Profile"
\ No newline at end of file
+        return f"{self.user.username}'s Profile"
+
+    def profile_pic_url(self, size: Optional[str] = None) -> Optional[str]:
+        """
+        Return the URL of a thumbnail of the profile picture.
+
+        Args:
+            size (str, optional): Variant name; defaults to PROFILE_PIC_DEFAULT_SIZE.
+
+        Returns:
+            Optional[str]: The variant's URL, the original's until the variants
+            are generated, or None without a picture.
+        """
+        if not self.profile_pic:
+            return None
+        path = self.profile_pic_variants.get(size or settings.PROFILE_PIC_DEFAULT_SIZE)
+        return self.profile_pic.storage.url(path) if path else self.profile_pic.url
+
+    def profile_pic_urls(self) -> Dict[str, str]:
+        """Return the URLs of the generated thumbnails per size name."""
+        if not self.profile_pic:
+            return {}
+        storage = self.profile_pic.storage
+        return {size: storage.url(path) for size, path in self.profile_pic_variants.items()}
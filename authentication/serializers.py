@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from django.contrib.auth.models import User, Group
 from django.contrib.auth import authenticate
 from .models import Profile
+from .tasks import process_profile_pic
+from .tokens import CachedRefreshToken
 from django.db import transaction
 
 
@@ -38,23 +41,26 @@ class UserSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        print(validated_data)
         """
         Create a user with a profile and assign to 'Inventory Managers' group.
         """
-        with transaction.atomic():                    
-            profile_data = validated_data.pop('profile_pic')
+        profile_pic = validated_data.pop('profile_pic', None)
+        with transaction.atomic():
             user = User.objects.create_user(
                 first_name=validated_data['username'],
                 username=validated_data['email'],
                 email=validated_data['email'],
                 password=validated_data['password']
             )
-            Profile.objects.create(user=user, profile_pic=profile_data)
+            profile = Profile.objects.create(user=user)
             # Assign user to Inventory Managers group
             # inventory_group, _ = Group.objects.get_or_create(name='Inventory Managers')
             # user.groups.add(inventory_group)
-            return user
+        if profile_pic:
+            # Store the upload after the transaction; thumbnails are generated by a task
+            profile.profile_pic.save(profile_pic.name, profile_pic)
+            transaction.on_commit(lambda: process_profile_pic.delay(profile.pk))
+        return user
 
 class LoginSerializer(serializers.Serializer):
     """
@@ -70,4 +76,25 @@ class LoginSerializer(serializers.Serializer):
         user = authenticate(username=data['email'], password=data['password'])
         if user and user.is_active:
             return user
-        raise serializers.ValidationError("Invalid credentials")
\ No newline at end of file
+        raise serializers.ValidationError("Invalid credentials")
+
+class RefreshSerializer(TokenRefreshSerializer):
+    """
+    Serializer exchanging a refresh token for a new access token, rotating and
+    blacklisting the refresh token in the cache-backed store.
+    """
+    token_class = CachedRefreshToken
+
+
+class LogoutSerializer(serializers.Serializer):
+    """
+    Serializer for logout; blacklists the given refresh token.
+    """
+    refresh = serializers.CharField()
+
+    def validate(self, data):
+        """
+        Validate the refresh token and blacklist it.
+        """
+        CachedRefreshToken(data['refresh']).blacklist()
+        return data
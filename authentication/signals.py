@@ -0,0 +1,34 @@
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+from .utils import invalidate_user_groups
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop cached groups of users added to or removed from groups, from either side of the relation."""
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        user_ids = [instance.pk]
+    elif action == 'pre_clear':
+        # The members are gone by post_clear, so collect them before
+        instance._cleared_user_ids = list(instance.user_set.values_list('pk', flat=True))
+        return
+    elif action == 'post_clear':
+        user_ids = getattr(instance, '_cleared_user_ids', [])
+    else:
+        user_ids = pk_set or []
+    transaction.on_commit(lambda: invalidate_user_groups(user_ids))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_group_change(sender, instance, **kwargs):
+    """A renamed or deleted group changes the groups of all its members."""
+    if kwargs.get('created'):
+        return
+    user_ids = list(instance.user_set.values_list('pk', flat=True))
+    if user_ids:
+        transaction.on_commit(lambda: invalidate_user_groups(user_ids))
@@ -0,0 +1,36 @@
+import os
+from celery import shared_task
+from django.conf import settings
+from django.core.files.base import ContentFile
+from .images import VARIANT_EXTENSION, render_variants
+from .models import Profile
+
+
+@shared_task
+def process_profile_pic(profile_id):
+    """
+    Generate the thumbnail variants of a profile picture.
+    Variants replace those of a previous picture; if the picture changes while they
+    are generated, they are discarded and the task of the new picture wins.
+    """
+    profile = Profile.objects.filter(pk=profile_id).first()
+    if profile is None or not profile.profile_pic:
+        return {'summary': {'rows': 0}}
+    picture = profile.profile_pic
+    with picture.open('rb') as file:
+        variants = render_variants(file, settings.PROFILE_PIC_SIZES, settings.PROFILE_PIC_QUALITY)
+
+    storage = picture.storage
+    stem = os.path.splitext(os.path.basename(picture.name))[0]
+    paths = {}
+    for size, data in variants.items():
+        path = f"profile_pics/variants/{profile.pk}/{stem}_{size}.{VARIANT_EXTENSION}"
+        if storage.exists(path):
+            storage.delete(path)
+        paths[size] = storage.save(path, ContentFile(data))
+
+    updated = Profile.objects.filter(pk=profile.pk, profile_pic=picture.name).update(profile_pic_variants=paths)
+    stale = paths.values() if not updated else set(profile.profile_pic_variants.values()) - set(paths.values())
+    for path in stale:
+        storage.delete(path)
+    return {'summary': {'rows': len(paths) if updated else 0}}
@@ -1,3 +1,213 @@
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.exceptions import TokenError
+from django.core.management import call_command
+from rest_framework.request import Request
+from authentication.authentication import LazyTokenUser, StatelessJWTAuthentication
+from authentication.models import Profile
+from authentication.tokens import CachedRefreshToken, blacklist_key
+from authentication.utils import create_token, get_user_groups
+from products.models import Product
+from products.permissions import IsInventoryManager
 
-# Create your tests here.
+
+class GroupCacheTestCase(TestCase):
+    def setUp(self):
+        """Set up an inventory manager and a clean cache."""
+        cache.clear()
+        self.group = Group.objects.create(name='Inventory Managers')
+        self.user = User.objects.create_user(username='manager', password='testpass')
+        self.user.groups.add(self.group)
+
+    def has_permission(self, user):
+        request = APIRequestFactory().get('/')
+        request.user = user
+        return IsInventoryManager().has_permission(request, None)
+
+    def test_permission_checks_are_cached(self):
+        """Only the first check of a user queries its groups."""
+        with self.assertNumQueries(1):
+            self.assertTrue(self.has_permission(self.user))
+        with self.assertNumQueries(0):
+            self.assertTrue(self.has_permission(self.user))
+
+    def test_group_changes_invalidate_the_cache(self):
+        """Membership changes from either side, renames and deletions drop the cached groups."""
+        other = User.objects.create_user(username='other', password='testpass')
+
+        def rename(name):
+            self.group.name = name
+            self.group.save()
+
+        changes = [
+            lambda: self.user.groups.remove(self.group),
+            lambda: self.group.user_set.add(self.user),
+            lambda: self.group.user_set.clear(),
+            lambda: self.user.groups.set([self.group]),
+            lambda: rename('Renamed'),
+            lambda: rename('Inventory Managers'),
+            lambda: self.group.delete(),
+        ]
+        expected = [False, True, False, True, False, True, False]
+        for change, is_manager in zip(changes, expected):
+            self.assertNotEqual(self.has_permission(self.user), is_manager)
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertEqual(self.has_permission(self.user), is_manager)
+            self.assertFalse(self.has_permission(other))
+
+    def test_token_carries_no_group_claims(self):
+        """Groups are read from the cache, not from a claim that would go stale."""
+        token = create_token(self.user)
+        self.assertNotIn('groups', AccessToken(token['access_token']))
+        self.assertEqual(get_user_groups(self.user), frozenset(['Inventory Managers']))
+
+
+class StatelessJWTAuthenticationTestCase(TestCase):
+    def setUp(self):
+        """Set up an inventory manager with a profile and an access token."""
+        cache.clear()
+        self.user = User.objects.create_user(username='manager', email='manager@example.com', password='testpass')
+        self.user.groups.add(Group.objects.create(name='Inventory Managers'))
+        self.profile = Profile.objects.create(user=self.user)
+        self.token = create_token(User.objects.get(pk=self.user.pk))['access_token']
+
+    def authenticate(self, token=None):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token or self.token}')
+        return Request(request, authenticators=[StatelessJWTAuthentication()])
+
+    def test_user_is_resolved_from_claims(self):
+        """Authentication, permission checks and profile assignment need no query."""
+        get_user_groups(self.user)  # warm the group cache
+        request = self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertIsInstance(request.user, LazyTokenUser)
+            self.assertEqual(request.user.pk, self.user.pk)
+            self.assertTrue(IsInventoryManager().has_permission(request, None))
+            self.assertEqual(request.user.profile.pk, self.profile.pk)
+        with self.assertNumQueries(1):
+            product = Product.objects.create(name="Mouse", sku="MS-1", price=10, i_profile=request.user.profile)
+        self.assertEqual(Product.objects.get(pk=product.pk).i_profile, self.profile)
+
+    def test_full_user_is_loaded_on_demand(self):
+        """Attributes missing from the token load the User row once."""
+        user = self.authenticate().user
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'manager@example.com')
+            self.assertEqual(user.username, 'manager')
+            self.assertTrue(user.check_password('testpass'))
+        with self.assertNumQueries(1):
+            self.assertFalse(user.profile.profile_pic)
+
+    def test_tokens_without_profile_claim(self):
+        """Tokens minted before the profile claim fall back to the database."""
+        token = AccessToken.for_user(self.user)
+        user = self.authenticate(str(token)).user
+        self.assertEqual(user.profile, self.profile)
+
+    def test_benchmark_command(self):
+        """The benchmark reports the queries saved per request."""
+        out = StringIO()
+        call_command('benchmark_auth', requests=5, stdout=out)
+        self.assertIn('Queries saved per request: 2', out.getvalue())
+        self.assertFalse(User.objects.filter(username='benchmark-auth-user').exists())
+
+
+class RefreshTokenRotationTestCase(TestCase):
+    def setUp(self):
+        """Set up a user and a refresh token."""
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='manager', email='manager@example.com', password='testpass')
+        self.refresh = create_token(self.user)['refresh_token']
+
+    def test_refresh_rotates_and_blacklists(self):
+        """A refresh returns new tokens without database writes and blacklists the old refresh token."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('token-refresh'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([q['sql'] for q in queries if not q['sql'].startswith('SELECT')], [])
+        self.assertNotEqual(response.data['refresh'], self.refresh)
+        self.assertEqual(AccessToken(response.data['access'])['user_id'], str(self.user.pk))
+
+        reuse = self.client.post(reverse('token-refresh'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(reuse.status_code, 401)
+        rotated = self.client.post(reverse('token-refresh'), {'refresh': response.data['refresh']}, format='json')
+        self.assertEqual(rotated.status_code, 200)
+
+    def test_blacklist_expires_with_token(self):
+        """Blacklist entries live only as long as the token and a token is blacklisted once."""
+        token = CachedRefreshToken(self.refresh)
+        token.blacklist()
+        self.assertEqual(cache.get(blacklist_key(token['jti'])), 1)
+        with self.assertRaises(TokenError):
+            token.blacklist()
+        with self.assertRaises(TokenError):
+            CachedRefreshToken(self.refresh)
+
+    def test_logout_blacklists_refresh_token(self):
+        """After logout the refresh token is rejected."""
+        response = self.client.post(reverse('logout'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 204)
+        response = self.client.post(reverse('token-refresh'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class ProfilePicVariantsTestCase(TestCase):
+    def setUp(self):
+        """Store media in a temporary directory."""
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+
+    def make_upload(self):
+        """Return a 1200x800 JPEG carrying EXIF metadata."""
+        image = Image.new('RGB', (1200, 800), 'red')
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera Maker'
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile('me.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_signup_generates_variants(self):
+        """Thumbnails are generated after signup, without metadata, and returned on login."""
+        data = {'username': 'Ann', 'email': 'ann@example.com', 'password': 'testpass', 'profile_pic': self.make_upload()}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('signup'), data, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data['user']['profile_pic'].endswith('.jpg'))
+
+        profile = Profile.objects.get(user__email='ann@example.com')
+        self.assertEqual(set(profile.profile_pic_variants), {'small', 'medium', 'large'})
+        with profile.profile_pic.storage.open(profile.profile_pic_variants['small']) as file:
+            with Image.open(file) as variant:
+                self.assertEqual((variant.format, variant.size), ('WEBP', (64, 64)))
+                self.assertEqual(len(variant.getexif()), 0)
+
+        response = self.client.post(reverse('login'), {'email': 'ann@example.com', 'password': 'testpass'})
+        self.assertEqual(response.data['user']['profile_pic'], profile.profile_pic_url('medium'))
+        self.assertTrue(response.data['user']['profile_pic'].endswith('_medium.webp'))
+        self.assertEqual(set(response.data['user']['profile_pic_variants']), {'small', 'medium', 'large'})
+
+    def test_signup_without_picture(self):
+        """Users without a picture get no URLs."""
+        data = {'username': 'Bob', 'email': 'bob@example.com', 'password': 'testpass'}
+        response = self.client.post(reverse('signup'), data, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.data['user']['profile_pic'])
+        self.assertEqual(response.data['user']['profile_pic_variants'], {})
@@ -1,7 +1,9 @@
 from django.urls import path
-from .views import SignupView, LoginView
+from .views import SignupView, LoginView, LogoutView, RefreshView
 
 urlpatterns = [
     path('signup/', SignupView.as_view(), name='signup'),
     path('login/', LoginView.as_view(), name='login'),
+    path('token/refresh/', RefreshView.as_view(), name='token-refresh'),
+    path('logout/', LogoutView.as_view(), name='logout'),
 ]
\ No newline at end of file
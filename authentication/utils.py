@@ -1,14 +1,60 @@
-from rest_framework_simplejwt.tokens import RefreshToken
+from typing import FrozenSet, Iterable
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from .tokens import CachedRefreshToken
+
+
+def user_groups_key(user_id: int) -> str:
+    return f"user_groups_{user_id}"
+
+
+def get_user_groups(user) -> FrozenSet[str]:
+    """
+    Return the names of the user's groups, cached per user.
+
+    The entry is deleted whenever the user's memberships or their groups change,
+    so permission checks can rely on it without querying the database.
+
+    Args:
+        user: The user, or a lightweight user carrying only its id.
+
+    Returns:
+        FrozenSet[str]: Group names.
+    """
+    if not getattr(user, 'is_authenticated', False) or user.pk is None:
+        return frozenset()
+    cache_key = user_groups_key(user.pk)
+    groups = cache.get(cache_key)
+    if groups is None:
+        groups = frozenset(Group.objects.filter(user__id=user.pk).values_list('name', flat=True))
+        cache.set(cache_key, groups, timeout=settings.USER_GROUPS_CACHE_TIMEOUT)
+    return groups
+
+
+def invalidate_user_groups(user_ids: Iterable[int]) -> None:
+    """Drop the cached groups of the given users."""
+    cache.delete_many([user_groups_key(user_id) for user_id in user_ids])
+
 
 def create_token(user):
     """
     Create or retrieve an authentication token for the user.
+    The tokens carry the user's profile id and staff flags as claims, from which
+    StatelessJWTAuthentication builds the user without a query. Groups are not
+    embedded: permissions read them from the invalidated per-user cache, so a
+    membership change applies before the token expires.
     """
-    refresh = RefreshToken.for_user(user)
+    refresh = CachedRefreshToken.for_user(user)
+    profile = getattr(user, 'profile', None)
+    if profile is not None:
+        refresh['profile_id'] = profile.pk
+    refresh['is_staff'] = user.is_staff
+    refresh['is_superuser'] = user.is_superuser
     access_token = str(refresh.access_token)
     refresh_token = str(refresh)
 
     return {
         'access_token': access_token,
         'refresh_token': refresh_token
-        }
\ No newline at end of file
+        }
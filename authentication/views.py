@@ -1,12 +1,16 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
-from .serializers import UserSerializer, LoginSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.views import TokenRefreshView
+from .serializers import UserSerializer, LoginSerializer, LogoutSerializer, RefreshSerializer
 from .utils import create_token
 
 class SignupView(generics.CreateAPIView):
     """
     API endpoint for user signup.
     Creates a user, profile, and assigns to Inventory Managers group.
+    Profile picture thumbnails are generated in the background; until then
+    `profile_pic` is the uploaded image.
     """
     permission_classes = [permissions.AllowAny]
     serializer_class = UserSerializer
@@ -20,7 +24,8 @@ class SignupView(generics.CreateAPIView):
                     'id': user.id,
                     'username': user.first_name,
                     'email': user.email,
-                    'profile_pic': user.profile.profile_pic.url if user.profile.profile_pic else None
+                    'profile_pic': user.profile.profile_pic_url(),
+                    'profile_pic_variants': user.profile.profile_pic_urls(),
                 },
                     
                 'token': create_token(user),
@@ -45,7 +50,33 @@ class LoginView(generics.GenericAPIView):
                 'id': user.id,
                 'username': user.first_name,
                 'email': user.email,
-                'profile_pic': user.profile.profile_pic.url if user.profile.profile_pic else None
+                'profile_pic': user.profile.profile_pic_url(),
+                'profile_pic_variants': user.profile.profile_pic_urls(),
             },
             'token': create_token(user),
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+
+class RefreshView(TokenRefreshView):
+    """
+    API endpoint exchanging a refresh token for a new access token.
+    The refresh token is rotated; the old one is blacklisted until it expires.
+    """
+    serializer_class = RefreshSerializer
+
+
+class LogoutView(generics.GenericAPIView):
+    """
+    API endpoint for logout.
+    Blacklists the refresh token so it can no longer be used.
+    """
+    permission_classes = [permissions.AllowAny]
+    serializer_class = LogoutSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0]) from e
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,259 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, Optional
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from .profiling import record_cache_lookups, timed
+
+_MISSING = object()
+STATS_KEY = 'two_tier_cache_stats_{}'
+STAT_NAMES = ('l1_hits', 'l1_misses', 'l2_hits', 'l2_misses')
+
+
+class L1Store:
+    """LRU entries and hit counters of one L1 cache, shared by all threads of a process."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self.unflushed = Counter()
+
+
+# Django creates cache backends per thread; like LocMemCache, keep the store
+# per process, keyed by LOCATION.
+_l1_stores: Dict[str, L1Store] = {}
+_l1_stores_lock = threading.Lock()
+
+
+class TwoTierCache(BaseCache):
+    """
+    Cache backend keeping a bounded in-process LRU (L1) in front of another cache alias (L2).
+
+    Only keys starting with one of L1_KEY_PREFIXES are held in L1. Those must be
+    keys whose value never changes once written, such as the tag-versioned keys
+    of `products.caching`: invalidation there bumps a tag version stored in L2,
+    which changes the key itself, so every worker sees the change on its next
+    version check and its L1 copy is simply never read again. Every other key,
+    and every atomic operation (add, incr, decr), goes straight to L2.
+
+    Values held in L1 are shared, not copied, so callers must not mutate them.
+
+    Options:
+        L2_CACHE: Alias of the shared cache, e.g. a django_redis cache.
+        MAX_ENTRIES: Maximum number of entries per process in L1.
+        L1_TIMEOUT: Maximum seconds an entry is kept in L1.
+        L1_KEY_PREFIXES: Key prefixes eligible for L1.
+        STATS_FLUSH_EVERY: Lookups between flushes of hit counters to L2.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        with _l1_stores_lock:
+            self._store = _l1_stores.setdefault(location, L1Store())
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options.get('L2_CACHE', 'redis')
+        self._l1_timeout = options.get('L1_TIMEOUT', 300)
+        self._l1_prefixes = tuple(options.get('L1_KEY_PREFIXES', ()))
+        self._stats_flush_every = options.get('STATS_FLUSH_EVERY', 100)
+
+    @property
+    def l2(self) -> BaseCache:
+        return caches[self._l2_alias]
+
+    # L1 bookkeeping
+
+    def _l1_key(self, key, version) -> Optional[str]:
+        """Return the L1 key for `key`, or None if the key is not eligible for L1."""
+        if not self._l1_prefixes or not str(key).startswith(self._l1_prefixes):
+            return None
+        return self.make_and_validate_key(key, version=version)
+
+    def _l1_get(self, l1_key) -> Any:
+        with self._store.lock:
+            entry = self._store.entries.get(l1_key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._store.entries[l1_key]
+                return _MISSING
+            self._store.entries.move_to_end(l1_key)
+            return value
+
+    def _l1_set(self, l1_key, value, timeout=DEFAULT_TIMEOUT) -> None:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.l2.default_timeout
+        ttl = self._l1_timeout if timeout is None else min(timeout, self._l1_timeout)
+        if ttl <= 0:
+            self._l1_discard(l1_key)
+            return
+        with self._store.lock:
+            self._store.entries[l1_key] = (value, time.monotonic() + ttl)
+            self._store.entries.move_to_end(l1_key)
+            while len(self._store.entries) > self._max_entries:
+                self._store.entries.popitem(last=False)
+
+    def _l1_discard(self, l1_key) -> None:
+        if l1_key is not None:
+            with self._store.lock:
+                self._store.entries.pop(l1_key, None)
+
+    def _record(self, **counts: int) -> None:
+        record_cache_lookups(counts.get('l1_hits', 0) + counts.get('l2_hits', 0), counts.get('l2_misses', 0))
+        with self._store.lock:
+            self._store.stats.update(counts)
+            self._store.unflushed.update(counts)
+            if sum(self._store.unflushed.values()) < self._stats_flush_every:
+                return
+            unflushed, self._store.unflushed = self._store.unflushed, Counter()
+        self._flush_stats(unflushed)
+
+    def _flush_stats(self, counts: Counter) -> None:
+        """Add this process's counts to the cluster-wide counters in L2."""
+        for name, count in counts.items():
+            if not count:
+                continue
+            key = STATS_KEY.format(name)
+            try:
+                self.l2.incr(key, count)
+            except ValueError:
+                if not self.l2.add(key, count, timeout=None):
+                    self.l2.incr(key, count)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return hit counts and hit ratios per tier, for this process and for all processes.
+
+        L1 ratios are over all lookups of L1-eligible keys; L2 ratios are over the
+        lookups that reached L2.
+        """
+        with self._store.lock:
+            process = dict(self._store.stats)
+            unflushed = Counter(self._store.unflushed)
+        cluster = self.l2.get_many([STATS_KEY.format(name) for name in STAT_NAMES])
+        cluster = {name: cluster.get(STATS_KEY.format(name), 0) + unflushed[name] for name in STAT_NAMES}
+        return {
+            'process': dict(self._with_ratios(process), l1_entries=len(self._store.entries)),
+            'cluster': self._with_ratios(cluster),
+        }
+
+    @staticmethod
+    def _with_ratios(counts: Dict[str, int]) -> Dict[str, float]:
+        counts = {name: counts.get(name, 0) for name in STAT_NAMES}
+        for tier in ('l1', 'l2'):
+            lookups = counts[f'{tier}_hits'] + counts[f'{tier}_misses']
+            counts[f'{tier}_hit_ratio'] = round(counts[f'{tier}_hits'] / lookups * 100, 2) if lookups else 0
+        return counts
+
+    # Cache API; calls are timed under `cache` in request profiles
+
+    @timed('cache')
+    def get(self, key, default=None, version=None):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None:
+            value = self._l1_get(l1_key)
+            if value is not _MISSING:
+                self._record(l1_hits=1)
+                return value
+        value = self.l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._record(l1_misses=int(l1_key is not None), l2_misses=1)
+            return default
+        if l1_key is not None:
+            self._l1_set(l1_key, value)
+        self._record(l1_misses=int(l1_key is not None), l2_hits=1)
+        return value
+
+    @timed('cache')
+    def get_many(self, keys: Iterable, version=None) -> Dict:
+        found, remaining = {}, {}
+        l1_hits = 0
+        for key in keys:
+            l1_key = self._l1_key(key, version)
+            value = self._l1_get(l1_key) if l1_key is not None else _MISSING
+            if value is _MISSING:
+                remaining[key] = l1_key
+            else:
+                found[key] = value
+                l1_hits += 1
+        if remaining:
+            from_l2 = self.l2.get_many(list(remaining), version=version)
+            for key, value in from_l2.items():
+                if remaining[key] is not None:
+                    self._l1_set(remaining[key], value)
+            found.update(from_l2)
+            l1_misses = sum(1 for l1_key in remaining.values() if l1_key is not None)
+            self._record(
+                l1_hits=l1_hits, l1_misses=l1_misses,
+                l2_hits=len(from_l2), l2_misses=len(remaining) - len(from_l2)
+            )
+        elif l1_hits:
+            self._record(l1_hits=l1_hits)
+        return found
+
+    @timed('cache')
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout=timeout, version=version)
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None:
+            self._l1_set(l1_key, value, timeout)
+
+    @timed('cache')
+    def set_many(self, data: Dict, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout=timeout, version=version)
+        for key, value in data.items():
+            l1_key = self._l1_key(key, version)
+            if l1_key is not None and key not in failed:
+                self._l1_set(l1_key, value, timeout)
+        return failed
+
+    @timed('cache')
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l1_discard(self._l1_key(key, version))
+        return self.l2.add(key, value, timeout=timeout, version=version)
+
+    @timed('cache')
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l1_discard(self._l1_key(key, version))
+        return self.l2.touch(key, timeout=timeout, version=version)
+
+    @timed('cache')
+    def delete(self, key, version=None):
+        self._l1_discard(self._l1_key(key, version))
+        return self.l2.delete(key, version=version)
+
+    @timed('cache')
+    def delete_many(self, keys: Iterable, version=None):
+        keys = list(keys)
+        for key in keys:
+            self._l1_discard(self._l1_key(key, version))
+        return self.l2.delete_many(keys, version=version)
+
+    @timed('cache')
+    def has_key(self, key, version=None):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None and self._l1_get(l1_key) is not _MISSING:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    @timed('cache')
+    def incr(self, key, delta=1, version=None):
+        self._l1_discard(self._l1_key(key, version))
+        return self.l2.incr(key, delta, version=version)
+
+    @timed('cache')
+    def decr(self, key, delta=1, version=None):
+        self._l1_discard(self._l1_key(key, version))
+        return self.l2.decr(key, delta, version=version)
+
+    def clear(self):
+        with self._store.lock:
+            self._store.entries.clear()
+            self._store.stats.clear()
+            self._store.unflushed.clear()
+        return self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
@@ -0,0 +1,183 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_current_profile: ContextVar[Optional['RequestProfile']] = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """
+    Time and call counts per metric (db, cache, encode, render...) of one request.
+
+    Also a database execute wrapper, recording every query under `db`.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.counts = Counter()
+
+    def add(self, name: str, elapsed: float, count: int = 1) -> None:
+        self.timings[name] += elapsed
+        self.counts[name] += count
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add('db', time.perf_counter() - start)
+
+    def as_dict(self, total: float) -> Dict:
+        """Return the metrics in milliseconds, with call counts and cache hits and misses."""
+        data = {'total_ms': round(total * 1000, 2)}
+        for name, elapsed in self.timings.items():
+            data[f'{name}_ms'] = round(elapsed * 1000, 2)
+            data[f'{name}_count'] = self.counts[name]
+        data['cache_hits'] = self.counts['cache_hits']
+        data['cache_misses'] = self.counts['cache_misses']
+        return data
+
+    def server_timing(self, total: float) -> str:
+        """Format the metrics as a `Server-Timing` header value."""
+        metrics = []
+        for name, elapsed in self.timings.items():
+            description = f'{self.counts[name]} calls'
+            if name == 'db':
+                description = f'{self.counts[name]} queries'
+            elif name == 'cache':
+                description = f"{self.counts['cache_hits']} hits, {self.counts['cache_misses']} misses"
+            metrics.append(f'{name};dur={elapsed * 1000:.2f};desc="{description}"')
+        metrics.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(metrics)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """Return the profile of the request being handled, or None when not profiling."""
+    return _current_profile.get()
+
+
+@contextmanager
+def timed(name: str):
+    """
+    Add the time spent in the block to the current request's `name` metric.
+    A no-op outside a profiled request; also usable as a decorator.
+
+    Usage:
+        with timed('encode'):
+            embedding = model.encode(text)
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - start)
+
+
+def record_cache_lookups(hits: int, misses: int) -> None:
+    """Count cache hits and misses in the current request's profile."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.counts['cache_hits'] += hits
+        profile.counts['cache_misses'] += misses
+
+
+class ProfileFormatter(logging.Formatter):
+    """Log formatter appending a record's `request_profile` metrics to the message as JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        profile = getattr(record, 'request_profile', None)
+        if profile is None:
+            return message
+        return f"{message} {json.dumps(profile, sort_keys=True, default=str)}"
+
+
+class ProfilingMiddleware:
+    """
+    Measure where each request's time goes when PROFILING_ENABLED is set.
+
+    Records SQL queries, cache calls, render time and the `timed()` hooks of the
+    code being run, returns them in a `Server-Timing` header and logs them as one
+    structured line. A PROFILING_SAMPLE_RATE fraction of requests also runs under
+    cProfile; the profiles of those slower than PROFILING_SLOW_REQUEST_MS are saved
+    to PROFILING_OUTPUT_DIR. The body of streaming responses is produced after
+    the middleware returns and is not measured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILING_ENABLED:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        profiler = self.start_profiler()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profile):
+                response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            _current_profile.reset(token)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = profile.server_timing(total)
+        data = profile.as_dict(total)
+        if profiler is not None and total * 1000 >= settings.PROFILING_SLOW_REQUEST_MS:
+            data['profile'] = self.save_profile(profiler, request)
+        logger.info(
+            "%s %s %s %.2fms", request.method, request.path, response.status_code, total * 1000,
+            extra={'request_profile': dict(data, method=request.method, path=request.path, status=response.status_code)}
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        """Time the rendering of DRF and template responses, which happens after the view returns."""
+        profile = _current_profile.get()
+        if profile is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: profile.add('render', time.perf_counter() - start))
+        return response
+
+    @staticmethod
+    def start_profiler() -> Optional[cProfile.Profile]:
+        """Start cProfile for a sampled request, or return None."""
+        if not settings.PROFILING_SAMPLE_RATE or random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread
+            return None
+        return profiler
+
+    @staticmethod
+    def save_profile(profiler: cProfile.Profile, request) -> str:
+        """Write a request's cProfile stats, readable with `pstats`, and return the file path."""
+        os.makedirs(settings.PROFILING_OUTPUT_DIR, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_') or 'root'
+        filename = f"{timezone.now():%Y%m%dT%H%M%S%f}_{request.method}_{slug}.prof"
+        path = os.path.join(settings.PROFILING_OUTPUT_DIR, filename)
+        profiler.dump_stats(path)
+        return path
@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'product_api.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,6 +60,31 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request Server-Timing header and structured log line (SQL, cache, encode, render times)
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+# Fraction of profiled requests also run under cProfile (0 disables it)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+# Sampled requests at least this slow (ms) have their cProfile stats saved
+PROFILING_SLOW_REQUEST_MS = config('PROFILING_SLOW_REQUEST_MS', default=500, cast=int)
+# Directory of saved cProfile stats
+PROFILING_OUTPUT_DIR = config('PROFILING_OUTPUT_DIR', default=str(BASE_DIR / 'profiles'))
+
+# Print the per-request profiling lines; other loggers keep Django's defaults
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        # Query, cache, serialize and render metrics of each request as JSON
+        'request_profile': {'()': 'product_api.profiling.ProfileFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'request_profile'},
+    },
+    'loggers': {
+        'product_api.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 ROOT_URLCONF = 'product_api.urls'
 
 TEMPLATES = [
@@ -133,9 +159,14 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
 
+# Resolve API users from JWT claims instead of loading the User row on every request
+JWT_STATELESS_AUTHENTICATION = config('JWT_STATELESS_AUTHENTICATION', default=False, cast=bool)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',  # Use JWT
+        # Use JWT
+        'authentication.authentication.StatelessJWTAuthentication' if JWT_STATELESS_AUTHENTICATION
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
         'rest_framework.authentication.BasicAuthentication',  # Keep for admin
         'rest_framework.authentication.SessionAuthentication',  # Keep for admin
     ],
@@ -151,11 +182,23 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    # Rotated refresh tokens are blacklisted in the cache (authentication.tokens),
+    # with keys expiring along with the tokens, rather than in the token_blacklist tables
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.serializers.RefreshSerializer',
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Seconds a user's group names stay cached for permission checks (entries are also dropped on group changes)
+USER_GROUPS_CACHE_TIMEOUT = config('USER_GROUPS_CACHE_TIMEOUT', default=86400, cast=int)
+
+# Square thumbnails (edge in pixels) generated from profile pictures by a background task
+PROFILE_PIC_SIZES = {'small': 64, 'medium': 256, 'large': 512}
+# Thumbnail returned as the user's `profile_pic`
+PROFILE_PIC_DEFAULT_SIZE = config('PROFILE_PIC_DEFAULT_SIZE', default='medium')
+# WebP quality of profile picture thumbnails (0-100)
+PROFILE_PIC_QUALITY = config('PROFILE_PIC_QUALITY', default=80, cast=int)
 
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
@@ -180,11 +223,72 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 # Cache settings
 CACHES = {
+    # Per-process LRU in front of Redis for version-keyed entries; everything else goes to Redis
     'default': {
+        'BACKEND': 'product_api.cache.TwoTierCache',
+        'LOCATION': 'l1',
+        'OPTIONS': {
+            'L2_CACHE': 'redis',
+            'MAX_ENTRIES': config('L1_CACHE_MAX_ENTRIES', default=1000, cast=int),
+            'L1_TIMEOUT': config('L1_CACHE_TIMEOUT', default=300, cast=int),
+            'L1_KEY_PREFIXES': [
+                'products:insights:', 'products:trending:', 'products:embedding:', 'products:response:',
+            ],
+        }
+    },
+    'redis': {
         'BACKEND': 'django_redis.cache.RedisCache',
         'LOCATION': os.getenv('REDIS_URL', default='redis://localhost:6379/1'),  # Use different DB than Celery
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         }
     }
-}
\ No newline at end of file
+}
+
+# Shopify webhook settings
+# Shopify retries failed deliveries for up to 48 hours with the same webhook id
+SHOPIFY_WEBHOOK_DEDUP_TTL = config('SHOPIFY_WEBHOOK_DEDUP_TTL', default=60 * 60 * 48, cast=int)
+
+# Inventory updates applied per transaction by the batch endpoint and nightly import
+INVENTORY_BATCH_CHUNK_SIZE = config('INVENTORY_BATCH_CHUNK_SIZE', default=1000, cast=int)
+
+# Products created, updated or deleted per transaction by the bulk product endpoint
+PRODUCT_BULK_CHUNK_SIZE = config('PRODUCT_BULK_CHUNK_SIZE', default=500, cast=int)
+
+# Product names encoded per batch when generating embeddings
+EMBEDDING_BATCH_SIZE = config('EMBEDDING_BATCH_SIZE', default=64, cast=int)
+
+# Nightly inventory import: rows per chunk worker and where remote feeds are downloaded
+INVENTORY_IMPORT_CHUNK_SIZE = config('INVENTORY_IMPORT_CHUNK_SIZE', default=5000, cast=int)
+INVENTORY_IMPORT_DIR = config('INVENTORY_IMPORT_DIR', default=str(BASE_DIR / 'data' / 'imports'))
+INVENTORY_FEED_TIMEOUT = config('INVENTORY_FEED_TIMEOUT', default=60, cast=int)
+
+# Claim-check artifacts passed between nightly import stages, removed after each run
+INVENTORY_ARTIFACT_DIR = config('INVENTORY_ARTIFACT_DIR', default=str(BASE_DIR / 'data' / 'artifacts'))
+INVENTORY_ARTIFACT_COMPRESSLEVEL = config('INVENTORY_ARTIFACT_COMPRESSLEVEL', default=6, cast=int)
+# Row fingerprints of the last successful import, used to apply only changed rows
+INVENTORY_FINGERPRINT_DIR = config('INVENTORY_FINGERPRINT_DIR', default=str(BASE_DIR / 'data' / 'fingerprints'))
+
+# Record wall time, rows, queries and memory of Celery tasks and pipeline stages
+TASK_METRICS_ENABLED = config('TASK_METRICS_ENABLED', default=True, cast=bool)
+# Also trace the peak Python memory of each task and stage with tracemalloc, which slows them down
+TASK_METRICS_TRACE_MEMORY = config('TASK_METRICS_TRACE_MEMORY', default=False, cast=bool)
+
+# Default and maximum number of products per page of the product list (?page_size=)
+PRODUCT_PAGE_SIZE = config('PRODUCT_PAGE_SIZE', default=50, cast=int)
+PRODUCT_MAX_PAGE_SIZE = config('PRODUCT_MAX_PAGE_SIZE', default=500, cast=int)
+
+# Seconds to cache product list/detail response data keyed by ETag (0 disables the response cache)
+PRODUCT_RESPONSE_CACHE_TIMEOUT = config('PRODUCT_RESPONSE_CACHE_TIMEOUT', default=0, cast=int)
+
+# Rows fetched from the database and encoded per chunk of the streaming product export
+PRODUCT_EXPORT_CHUNK_SIZE = config('PRODUCT_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Tables with at least this many estimated rows show an estimated total in the admin instead of COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=100000, cast=int)
+
+# Admin bulk actions selecting more products than this invalidate the whole catalog instead of each product
+ADMIN_PRODUCT_INVALIDATION_THRESHOLD = config('ADMIN_PRODUCT_INVALIDATION_THRESHOLD', default=1000, cast=int)
+
+# Dotted path of the product list ?search= backend (empty picks the full-text backend of the database)
+PRODUCT_SEARCH_BACKEND = config('PRODUCT_SEARCH_BACKEND', default='')
@@ -1,31 +1,140 @@
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.admin import DateFieldListFilter
-from django.db.models import F  # Import F for database-level operations
-from .models import Product, StockHistory
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, Q  # Import F for database-level operations
+from django.utils import timezone
+from .caching import TAG_INSIGHTS, invalidate_catalog, invalidate_products
+from .models import DiscountCampaign, InventoryImportRun, Product, StockHistory, TaskMetric
+from .pagination import EstimatedCountPaginator
+from .search import get_search_backend
+
+
+class RangeListFilter(admin.SimpleListFilter):
+    """
+    Filter on fixed ranges of a numeric field.
+    Unlike field filters it needs no `SELECT DISTINCT` over the table to build its choices.
+    """
+    field_name = None
+    # (lookup value, label, lower bound inclusive, upper bound exclusive)
+    ranges = ()
+
+    def lookups(self, request, model_admin):
+        return [(value, label) for value, label, _, _ in self.ranges]
+
+    def queryset(self, request, queryset):
+        for value, _, lower, upper in self.ranges:
+            if self.value() == value:
+                if lower is not None:
+                    queryset = queryset.filter(**{f'{self.field_name}__gte': lower})
+                if upper is not None:
+                    queryset = queryset.filter(**{f'{self.field_name}__lt': upper})
+                return queryset
+        return queryset
+
+
+class QuantityRangeFilter(RangeListFilter):
+    title = 'quantity'
+    parameter_name = 'quantity_range'
+    field_name = 'quantity'
+    ranges = (
+        ('out', 'Out of stock', None, 1),
+        ('low', 'Low (1-9)', 1, 10),
+        ('medium', '10-99', 10, 100),
+        ('high', '100 or more', 100, None),
+    )
+
+
+class PriceRangeFilter(RangeListFilter):
+    title = 'price'
+    parameter_name = 'price_range'
+    field_name = 'price'
+    ranges = (
+        ('under-10', 'Under 10', None, 10),
+        ('10-50', '10-50', 10, 50),
+        ('50-200', '50-200', 50, 200),
+        ('200-plus', '200 or more', 200, None),
+    )
+
+
+class EmbeddingListFilter(admin.SimpleListFilter):
+    title = 'embedding'
+    parameter_name = 'has_embedding'
+
+    def lookups(self, request, model_admin):
+        return [('yes', 'Yes'), ('no', 'No')]
+
+    def queryset(self, request, queryset):
+        if self.value() in ('yes', 'no'):
+            return queryset.filter(embedding__isnull=self.value() == 'no')
+        return queryset
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     """
     Admin interface for Product model with advanced filtering and bulk price update actions.
+    Built for large catalogs: the embedding column is never loaded, filters use
+    fixed ranges instead of distinct values, and totals may be estimated.
     """
-    list_display = ('name', 'sku', 'price', 'quantity', 'last_updated', 'i_profile', 'embedding')
+    list_display = ('name', 'sku', 'price', 'quantity', 'last_updated', 'i_profile', 'has_embedding')
     list_filter = (
-        'sku',
-        'name',
+        PriceRangeFilter,
+        QuantityRangeFilter,
+        EmbeddingListFilter,
         ('last_updated', DateFieldListFilter),  # Advanced date-based filtering
     )
-    search_fields = ('name', 'sku')  # Search by name and SKU
+    list_select_related = ('i_profile__user',)
+    search_fields = ('name', 'sku')  # Search by name and SKU, through the full-text search backend
+    raw_id_fields = ('i_profile',)
     list_per_page = 25  # Pagination for better usability
     ordering = ('-last_updated',)  # Default sort by last_updated (descending)
-    date_hierarchy = 'last_updated'  # Drill-down navigation by date
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # Skip the extra COUNT(*) of the whole table when filtering
+
+    def get_queryset(self, request):
+        """Flag whether each product has an embedding without fetching the embedding itself."""
+        return super().get_queryset(request).defer('embedding').annotate(
+            embedding_present=ExpressionWrapper(Q(embedding__isnull=False), output_field=BooleanField())
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search with the product search backend instead of `LIKE '%term%'` scans."""
+        if not search_term.strip():
+            return queryset, False
+        matches = get_search_backend(queryset.db).search(Product.objects.all(), search_term)
+        return queryset.filter(pk__in=matches.order_by().values('pk')), False
+
+    @admin.display(boolean=True, description='Embedding', ordering='embedding_present')
+    def has_embedding(self, obj):
+        return obj.embedding_present
 
     actions = ['increase_price_10_percent', 'decrease_price_10_percent']
 
+    def scale_prices(self, queryset, factor):
+        """
+        Multiply the prices of the selected products in one UPDATE.
+        Bumps `last_updated` and invalidates their cached data once committed,
+        since queryset updates send no signals. Selections larger than
+        `ADMIN_PRODUCT_INVALIDATION_THRESHOLD` bump the catalog and insights
+        versions instead of one tag per product.
+        """
+        threshold = settings.ADMIN_PRODUCT_INVALIDATION_THRESHOLD
+        with transaction.atomic():
+            pks = list(queryset.order_by().values_list('pk', flat=True)[:threshold + 1])
+            if len(pks) > threshold:
+                selected = Product.objects.filter(pk__in=queryset.order_by().values('pk'))
+                transaction.on_commit(lambda: invalidate_catalog(TAG_INSIGHTS))
+            else:
+                selected = Product.objects.filter(pk__in=pks)
+                transaction.on_commit(lambda: invalidate_products(pks))
+            updated = selected.update(price=F('price') * factor, last_updated=timezone.now())
+        return updated
+
     def increase_price_10_percent(self, request, queryset):
         """
         Bulk action to increase product prices by 10%.
         """
-        updated = queryset.update(price=F('price') * 1.1)
+        updated = self.scale_prices(queryset, 1.1)
         self.message_user(request, f"{updated} products' prices increased by 10%%.")  # Escape % with %%
 
     increase_price_10_percent.short_description = "Increase selected products' prices by 10%%"  # Escape % with %%
@@ -34,7 +143,7 @@ class ProductAdmin(admin.ModelAdmin):
         """
         Bulk action to decrease product prices by 10%.
         """
-        updated = queryset.update(price=F('price') * 0.9)
+        updated = self.scale_prices(queryset, 0.9)
         self.message_user(request, f"{updated} products' prices decreased by 10%%.")  # Escape % with %%
 
     decrease_price_10_percent.short_description = "Decrease selected products' prices by 10%%"  # Escape % with %%
@@ -46,4 +155,43 @@ class StockHistoryAdmin(admin.ModelAdmin):
     Displays stock changes with timestamps.
     """
     list_display = ('product', 'quantity', 'timestamp')
+    list_select_related = ('product',)
+    autocomplete_fields = ('product',)
+    search_fields = ('=product__sku',)  # Exact SKU lookups use the unique index
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('product__embedding')
+
+
+@admin.register(InventoryImportRun)
+class InventoryImportRunAdmin(admin.ModelAdmin):
+    """
+    Admin interface for InventoryImportRun model.
+    Displays nightly import runs and their status.
+    """
+    list_display = ('source', 'status', 'started_at', 'finished_at')
+    list_filter = ('status',)
+
+
+@admin.register(DiscountCampaign)
+class DiscountCampaignAdmin(admin.ModelAdmin):
+    """
+    Admin interface for DiscountCampaign model.
+    Displays campaigns, their schedule and how many products they discounted.
+    """
+    list_display = ('name', 'discount_percentage', 'starts_at', 'ends_at', 'status', 'product_count')
+    list_filter = ('status',)
+    readonly_fields = ('status', 'product_count', 'applied_at', 'reverted_at')
+
+
+@admin.register(TaskMetric)
+class TaskMetricAdmin(admin.ModelAdmin):
+    """
+    Admin interface for TaskMetric model.
+    Displays timings and throughput of Celery tasks and pipeline stages.
+    """
+    list_display = ('name', 'kind', 'status', 'started_at', 'wall_time', 'rows', 'rows_per_second', 'query_count')
+    list_filter = ('kind', 'status', 'name')
+    search_fields = ('run_id',)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        # Connect the cache invalidation and Celery task instrumentation signal handlers
+        from . import instrumentation, signals  # noqa: F401
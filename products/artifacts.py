@@ -0,0 +1,65 @@
+import gzip
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, Iterable, Iterator
+from django.conf import settings
+
+
+def create_run_dir() -> str:
+    """
+    Create a directory for the artifacts of one pipeline run.
+
+    Returns:
+        str: Path of the new directory under INVENTORY_ARTIFACT_DIR.
+    """
+    run_dir = os.path.join(settings.INVENTORY_ARTIFACT_DIR, uuid.uuid4().hex)
+    os.makedirs(run_dir)
+    return run_dir
+
+
+def write_artifact(run_dir: str, name: str, records: Iterable[Dict]) -> Dict:
+    """
+    Stream records to a gzip-compressed JSON Lines file.
+
+    This is the claim check passed between pipeline stages: the records stay on
+    disk and only the returned reference goes through the broker.
+
+    Args:
+        run_dir (str): Directory of the pipeline run.
+        name (str): Artifact name, unique within the run.
+        records (Iterable[Dict]): Records to write; may be a generator.
+
+    Returns:
+        Dict: Reference with the artifact path and a summary holding the record count.
+    """
+    path = os.path.join(run_dir, f"{name}.jsonl.gz")
+    count = 0
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=settings.INVENTORY_ARTIFACT_COMPRESSLEVEL) as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(',', ':')))
+            f.write('\n')
+            count += 1
+    return {'artifact': path, 'summary': {'rows': count}}
+
+
+def read_artifact(ref: Dict) -> Iterator[Dict]:
+    """
+    Lazily read the records of an artifact.
+
+    Args:
+        ref (Dict): Reference returned by `write_artifact`.
+
+    Yields:
+        Dict: The stored records, in order.
+    """
+    with gzip.open(ref['artifact'], 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def cleanup_run(run_dir: str) -> None:
+    """Delete every artifact of a pipeline run."""
+    if run_dir:
+        shutil.rmtree(run_dir, ignore_errors=True)
@@ -0,0 +1,472 @@
+import base64
+import csv
+import hashlib
+import hmac
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from decouple import config
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from .artifacts import cleanup_run, create_run_dir
+from .caching import TAG_INSIGHTS, invalidate_tags
+from .instrumentation import PeakMemory, QueryCounter
+from .models import InventoryImportChunk, InventoryImportRun, Product
+from .search import LikeSearchBackend, get_search_backend
+from .seeding import seed_products
+from .serializers import ProductReadSerializer, ProductSerializer
+from .services import bulk_delete_products
+
+
+def render_products_full() -> bytes:
+    """Render every product the way list responses did before the read path: model instances and ProductSerializer."""
+    return JSONRenderer().render(ProductSerializer(Product.objects.order_by('name', 'id'), many=True).data)
+
+
+def render_products_fast() -> bytes:
+    """Render every product through `as_rows()` and ProductReadSerializer."""
+    return JSONRenderer().render(ProductReadSerializer(Product.objects.as_rows().order_by('name', 'id'), many=True).data)
+
+
+def time_renderer(render: Callable[[], bytes], rows: int, repeat: int) -> Dict[str, float]:
+    """
+    Time a render function, keeping the best of `repeat` runs.
+
+    Args:
+        render (Callable[[], bytes]): Function rendering the whole catalog.
+        rows (int): Number of products rendered per call.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        Dict[str, float]: Best wall time in seconds, rows per second and response bytes.
+    """
+    best = float('inf')
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(render())
+        best = min(best, time.perf_counter() - start)
+    return {'seconds': best, 'rows_per_second': rows / best if best else 0, 'bytes': size}
+
+
+def create_benchmark_products(rows: int) -> None:
+    """Insert `rows` synthetic products; call it inside a transaction that is rolled back."""
+    Product.objects.bulk_create(
+        Product(
+            name=f"Benchmark Product {i}",
+            sku=f"BENCH{i:07d}",
+            price=Decimal(10 + i % 990) + Decimal('0.99'),
+            quantity=i % 500,
+            discount_percentage=Decimal(i % 40)
+        )
+        for i in range(rows)
+    )
+
+
+def benchmark_product_serialization(rows: int = 0, repeat: int = 3) -> Dict:
+    """
+    Compare rows/sec of the full and fast product list serialization paths.
+
+    Args:
+        rows (int): If set, benchmark this many synthetic products inserted in a
+            transaction that is rolled back afterwards, instead of the existing catalog.
+        repeat (int): Number of timed runs per path.
+
+    Returns:
+        Dict: Timings of both paths, the speedup and whether their output is identical.
+    """
+    with transaction.atomic():
+        if rows:
+            create_benchmark_products(rows)
+        count = Product.objects.count()
+        full = time_renderer(render_products_full, count, repeat)
+        fast = time_renderer(render_products_fast, count, repeat)
+        identical = render_products_full() == render_products_fast()
+        transaction.set_rollback(True)
+    return {
+        'rows': count,
+        'full': full,
+        'fast': fast,
+        'speedup': full['seconds'] / fast['seconds'] if fast['seconds'] else 0,
+        'identical': identical,
+    }
+
+
+def benchmark_product_search(query: str, rows: int = 0, repeat: int = 3) -> Dict:
+    """
+    Compare the first page of `?search=` results from the LIKE scan and the full-text backend.
+
+    Args:
+        query (str): Search query.
+        rows (int): If set, benchmark this many synthetic products inserted in a
+            transaction that is rolled back afterwards, instead of the existing catalog.
+        repeat (int): Number of timed runs per backend.
+
+    Returns:
+        Dict: Best wall time and number of matches per backend, and the speedup.
+    """
+    backends = {'like': LikeSearchBackend(), 'fulltext': get_search_backend()}
+    results = {}
+    with transaction.atomic():
+        if rows:
+            create_benchmark_products(rows)
+        count = Product.objects.count()
+        for label, backend in backends.items():
+            def first_page() -> int:
+                matches = backend.search(Product.objects.as_rows(), query)
+                list(matches[:settings.PRODUCT_PAGE_SIZE])
+                return matches.count()
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                matches = first_page()
+                best = min(best, time.perf_counter() - start)
+            results[label] = {'backend': type(backend).__name__, 'seconds': best, 'matches': matches}
+        transaction.set_rollback(True)
+    return {
+        'rows': count,
+        'query': query,
+        **results,
+        'speedup': results['like']['seconds'] / results['fulltext']['seconds'] if results['fulltext']['seconds'] else 0,
+    }
+
+
+# Catalog sizes and scenarios of the end-to-end benchmark suite
+SUITE_SIZES = (10000, 100000, 1000000)
+SUITE_SCENARIOS = ('list', 'search', 'insights', 'webhook', 'nightly_import', 'generate_embeddings')
+# Scenarios running a whole pipeline, timed fewer times than API requests
+PIPELINE_SCENARIOS = ('nightly_import', 'generate_embeddings')
+SUITE_SKU_PREFIX = 'BENCHSUITE'
+SUITE_USERNAME = 'benchmark-suite-user'
+SEARCH_QUERIES = ('wireless', 'steel mug', 'ergonomic key', 'lamp')
+
+
+def summarize_latencies(samples: List[float]) -> Dict[str, float]:
+    """Return latency percentiles, mean, min and max in milliseconds from samples in seconds."""
+    milliseconds = np.array(samples) * 1000
+    p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99])
+    return {
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'mean_ms': round(float(milliseconds.mean()), 3),
+        'min_ms': round(float(milliseconds.min()), 3),
+        'max_ms': round(float(milliseconds.max()), 3),
+    }
+
+
+def measure(setup: Optional[Callable[[int], Any]], operation: Callable[[Any], Any], repeat: int) -> Dict:
+    """
+    Time `repeat` calls of an operation, then run it once more under tracemalloc.
+
+    Memory is measured in a separate run because tracing allocations slows the
+    code down and would skew the latencies.
+
+    Args:
+        setup (Callable[[int], Any], optional): Untimed preparation run before each call
+            with the call's index; its result is passed to `operation`.
+        operation (Callable[[Any], Any]): The code to time, given the setup result or the index.
+        repeat (int): Number of timed calls.
+
+    Returns:
+        Dict: Latency percentiles, queries and query time per call, and peak traced memory in bytes.
+    """
+    samples = []
+    queries = QueryCounter()
+    for i in range(repeat):
+        argument = setup(i) if setup else i
+        with connection.execute_wrapper(queries):
+            start = time.perf_counter()
+            operation(argument)
+            samples.append(time.perf_counter() - start)
+
+    argument = setup(repeat) if setup else repeat
+    memory = PeakMemory().start()
+    try:
+        operation(argument)
+    finally:
+        peak_memory = memory.stop()
+    return {
+        'runs': repeat,
+        **summarize_latencies(samples),
+        'queries': round(queries.count / repeat, 2),
+        'query_ms': round(queries.time / repeat * 1000, 3),
+        'peak_memory': peak_memory,
+    }
+
+
+class EndToEndBenchmark:
+    """
+    Scenarios of the benchmark suite, run against a catalog seeded by `seed_products`
+    with SUITE_SKU_PREFIX.
+
+    API scenarios go through the full request stack with a test client. Each
+    `scenario_<name>` method returns the optional setup and the operation to time.
+    Call `close()` afterwards to delete the user, import runs and feeds it created.
+    """
+
+    def __init__(self, size: int, embedding_rows: int = 1000):
+        self.size = size
+        self.embedding_rows = embedding_rows
+        self.rng = random.Random(0)
+        self.work_dir = tempfile.mkdtemp()
+        self.user = User.objects.filter(username=SUITE_USERNAME).first() or User.objects.create_user(SUITE_USERNAME)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def close(self) -> None:
+        InventoryImportRun.objects.filter(source__startswith=self.work_dir).delete()
+        self.user.delete()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def scenario(self, name: str) -> Tuple[Optional[Callable[[int], Any]], Callable[[Any], Any]]:
+        return getattr(self, f'scenario_{name}')()
+
+    def random_sku(self) -> str:
+        return f"{SUITE_SKU_PREFIX}{self.rng.randrange(self.size):08d}"
+
+    def request(self, method: str, url: str, data: Any = None, **extra) -> None:
+        response = getattr(self.client, method)(url, data, **extra)
+        if response.status_code != 200:
+            raise RuntimeError(f"{method.upper()} {url} returned {response.status_code}")
+
+    def scenario_list(self):
+        """First page of the product list."""
+        url = reverse('products:product-list-create')
+        return None, lambda i: self.request('get', url)
+
+    def scenario_search(self):
+        """First page of `?search=` results, cycling through SEARCH_QUERIES."""
+        url = reverse('products:product-list-create')
+        return None, lambda i: self.request('get', url, {'search': SEARCH_QUERIES[i % len(SEARCH_QUERIES)]})
+
+    def scenario_insights(self):
+        """Insights computed from scratch, as on the first request after a change."""
+        url = reverse('products:product-insights')
+        return lambda i: invalidate_tags(TAG_INSIGHTS), lambda _: self.request('get', url)
+
+    def scenario_webhook(self):
+        """A signed Shopify inventory webhook for a random product."""
+        url = reverse('products:shopify-inventory-webhook')
+        secret = config('SHOPIFY_WEBHOOK_SECRET', default='').encode('utf-8')
+
+        def setup(i: int) -> Tuple[bytes, str]:
+            body = json.dumps({'sku': self.random_sku(), 'inventory_quantity': i % 500}).encode('utf-8')
+            return body, base64.b64encode(hmac.new(secret, body, hashlib.sha256).digest()).decode('utf-8')
+
+        def post(delivery: Tuple[bytes, str]) -> None:
+            body, signature = delivery
+            self.request(
+                'post', url, body, content_type='application/json',
+                HTTP_X_SHOPIFY_HMAC_SHA256=signature, HTTP_X_SHOPIFY_WEBHOOK_ID=uuid.uuid4().hex
+            )
+        return setup, post
+
+    def scenario_nightly_import(self):
+        """
+        A nightly feed covering every product with new quantities.
+
+        The chunks are processed one after another in this process, so this is
+        the total work of the import rather than the wall time of the parallel chord;
+        the report email is not sent.
+        """
+        from .tasks import import_product_data, start_inventory_run, validate_and_update_inventory
+
+        def setup(i: int) -> str:
+            path = os.path.join(self.work_dir, f'feed-{i}.csv')
+            with open(path, 'w', newline='') as feed:
+                writer = csv.writer(feed)
+                writer.writerow(['sku', 'inventory_quantity'])
+                for n in range(self.size):
+                    writer.writerow([f"{SUITE_SKU_PREFIX}{n:08d}", (n * 7 + i) % 500])
+            return path
+
+        def run_import(path: str) -> None:
+            run, _ = start_inventory_run(path, path)
+            run_dir = create_run_dir()
+            try:
+                for chunk in run.chunks.filter(status=InventoryImportChunk.STATUS_PENDING):
+                    validate_and_update_inventory(import_product_data(path, chunk.start, chunk.end, run_dir))
+            finally:
+                cleanup_run(run_dir)
+                os.remove(run.row_fingerprints)
+                os.remove(path)
+        return setup, run_import
+
+    def scenario_generate_embeddings(self):
+        """Embeddings of `embedding_rows` products generated by the batched task."""
+        from .tasks import generate_product_embeddings
+        ids = list(
+            Product.objects.filter(sku__startswith=SUITE_SKU_PREFIX).order_by('id')
+            .values_list('id', flat=True)[:self.embedding_rows]
+        )
+
+        def setup(i: int) -> List[int]:
+            Product.objects.filter(pk__in=ids).update(embedding=None)
+            return ids
+        return setup, generate_product_embeddings
+
+
+def benchmark_metadata() -> Dict[str, str]:
+    """Describe the code and environment a benchmark ran on."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ''
+    return {
+        'commit': commit,
+        'created_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'python': platform.python_version(),
+    }
+
+
+def check_benchmark_database(database: Optional[str] = None) -> None:
+    """
+    Refuse to run the suite against a database that may hold real data.
+
+    The suite commits its catalog, as production does, and deletes it afterwards,
+    so it runs on the default database only with DEBUG on.
+
+    Args:
+        database (str, optional): Alias of a dedicated database to run against instead.
+
+    Raises:
+        ValueError: If DEBUG is off and no other database is named, or the alias is unknown.
+    """
+    if database in (None, DEFAULT_DB_ALIAS):
+        if not settings.DEBUG:
+            raise ValueError(
+                "The benchmark suite writes to the database: enable DEBUG or name a dedicated database alias"
+            )
+    elif database not in settings.DATABASES:
+        raise ValueError(f"Unknown database alias '{database}'")
+
+
+@contextmanager
+def use_database(database: Optional[str] = None):
+    """Send the default connection's queries to `database` inside the block."""
+    if database in (None, DEFAULT_DB_ALIAS):
+        yield
+        return
+    default = connections[DEFAULT_DB_ALIAS]
+    connections[DEFAULT_DB_ALIAS] = connections[database]
+    try:
+        yield
+    finally:
+        connections[DEFAULT_DB_ALIAS] = default
+
+
+def delete_suite_catalog() -> None:
+    """Delete the products seeded by the suite and their history, a chunk per transaction."""
+    while True:
+        skus = list(
+            Product.objects.filter(sku__startswith=SUITE_SKU_PREFIX)
+            .values_list('sku', flat=True)[:settings.PRODUCT_BULK_CHUNK_SIZE]
+        )
+        if not skus:
+            return
+        list(bulk_delete_products(skus))
+
+
+def run_benchmark_suite(
+    sizes: Iterable[int] = SUITE_SIZES, scenarios: Iterable[str] = SUITE_SCENARIOS, repeat: int = 20,
+    pipeline_repeat: int = 3, history_per_product: int = 1, embedding_rows: int = 1000,
+    progress: Optional[Callable[[int, str, Dict], None]] = None, database: Optional[str] = None
+) -> Dict:
+    """
+    Run the end-to-end scenarios against seeded catalogs of each size.
+
+    Every write is committed, so on-commit cache invalidation and the other
+    commit-time work are measured as in production. The seeded catalog, its
+    history and the suite's user and import runs are deleted after each size,
+    and leftovers of an interrupted run before it. A failing scenario is
+    reported with its error instead of stopping the suite.
+
+    Args:
+        sizes (Iterable[int]): Numbers of products to seed.
+        scenarios (Iterable[str]): Names from SUITE_SCENARIOS.
+        repeat (int): Timed calls per API scenario.
+        pipeline_repeat (int): Timed calls per scenario of PIPELINE_SCENARIOS.
+        history_per_product (int): Stock history rows seeded per product.
+        embedding_rows (int): Products whose embeddings `generate_embeddings` generates.
+        progress (Callable, optional): Called with the size, scenario and result of each scenario.
+        database (str, optional): Alias of a dedicated database to run against;
+            without it the suite runs on the default database and requires DEBUG.
+
+    Returns:
+        Dict: `benchmark_metadata()` and the results per size and scenario.
+
+    Raises:
+        ValueError: If `check_benchmark_database` refuses the database.
+    """
+    check_benchmark_database(database)
+    results = {}
+    with use_database(database):
+        for size in sizes:
+            delete_suite_catalog()
+            suite = None
+            try:
+                seeding = seed_products(
+                    size, history=size * history_per_product, embeddings=False, prefix=SUITE_SKU_PREFIX
+                )
+                suite = EndToEndBenchmark(size, embedding_rows)
+                size_results = {'seed_seconds': round(seeding['seconds'], 3)}
+                for name in scenarios:
+                    runs = pipeline_repeat if name in PIPELINE_SCENARIOS else repeat
+                    try:
+                        size_results[name] = measure(*suite.scenario(name), runs)
+                    except Exception as exc:
+                        size_results[name] = {'error': f'{type(exc).__name__}: {exc}'}
+                    if progress:
+                        progress(size, name, size_results[name])
+            finally:
+                if suite is not None:
+                    suite.close()
+                delete_suite_catalog()
+            results[str(size)] = size_results
+        metadata = benchmark_metadata()
+    return {**metadata, 'results': results}
+
+
+def compare_results(baseline: Dict, current: Dict) -> List[Dict]:
+    """
+    Compare the latencies of two suite runs, e.g. of two commits.
+
+    Returns:
+        List[Dict]: Per size and scenario measured in both runs, the baseline and
+        current p50 and p95 and the ratio of the p50s (below 1 is faster).
+    """
+    rows = []
+    for size, scenarios in current['results'].items():
+        for name, result in scenarios.items():
+            previous = baseline['results'].get(size, {}).get(name)
+            if not isinstance(result, dict) or 'p50_ms' not in result or not previous or 'p50_ms' not in previous:
+                continue
+            rows.append({
+                'size': int(size),
+                'scenario': name,
+                'baseline_p50_ms': previous['p50_ms'],
+                'p50_ms': result['p50_ms'],
+                'baseline_p95_ms': previous['p95_ms'],
+                'p95_ms': result['p95_ms'],
+                'ratio': result['p50_ms'] / previous['p50_ms'] if previous['p50_ms'] else 0,
+            })
+    return rows
@@ -0,0 +1,149 @@
+import hashlib
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from .models import Product
+
+# Every cached value lives under `products:<namespace>:...` and embeds the versions
+# of the tags it depends on. Bumping a tag's version makes all of its keys
+# unreachable at once; the orphaned entries simply expire.
+KEY_PREFIX = 'products'
+TAG_CATALOG = 'catalog'
+TAG_INSIGHTS = 'insights'
+CATALOG_LAST_MODIFIED_KEY = f"{KEY_PREFIX}:catalog_last_modified"
+
+
+def product_tag(pk: int) -> str:
+    """Return the tag of everything cached for one product."""
+    return f"product:{pk}"
+
+
+def tag_version_key(tag: str) -> str:
+    return f"{KEY_PREFIX}:tag:{tag}"
+
+
+def get_tag_versions(tags: Iterable[str]) -> Dict[str, str]:
+    """
+    Return the current version of each tag, creating versions for unknown tags.
+
+    Args:
+        tags (Iterable[str]): Tags to look up.
+
+    Returns:
+        Dict[str, str]: Version token per tag.
+    """
+    keys = {tag_version_key(tag): tag for tag in tags}
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+        versions.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def invalidate_tags(*tags: str) -> None:
+    """Invalidate every key depending on any of `tags` with one write per tag, in one round trip."""
+    cache.set_many({tag_version_key(tag): uuid.uuid4().hex for tag in tags}, timeout=None)
+
+
+def make_key(namespace: str, *parts: Any, tags: Iterable[str] = ()) -> str:
+    """
+    Build a namespaced cache key that changes whenever one of its tags is invalidated.
+
+    Args:
+        namespace (str): Kind of cached value, e.g. 'insights' or 'embedding'.
+        *parts (Any): Values identifying the entry within the namespace.
+        tags (Iterable[str]): Tags whose invalidation must discard the entry.
+
+    Returns:
+        str: The cache key.
+    """
+    key = ':'.join([KEY_PREFIX, namespace, *(str(part) for part in parts)])
+    tags = sorted(tags)
+    if tags:
+        versions = get_tag_versions(tags)
+        key += ':' + make_etag(*(versions[tag] for tag in tags))
+    return key
+
+
+def invalidate_catalog(*tags: str) -> None:
+    """
+    Invalidate everything derived from the catalog as a whole with one version bump,
+    for set-based writes touching many products. Call it once the write has been committed.
+
+    Args:
+        *tags (str): Other tags to bump in the same write, e.g. TAG_INSIGHTS when
+            the write changes what insights show.
+    """
+    invalidate_tags(TAG_CATALOG, *tags)
+    cache.set(CATALOG_LAST_MODIFIED_KEY, timezone.now(), timeout=None)
+
+
+def invalidate_products(pks: Iterable[int]) -> None:
+    """
+    Invalidate cached data of the given products, the catalog and the insights.
+    Call it once the write has been committed.
+    """
+    invalidate_tags(TAG_CATALOG, TAG_INSIGHTS, *(product_tag(pk) for pk in pks))
+    cache.set(CATALOG_LAST_MODIFIED_KEY, timezone.now(), timeout=None)
+
+
+def get_catalog_version() -> Tuple[str, datetime]:
+    """
+    Return the catalog tag version and when the catalog last changed.
+
+    Anything derived from the whole catalog (list ETags, cached list responses)
+    can be keyed on the version.
+
+    Returns:
+        Tuple[str, datetime]: The version and the last modification time.
+    """
+    last_modified = cache.get(CATALOG_LAST_MODIFIED_KEY)
+    if last_modified is None:
+        last_modified = Product.objects.aggregate(last_updated=Max('last_updated'))['last_updated']
+        cache.add(CATALOG_LAST_MODIFIED_KEY, last_modified or timezone.now(), timeout=None)
+        last_modified = cache.get(CATALOG_LAST_MODIFIED_KEY)
+    return get_tag_versions([TAG_CATALOG])[TAG_CATALOG], last_modified
+
+
+def insights_key() -> str:
+    """Key of the cached product insights response."""
+    return make_key('insights', tags=[TAG_INSIGHTS])
+
+
+def trending_products_key() -> str:
+    """Key of the cached, serialized trending products."""
+    return make_key('trending', tags=[TAG_INSIGHTS])
+
+
+def embedding_key(product: Product) -> str:
+    """Key of a product's cached name embedding."""
+    return make_key('embedding', product.sku, tags=[product_tag(product.pk)])
+
+
+def make_etag(*parts: Any) -> str:
+    """Return an ETag value for a response derived from `parts`."""
+    return hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def get_cached_response(etag: str) -> Optional[Any]:
+    """Return the response data cached under an ETag, if the response cache is enabled."""
+    if not settings.PRODUCT_RESPONSE_CACHE_TIMEOUT:
+        return None
+    return cache.get(make_key('response', etag))
+
+
+def cache_response(etag: str, data: Any) -> None:
+    """
+    Cache response data under its ETag.
+
+    ETags change with the catalog version or the product's `last_updated`, so a
+    write makes the old entry unreachable and it simply expires.
+    """
+    if settings.PRODUCT_RESPONSE_CACHE_TIMEOUT:
+        cache.set(make_key('response', etag), data, timeout=settings.PRODUCT_RESPONSE_CACHE_TIMEOUT)
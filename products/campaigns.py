@@ -0,0 +1,124 @@
+from datetime import datetime
+from typing import Dict, Optional
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from .caching import TAG_INSIGHTS, invalidate_catalog
+from .filters import ProductFilter
+from .models import DiscountCampaign, DiscountCampaignItem, Product
+
+
+def campaign_products(campaign: DiscountCampaign):
+    """
+    Return the products selected by a campaign's filters.
+    Products already discounted by another active campaign are left out.
+    """
+    queryset = ProductFilter(campaign.filters, queryset=Product.objects.all()).qs
+    return queryset.exclude(campaign_items__campaign__status=DiscountCampaign.STATUS_ACTIVE).order_by()
+
+
+def apply_campaign(campaign: DiscountCampaign, now: Optional[datetime] = None) -> int:
+    """
+    Apply a campaign's discount to all its products with set-based statements.
+
+    The matched products and their current discounts are copied into the
+    campaign items with one `INSERT ... SELECT`, then discounted with one `UPDATE`.
+
+    Args:
+        campaign (DiscountCampaign): A scheduled campaign, locked by the caller's transaction.
+        now (Optional[datetime]): Time of the change, defaults to now.
+
+    Returns:
+        int: Number of discounted products.
+    """
+    now = now or timezone.now()
+    matched_sql, params = campaign_products(campaign).values('id', 'discount_percentage').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {DiscountCampaignItem._meta.db_table} (campaign_id, product_id, previous_discount) "
+            f"SELECT %s, matched.id, matched.discount_percentage FROM ({matched_sql}) AS matched",
+            [campaign.pk, *params]
+        )
+    count = Product.objects.filter(campaign_items__campaign=campaign).update(
+        discount_percentage=campaign.discount_percentage, last_updated=now
+    )
+    campaign.status = DiscountCampaign.STATUS_ACTIVE
+    campaign.product_count = count
+    campaign.applied_at = now
+    campaign.save(update_fields=['status', 'product_count', 'applied_at'])
+    # Queryset updates do not send model signals; insights show discounted prices too
+    transaction.on_commit(lambda: invalidate_catalog(TAG_INSIGHTS))
+    return count
+
+
+def revert_campaign(campaign: DiscountCampaign, now: Optional[datetime] = None) -> int:
+    """
+    Restore the previous discounts of a campaign's products with one `UPDATE`.
+
+    Products whose discount was changed by hand while the campaign ran keep
+    that discount. The campaign's items are deleted once the revert commits.
+
+    Args:
+        campaign (DiscountCampaign): An active campaign, locked by the caller's transaction.
+        now (Optional[datetime]): Time of the change, defaults to now.
+
+    Returns:
+        int: Number of products whose discount was restored.
+    """
+    now = now or timezone.now()
+    previous = DiscountCampaignItem.objects.filter(campaign=campaign, product=OuterRef('pk'))
+    count = Product.objects.filter(
+        campaign_items__campaign=campaign, discount_percentage=campaign.discount_percentage
+    ).update(discount_percentage=Subquery(previous.values('previous_discount')[:1]), last_updated=now)
+    campaign.status = DiscountCampaign.STATUS_FINISHED
+    campaign.reverted_at = now
+    campaign.save(update_fields=['status', 'reverted_at'])
+    transaction.on_commit(lambda: finish_revert(campaign.pk))
+    return count
+
+
+def finish_revert(campaign_id: int) -> None:
+    """Delete a reverted campaign's items and invalidate the catalog and insights."""
+    DiscountCampaignItem.objects.filter(campaign_id=campaign_id).delete()
+    invalidate_catalog(TAG_INSIGHTS)
+
+
+def run_due_campaigns(now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Apply campaigns whose start has passed and revert those whose end has passed.
+
+    Each campaign changes in its own transaction, with its row locked so that
+    concurrent schedulers never apply or revert it twice.
+
+    Args:
+        now (Optional[datetime]): Reference time, defaults to now.
+
+    Returns:
+        Dict[str, int]: Number of campaigns applied, reverted and skipped, and products changed.
+    """
+    now = now or timezone.now()
+    summary = {'applied': 0, 'reverted': 0, 'skipped': 0, 'rows': 0}
+
+    ending = DiscountCampaign.objects.filter(status=DiscountCampaign.STATUS_ACTIVE, ends_at__lte=now)
+    for pk in ending.order_by('ends_at').values_list('pk', flat=True):
+        with transaction.atomic():
+            campaign = ending.select_for_update(skip_locked=True).filter(pk=pk).first()
+            if campaign is not None:
+                summary['rows'] += revert_campaign(campaign, now)
+                summary['reverted'] += 1
+
+    starting = DiscountCampaign.objects.filter(status=DiscountCampaign.STATUS_SCHEDULED, starts_at__lte=now)
+    for pk in starting.order_by('starts_at').values_list('pk', flat=True):
+        with transaction.atomic():
+            campaign = starting.select_for_update(skip_locked=True).filter(pk=pk).first()
+            if campaign is None:
+                continue
+            if campaign.ends_at <= now:
+                # The whole campaign window passed before the scheduler ran
+                campaign.status = DiscountCampaign.STATUS_FINISHED
+                campaign.save(update_fields=['status'])
+                summary['skipped'] += 1
+                continue
+            summary['rows'] += apply_campaign(campaign, now)
+            summary['applied'] += 1
+    return summary
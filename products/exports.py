@@ -0,0 +1,131 @@
+import csv
+import json
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, Sequence, Tuple
+from django.db.models import QuerySet
+from rest_framework.utils.encoders import JSONEncoder
+from .models import ProductQuerySet
+from .serializers import ProductReadSerializer
+
+# Columns of the export, in the order used by the product API
+EXPORT_FIELDS = ProductQuerySet.READ_FIELDS[:-1] + ('discounted_price', 'discount_percentage')
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+def parse_export_fields(value: str) -> Tuple[str, ...]:
+    """
+    Parse a `?fields=` value into export columns, keeping the client's order.
+
+    Args:
+        value (str): Comma-separated column names; empty selects every column.
+
+    Returns:
+        Tuple[str, ...]: The selected columns.
+
+    Raises:
+        ValueError: If a column is unknown.
+    """
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    if not fields:
+        return EXPORT_FIELDS
+    unknown = [field for field in fields if field not in EXPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(EXPORT_FIELDS)}")
+    return fields
+
+
+def make_row_formatter(fields: Sequence[str]) -> Callable[[Dict], Dict]:
+    """Return a function converting a product row to the API representation of `fields`."""
+    serializer = ProductReadSerializer()
+    converters = {
+        'price': serializer.price_field.to_representation,
+        'last_updated': serializer.last_updated_field.to_representation,
+        # The list passes the computed Decimal to the JSON encoder; CSV would print all its places
+        'discounted_price': JSONEncoder().default,
+        'discount_percentage': serializer.discount_field.to_representation,
+    }
+    converters = [(field, converters.get(field)) for field in fields]
+
+    def format_row(row: Dict) -> Dict:
+        return {field: convert(row[field]) if convert else row[field] for field, convert in converters}
+    return format_row
+
+
+def iter_export_rows(queryset: QuerySet, fields: Sequence[str], chunk_size: int) -> Iterator[Dict]:
+    """
+    Stream product rows with only the selected columns, in id order.
+
+    Rows are fetched `chunk_size` at a time through a server-side cursor where
+    the database supports it, so memory stays flat whatever the catalog size.
+    """
+    rows = queryset.as_rows().values(*fields).order_by('id')
+    format_row = make_row_formatter(fields)
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield format_row(row)
+
+
+def iter_ndjson_lines(rows: Iterable[Dict], batch_size: int) -> Iterator[bytes]:
+    """Encode rows as newline-delimited JSON, yielding `batch_size` lines per chunk."""
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    batch = []
+    for row in rows:
+        batch.append(encoder.encode(row))
+        if len(batch) >= batch_size:
+            yield ('\n'.join(batch) + '\n').encode('utf-8')
+            batch = []
+    if batch:
+        yield ('\n'.join(batch) + '\n').encode('utf-8')
+
+
+class _Echo:
+    """File-like object returning what is written, for streaming csv.writer output."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv_lines(rows: Iterable[Dict], fields: Sequence[str], batch_size: int) -> Iterator[bytes]:
+    """Encode rows as CSV with a header line, yielding `batch_size` lines per chunk."""
+    writer = csv.writer(_Echo())
+    batch = [writer.writerow(fields)]
+    for row in rows:
+        batch.append(writer.writerow([row[field] for field in fields]))
+        if len(batch) >= batch_size:
+            yield ''.join(batch).encode('utf-8')
+            batch = []
+    if batch:
+        yield ''.join(batch).encode('utf-8')
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Gzip a stream of chunks incrementally."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_products(
+    queryset: QuerySet, output: str, fields: Sequence[str], chunk_size: int, compress: bool = False
+) -> Iterator[bytes]:
+    """
+    Stream the products of `queryset` as NDJSON or CSV.
+
+    Args:
+        queryset (QuerySet): Products to export.
+        output (str): 'ndjson' or 'csv'.
+        fields (Sequence[str]): Columns to export.
+        chunk_size (int): Rows fetched from the database and encoded per chunk.
+        compress (bool): Whether to gzip the stream.
+
+    Returns:
+        Iterator[bytes]: The encoded export.
+    """
+    rows = iter_export_rows(queryset, fields, chunk_size)
+    if output == 'csv':
+        chunks = iter_csv_lines(rows, fields, chunk_size)
+    else:
+        chunks = iter_ndjson_lines(rows, chunk_size)
+    return gzip_stream(chunks) if compress else chunks
@@ -0,0 +1,159 @@
+import csv
+import hashlib
+import os
+import uuid
+from array import array
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+import numpy as np
+import requests
+from django.conf import settings
+
+
+def is_remote_feed(source: str) -> bool:
+    """Return True if the feed source is an HTTP(S) URL rather than a file path."""
+    return urlparse(source).scheme in ('http', 'https')
+
+
+def resolve_feed_source(source: str) -> str:
+    """
+    Return a local path for an inventory feed, streaming remote feeds to disk.
+
+    Downloads go to INVENTORY_IMPORT_DIR, which must be shared with the workers
+    that process the chunks.
+
+    Args:
+        source (str): File path or HTTP(S) URL of the CSV feed.
+
+    Returns:
+        str: Path of a local copy of the feed.
+    """
+    if not is_remote_feed(source):
+        return str(source)
+
+    os.makedirs(settings.INVENTORY_IMPORT_DIR, exist_ok=True)
+    path = os.path.join(settings.INVENTORY_IMPORT_DIR, f"feed-{uuid.uuid4().hex}.csv")
+    with requests.get(source, stream=True, timeout=settings.INVENTORY_FEED_TIMEOUT) as response:
+        response.raise_for_status()
+        with open(path, 'wb') as f:
+            for block in response.iter_content(chunk_size=64 * 1024):
+                f.write(block)
+    return path
+
+
+def row_fingerprint(sku: str, quantity: str) -> int:
+    """Return a 64-bit fingerprint of a feed row's `(sku, inventory_quantity)`."""
+    digest = hashlib.blake2b(f"{sku.strip()}\x1f{quantity.strip()}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def fingerprint_feed(path: str, chunk_size: int) -> Tuple[str, List[Dict], np.ndarray]:
+    """
+    Split a CSV feed into byte ranges of at most `chunk_size` rows and fingerprint it.
+
+    The file is read once, line by line. Rows must not contain embedded newlines.
+
+    Args:
+        path (str): Local path of the feed.
+        chunk_size (int): Maximum number of rows per chunk.
+
+    Returns:
+        Tuple: The SHA-256 of the whole feed, the chunks as dicts with `start`,
+        `end`, `rows` and `fingerprint` (SHA-256 of the chunk's rows), and the
+        sorted, unique row fingerprints of the feed.
+    """
+    feed_hash = hashlib.sha256()
+    row_hashes = array('Q')
+    chunks = []
+    with open(path, 'rb') as f:
+        header = f.readline()
+        feed_hash.update(header)
+        fieldnames = next(csv.reader([header.decode('utf-8-sig')]), [])
+        sku_index = fieldnames.index('sku') if 'sku' in fieldnames else None
+        quantity_index = fieldnames.index('inventory_quantity') if 'inventory_quantity' in fieldnames else None
+
+        start = f.tell()
+        rows = 0
+        chunk_hash = hashlib.sha256()
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            feed_hash.update(line)
+            if line.strip():
+                rows += 1
+                chunk_hash.update(line.strip() + b'\n')
+                values = next(csv.reader([line.decode('utf-8')]), [])
+                if sku_index is not None and quantity_index is not None and len(values) > max(sku_index, quantity_index):
+                    row_hashes.append(row_fingerprint(values[sku_index], values[quantity_index]))
+            if rows == chunk_size:
+                end = f.tell()
+                chunks.append({'start': start, 'end': end, 'rows': rows, 'fingerprint': chunk_hash.hexdigest()})
+                start, rows, chunk_hash = end, 0, hashlib.sha256()
+        if rows:
+            chunks.append({'start': start, 'end': f.tell(), 'rows': rows, 'fingerprint': chunk_hash.hexdigest()})
+
+    return feed_hash.hexdigest(), chunks, np.unique(np.frombuffer(row_hashes, dtype=np.uint64))
+
+
+def save_row_fingerprints(row_hashes: np.ndarray, name: str) -> str:
+    """Persist a feed's sorted row fingerprints under INVENTORY_FINGERPRINT_DIR and return the path."""
+    os.makedirs(settings.INVENTORY_FINGERPRINT_DIR, exist_ok=True)
+    path = os.path.join(settings.INVENTORY_FINGERPRINT_DIR, f"{name}.npy")
+    np.save(path, row_hashes)
+    return path
+
+
+def filter_unchanged_rows(rows: List[Dict[str, str]], fingerprints_path: str) -> Tuple[List[Dict[str, str]], int]:
+    """
+    Drop rows whose `(sku, inventory_quantity)` appeared in a previous feed.
+
+    The previous fingerprints are memory-mapped, so the lookup does not load them into RAM.
+
+    Args:
+        rows (List[Dict[str, str]]): Rows of one chunk.
+        fingerprints_path (str): Sorted row fingerprints saved by `save_row_fingerprints`.
+
+    Returns:
+        Tuple: The changed rows and the number of rows skipped.
+    """
+    if not rows or not fingerprints_path or not os.path.exists(fingerprints_path):
+        return rows, 0
+    previous = np.load(fingerprints_path, mmap_mode='r')
+    if not len(previous):
+        return rows, 0
+
+    hashes = np.fromiter(
+        (row_fingerprint(row['sku'], row['inventory_quantity']) for row in rows),
+        dtype=np.uint64,
+        count=len(rows)
+    )
+    positions = np.searchsorted(previous, hashes)
+    positions[positions == len(previous)] = 0
+    unchanged = previous[positions] == hashes
+    changed = [row for row, skip in zip(rows, unchanged) if not skip]
+    return changed, len(rows) - len(changed)
+
+
+def read_feed_chunk(path: str, start: int, end: int) -> List[Dict[str, str]]:
+    """
+    Read the rows of one chunk of a CSV feed.
+
+    Args:
+        path (str): Local path of the feed.
+        start (int): Byte offset of the first row in the chunk.
+        end (int): Byte offset just past the last row in the chunk.
+
+    Returns:
+        List[Dict[str, str]]: Rows keyed by the feed's header columns.
+    """
+    with open(path, 'rb') as f:
+        fieldnames = next(csv.reader([f.readline().decode('utf-8-sig')]))
+        f.seek(start)
+        lines = []
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            lines.append(line.decode('utf-8'))
+    return list(csv.DictReader(lines, fieldnames=fieldnames))
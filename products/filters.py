@@ -1,5 +1,7 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
 from .models import Product
+from .search import get_search_backend
 
 class ProductFilter(filters.FilterSet):
     """
@@ -17,4 +19,21 @@ class ProductFilter(filters.FilterSet):
             'name': ['exact', 'icontains'],
             'price': ['exact'],
             'quantity': ['exact'],
-        }
\ No newline at end of file
+        }
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    Routes `?search=` to the product full-text search backend.
+    Matches every term as a word prefix of the name or SKU and orders results by rank.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return get_search_backend(queryset.db).search(queryset, ' '.join(terms))
+
+    def is_searching(self, request) -> bool:
+        """Return True when the request carries search terms."""
+        return bool(self.get_search_terms(request))
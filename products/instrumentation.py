@@ -0,0 +1,205 @@
+import logging
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from celery import current_task
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+from .models import TaskMetric
+
+logger = logging.getLogger(__name__)
+
+# Trackers and timers running in this thread or task, so concurrent tasks of a
+# threaded worker keep their measurements apart
+_active_trackers: ContextVar[Tuple['PeakMemory', ...]] = ContextVar('active_memory_trackers', default=())
+_active_timers: ContextVar[Tuple['StageTimer', ...]] = ContextVar('active_stage_timers', default=())
+_task_timers: ContextVar[Optional[Dict[str, 'StageTimer']]] = ContextVar('task_timers', default=None)
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries and the time spent in them, unless paused."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.paused = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.paused:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.time += time.perf_counter() - start
+
+
+class PeakMemory:
+    """
+    Peak Python memory allocated while it runs, above what was in use when it started.
+
+    Uses tracemalloc, starting it if nobody else has; tracing slows allocation-heavy
+    code down, so only use it when asked to. Its peak is a single process-wide
+    counter, so before resetting it for a new tracker the peak so far is folded
+    into every tracker still running; nested stages and the task around them each
+    get their own peak. Threads share the counter, so peaks are only exact when
+    one task runs per process, as in the prefork pool.
+    """
+
+    def __init__(self):
+        self.peak = 0
+        self._owns_tracing = False
+
+    def start(self) -> 'PeakMemory':
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        self._collect()
+        self._base = self._peak = tracemalloc.get_traced_memory()[0]
+        _active_trackers.set(_active_trackers.get() + (self,))
+        return self
+
+    def stop(self) -> int:
+        """Stop tracking and return the peak in bytes."""
+        self._collect()
+        _active_trackers.set(tuple(tracker for tracker in _active_trackers.get() if tracker is not self))
+        if self._owns_tracing:
+            tracemalloc.stop()
+        self.peak = max(self._peak - self._base, 0)
+        return self.peak
+
+    @staticmethod
+    def _collect() -> None:
+        peak = tracemalloc.get_traced_memory()[1]
+        for tracker in _active_trackers.get():
+            tracker._peak = max(tracker._peak, peak)
+        tracemalloc.reset_peak()
+
+
+class StageTimer:
+    """
+    Measures one execution of a task or pipeline stage and stores it as a TaskMetric.
+    Set `rows` while it runs to record throughput. Peak memory is only traced
+    with TASK_METRICS_TRACE_MEMORY, and is 0 otherwise.
+
+    Storing the metric is left out of the queries of the timers still running,
+    so a task's count does not include the records of its stages.
+    """
+
+    def __init__(self, name: str, kind: str, run_id: Optional[str] = None):
+        self.name = name
+        self.kind = kind
+        self.run_id = run_id if run_id is not None else current_run_id()
+        self.rows = 0
+        self.queries = QueryCounter()
+        self.memory = PeakMemory() if settings.TASK_METRICS_TRACE_MEMORY else None
+        self._stack = ExitStack()
+
+    def start(self) -> 'StageTimer':
+        self.started_at = timezone.now()
+        self._start = time.perf_counter()
+        self._stack.enter_context(connection.execute_wrapper(self.queries))
+        if self.memory is not None:
+            self.memory.start()
+        _active_timers.set(_active_timers.get() + (self,))
+        return self
+
+    def stop(self, status: str) -> None:
+        wall_time = time.perf_counter() - self._start
+        self._stack.close()
+        peak_memory = self.memory.stop() if self.memory is not None else 0
+        _active_timers.set(tuple(timer for timer in _active_timers.get() if timer is not self))
+        outer_queries = [timer.queries for timer in _active_timers.get()]
+        for queries in outer_queries:
+            queries.paused = True
+        try:
+            TaskMetric.objects.create(
+                run_id=self.run_id,
+                name=self.name,
+                kind=self.kind,
+                status=status,
+                started_at=self.started_at,
+                wall_time=wall_time,
+                rows=self.rows,
+                rows_per_second=self.rows / wall_time if wall_time > 0 else 0,
+                query_count=self.queries.count,
+                query_time=self.queries.time,
+                peak_memory=peak_memory
+            )
+        except DatabaseError:
+            logger.warning("Could not record metrics for %s", self.name, exc_info=True)
+        finally:
+            for queries in outer_queries:
+                queries.paused = False
+
+
+def current_run_id() -> str:
+    """Return the id of the root Celery task being executed, or '' outside a worker."""
+    request = getattr(current_task, 'request', None)
+    if request is None or request.id is None:
+        return ''
+    return request.root_id or request.id
+
+
+@contextmanager
+def instrument_stage(name: str):
+    """
+    Record wall time, rows, queries and peak memory of a pipeline stage.
+
+    Usage:
+        with instrument_stage('parse_csv') as stage:
+            rows = read_rows()
+            stage.rows = len(rows)
+    """
+    if not settings.TASK_METRICS_ENABLED:
+        yield StageTimer(name, TaskMetric.KIND_STAGE, run_id='')
+        return
+    timer = StageTimer(name, TaskMetric.KIND_STAGE).start()
+    status = 'SUCCESS'
+    try:
+        yield timer
+    except Exception:
+        status = 'FAILURE'
+        raise
+    finally:
+        timer.stop(status)
+
+
+def rows_from_result(result) -> int:
+    """Read the number of rows processed from a task's claim-check reference or report."""
+    if isinstance(result, dict) and isinstance(result.get('summary'), dict):
+        summary: Dict = result['summary']
+        return summary.get('rows', summary.get('total', 0))
+    return 0
+
+
+def task_timers() -> Dict[str, StageTimer]:
+    """Return the timers of the tasks running in this thread, by task id."""
+    timers = _task_timers.get()
+    if timers is None:
+        timers = {}
+        _task_timers.set(timers)
+    return timers
+
+
+@task_prerun.connect
+def start_task_metrics(task_id=None, task=None, **kwargs):
+    """Start measuring every task of this app."""
+    if not settings.TASK_METRICS_ENABLED or not task.name.startswith('products.'):
+        return
+    run_id = task.request.root_id or task_id
+    task_timers()[task_id] = StageTimer(task.name, TaskMetric.KIND_TASK, run_id=run_id).start()
+
+
+@task_postrun.connect
+def stop_task_metrics(task_id=None, task=None, retval=None, state=None, **kwargs):
+    """Store the measurements of a finished task."""
+    timer = task_timers().pop(task_id, None)
+    if timer is not None:
+        timer.rows = rows_from_result(retval)
+        timer.stop(state or 'SUCCESS')
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from products.benchmarks import benchmark_product_search, benchmark_product_serialization
+
+class Command(BaseCommand):
+    help = 'Benchmark product list serialization (full serializer vs. fast read path) or search (LIKE vs. full-text)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=0,
+            help='Benchmark this many synthetic products (rolled back afterwards) instead of the current catalog'
+        )
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per path; the best is reported')
+        parser.add_argument(
+            '--search', default='',
+            help='Benchmark this ?search= query with the LIKE scan and the full-text backend instead'
+        )
+
+    def handle(self, *args, **options):
+        if options['search']:
+            self.handle_search(options)
+            return
+        result = benchmark_product_serialization(rows=options['rows'], repeat=options['repeat'])
+        self.stdout.write(f"Products: {result['rows']}")
+        for path in ('full', 'fast'):
+            timing = result[path]
+            self.stdout.write(
+                f"{path:<6}{timing['seconds']:>10.4f}s{timing['rows_per_second']:>14.0f} rows/s{timing['bytes']:>12} bytes"
+            )
+        self.stdout.write(f"Speedup: {result['speedup']:.1f}x")
+        if result['identical']:
+            self.stdout.write(self.style.SUCCESS('Output is byte-for-byte identical'))
+        else:
+            self.stdout.write(self.style.ERROR('Output differs between the two paths'))
+
+    def handle_search(self, options):
+        result = benchmark_product_search(options['search'], rows=options['rows'], repeat=options['repeat'])
+        self.stdout.write(f"Products: {result['rows']}  Query: {result['query']!r}")
+        for path in ('like', 'fulltext'):
+            timing = result[path]
+            self.stdout.write(
+                f"{path:<10}{timing['backend']:<26}{timing['seconds']:>10.4f}s{timing['matches']:>10} matches"
+            )
+        self.stdout.write(f"Speedup: {result['speedup']:.1f}x")
@@ -0,0 +1,91 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from products.benchmarks import (
+    SUITE_SCENARIOS, SUITE_SIZES, check_benchmark_database, compare_results, run_benchmark_suite
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark list, search, insights, webhook, nightly import and embedding generation '
+        'against seeded catalogs of several sizes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=','.join(str(size) for size in SUITE_SIZES),
+            help='Comma-separated catalog sizes; each is seeded and deleted afterwards'
+        )
+        parser.add_argument(
+            '--scenarios', default=','.join(SUITE_SCENARIOS),
+            help=f"Comma-separated scenarios among {', '.join(SUITE_SCENARIOS)}"
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Timed calls per API scenario')
+        parser.add_argument(
+            '--pipeline-repeat', type=int, default=3,
+            help='Timed calls of the nightly import and embedding generation'
+        )
+        parser.add_argument('--history-per-product', type=int, default=1, help='Stock history rows seeded per product')
+        parser.add_argument(
+            '--embedding-rows', type=int, default=1000, help='Products whose embeddings are generated per call'
+        )
+        parser.add_argument(
+            '--database', help='Dedicated database alias to run against; without it DEBUG must be on'
+        )
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--compare', help='JSON results of an earlier run (e.g. another commit) to compare with')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be comma-separated integers')
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = [name for name in scenarios if name not in SUITE_SCENARIOS]
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(unknown)}")
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+
+        try:
+            check_benchmark_database(options['database'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        results = run_benchmark_suite(
+            sizes=sizes,
+            scenarios=scenarios,
+            repeat=options['repeat'],
+            pipeline_repeat=options['pipeline_repeat'],
+            history_per_product=options['history_per_product'],
+            embedding_rows=options['embedding_rows'],
+            progress=self.write_result,
+            database=options['database']
+        )
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        if baseline is not None:
+            self.write_comparison(compare_results(baseline, results), baseline.get('commit', ''))
+
+    def write_result(self, size, scenario, result):
+        if 'error' in result:
+            self.stdout.write(self.style.ERROR(f"{size:>9} {scenario:<20} {result['error']}"))
+            return
+        self.stdout.write(
+            f"{size:>9} {scenario:<20} p50 {result['p50_ms']:>10.2f}ms  p95 {result['p95_ms']:>10.2f}ms  "
+            f"p99 {result['p99_ms']:>10.2f}ms  {result['queries']:>8.1f} queries  "
+            f"{result['peak_memory'] / 2 ** 20:>8.1f} MiB"
+        )
+
+    def write_comparison(self, rows, commit):
+        self.stdout.write(f"Compared with {commit or 'baseline'}:")
+        for row in rows:
+            line = (
+                f"{row['size']:>9} {row['scenario']:<20} p50 {row['baseline_p50_ms']:>10.2f} -> {row['p50_ms']:>10.2f}ms  "
+                f"p95 {row['baseline_p95_ms']:>10.2f} -> {row['p95_ms']:>10.2f}ms  {row['ratio']:.2f}x"
+            )
+            self.stdout.write(self.style.SUCCESS(line) if row['ratio'] <= 1 else self.style.WARNING(line))
@@ -2,6 +2,7 @@
 from django.core.management.base import BaseCommand
 from django.core.cache import cache
 from sentence_transformers import SentenceTransformer
+from products.caching import embedding_key
 from products.models import Product
 import numpy as np
 
@@ -16,8 +17,7 @@ class Command(BaseCommand):
             embedding = model.encode(product.name)
             # Store in database
             product.set_embedding(embedding)
-            product.save()
+            Product.objects.filter(pk=product.pk).update(embedding=product.embedding)
             # Cache embedding
-            cache_key = f"product_embedding_{product.sku}"
-            cache.set(cache_key, embedding.tobytes(), timeout=None)  # No expiration
+            cache.set(embedding_key(product), embedding.tobytes(), timeout=None)  # No expiration
             self.stdout.write(self.style.SUCCESS(f"Generated embedding for {product.name} ({product.sku})"))
\ No newline at end of file
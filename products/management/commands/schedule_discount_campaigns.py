@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django_celery_beat.models import IntervalSchedule, PeriodicTask
+
+
+class Command(BaseCommand):
+    help = 'Schedule the task applying and reverting discount campaigns'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=int, default=60,
+            help='Seconds between runs; campaigns start and end at most this late'
+        )
+
+    def handle(self, *args, **options):
+        schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=options['every'],
+            period=IntervalSchedule.SECONDS
+        )
+        PeriodicTask.objects.update_or_create(
+            name='Discount Campaigns',
+            defaults={
+                'interval': schedule,
+                'crontab': None,
+                'task': 'products.tasks.run_discount_campaigns',
+            }
+        )
+        self.stdout.write(self.style.SUCCESS(f"Discount campaigns scheduled every {options['every']} seconds"))
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django_celery_beat.models import PeriodicTask, CrontabSchedule
 import json
@@ -5,10 +6,16 @@ import json
 class Command(BaseCommand):
     help = 'Schedule nightly inventory update task'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            default=str(settings.BASE_DIR / 'data' / 'mock_products.csv'),
+            help='Path or URL of the inventory CSV feed, read by the task at run time'
+        )
+
     def handle(self, *args, **options):
-        # Read mock CSV content
-        with open('data/mock_products.csv', 'r') as f:
-            csv_content = f.read()
+        # Only the feed location is stored; the task reads the current contents each night
+        source = options['source']
 
         # Create or update crontab schedule (run daily at midnight)
         schedule, _ = CrontabSchedule.objects.get_or_create(
@@ -25,7 +32,7 @@ class Command(BaseCommand):
             defaults={
                 'crontab': schedule,
                 'task': 'products.tasks.nightly_inventory_update',
-                'args': json.dumps([csv_content])
+                'args': json.dumps([source])
             }
         )
-        self.stdout.write(self.style.SUCCESS('Nightly inventory update task scheduled successfully'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(f'Nightly inventory update task scheduled successfully for {source}'))
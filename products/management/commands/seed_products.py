@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from products.seeding import seed_products
+
+
+class Command(BaseCommand):
+    help = 'Insert synthetic products and stock history for development and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000, help='Number of products to create')
+        parser.add_argument(
+            '--history', type=int, default=0,
+            help='Number of stock history rows, spread over the new products and the last 30 days'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted per transaction')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--prefix', default='SEED', help='SKU prefix of the created products')
+        parser.add_argument(
+            '--no-embeddings', action='store_true',
+            help='Leave embeddings empty, e.g. to benchmark generating them'
+        )
+
+    def handle(self, *args, **options):
+        result = seed_products(
+            options['products'],
+            history=options['history'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            embeddings=not options['no_embeddings'],
+            prefix=options['prefix']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['products']} products and {result['history']} stock history rows "
+            f"in {result['seconds']:.1f}s"
+        ))
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Avg, Count, Max, Min, Sum
+from products.models import TaskMetric
+
+class Command(BaseCommand):
+    help = 'Show per-stage timings of a Celery run and their trends across recent runs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--run-id', help='Run to break down; defaults to the latest run')
+        parser.add_argument('--runs', type=int, default=10, help='Number of recent runs to compute trends over')
+        parser.add_argument('--name', help='Only show tasks or stages whose name contains this text')
+
+    def handle(self, *args, **options):
+        metrics = TaskMetric.objects.exclude(run_id='')
+        if options['name']:
+            metrics = metrics.filter(name__icontains=options['name'])
+
+        recent_runs = list(
+            metrics.values('run_id').annotate(started=Min('started_at'))
+            .order_by('-started').values_list('run_id', flat=True)[:options['runs']]
+        )
+        if not recent_runs:
+            raise CommandError('No task metrics recorded yet.')
+
+        run_id = options['run_id'] or recent_runs[0]
+        run_metrics = metrics.filter(run_id=run_id).order_by('started_at')
+        if not run_metrics.exists():
+            raise CommandError(f'No task metrics recorded for run {run_id}.')
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Run {run_id}'))
+        self.write_row('Task / stage', 'Count', 'Wall (s)', 'Rows', 'Rows/s', 'Queries', 'Query (s)', 'Peak MB')
+        breakdown = (
+            run_metrics.values('kind', 'name')
+            .annotate(
+                count=Count('id'), wall=Sum('wall_time'), rows=Sum('rows'), queries=Sum('query_count'),
+                query_time=Sum('query_time'), peak=Max('peak_memory'), started=Min('started_at')
+            )
+            .order_by('started')
+        )
+        for row in breakdown:
+            name = row['name'] if row['kind'] == TaskMetric.KIND_TASK else f"  {row['name']}"
+            rate = row['rows'] / row['wall'] if row['wall'] else 0
+            self.write_row(
+                name, row['count'], f"{row['wall']:.3f}", row['rows'], f'{rate:.0f}',
+                row['queries'], f"{row['query_time']:.3f}", f"{row['peak'] / 2 ** 20:.1f}"
+            )
+
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Trends over the last {len(recent_runs)} runs'))
+        self.write_row('Task / stage', 'Runs', 'Avg wall (s)', 'Max wall (s)', 'Avg rows/s', 'Avg queries', 'Peak MB', '')
+        trends = (
+            metrics.filter(run_id__in=recent_runs)
+            .values('kind', 'name')
+            .annotate(
+                runs=Count('run_id', distinct=True), avg_wall=Avg('wall_time'), max_wall=Max('wall_time'),
+                avg_rate=Avg('rows_per_second'), avg_queries=Avg('query_count'), peak=Max('peak_memory')
+            )
+            .order_by('kind', 'name')
+        )
+        for row in trends:
+            self.write_row(
+                row['name'], row['runs'], f"{row['avg_wall']:.3f}", f"{row['max_wall']:.3f}",
+                f"{row['avg_rate']:.0f}", f"{row['avg_queries']:.1f}", f"{row['peak'] / 2 ** 20:.1f}", ''
+            )
+
+    def write_row(self, name, *columns):
+        self.stdout.write(f'{name:<48}' + ''.join(f'{column!s:>14}' for column in columns).rstrip())
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-19 02:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_discount_percentage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryImportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Path or URL of the imported feed', max_length=500)),
+                ('feed_fingerprint', models.CharField(help_text='SHA-256 of the feed contents', max_length=64)),
+                ('row_fingerprints', models.CharField(blank=True, help_text="Path of the feed's row fingerprints", max_length=500)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', help_text='Run status', max_length=20)),
+                ('started_at', models.DateTimeField(auto_now_add=True, help_text='When the run started')),
+                ('finished_at', models.DateTimeField(blank=True, help_text='When the run completed', null=True)),
+            ],
+            options={
+                'verbose_name': 'Inventory Import Run',
+                'verbose_name_plural': 'Inventory Import Runs',
+                'ordering': ['-started_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryImportChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(help_text="SHA-256 of the chunk's rows", max_length=64)),
+                ('start', models.PositiveBigIntegerField(help_text="Byte offset of the chunk's first row")),
+                ('end', models.PositiveBigIntegerField(help_text="Byte offset just past the chunk's last row")),
+                ('rows', models.PositiveIntegerField(help_text='Number of rows in the chunk')),
+                ('errors', models.PositiveIntegerField(default=0, help_text='Number of rows that could not be applied')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('skipped', 'Skipped'), ('completed', 'Completed')], default='pending', help_text='Chunk status', max_length=20)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='products.inventoryimportrun')),
+            ],
+            options={
+                'verbose_name': 'Inventory Import Chunk',
+                'verbose_name_plural': 'Inventory Import Chunks',
+                'ordering': ['start'],
+                'constraints': [models.UniqueConstraint(fields=('run', 'start'), name='unique_import_chunk_start')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_inventoryimportrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_id', models.CharField(db_index=True, help_text='Id of the root task of the run', max_length=255)),
+                ('name', models.CharField(help_text='Task or stage name', max_length=255)),
+                ('kind', models.CharField(choices=[('task', 'Task'), ('stage', 'Stage')], help_text='Task or stage', max_length=10)),
+                ('status', models.CharField(help_text='Execution status', max_length=20)),
+                ('started_at', models.DateTimeField(help_text='When execution started')),
+                ('wall_time', models.FloatField(help_text='Elapsed seconds')),
+                ('rows', models.PositiveBigIntegerField(default=0, help_text='Rows processed')),
+                ('rows_per_second', models.FloatField(default=0, help_text='Rows processed per second')),
+                ('query_count', models.PositiveIntegerField(default=0, help_text='Database queries executed')),
+                ('query_time', models.FloatField(default=0, help_text='Seconds spent in database queries')),
+                ('peak_memory', models.PositiveBigIntegerField(default=0, help_text='Peak resident memory in bytes')),
+            ],
+            options={
+                'verbose_name': 'Task Metric',
+                'verbose_name_plural': 'Task Metrics',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['name', '-started_at'], name='taskmetric_name_started_idx')],
+            },
+        ),
+    ]
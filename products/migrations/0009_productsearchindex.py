@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_name_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchIndex',
+            fields=[
+                ('product', models.OneToOneField(db_column='rowid', db_constraint=False, help_text='Indexed product', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='products.product')),
+                ('name', models.TextField(help_text='Indexed product name')),
+                ('sku', models.TextField(help_text='Indexed product SKU')),
+            ],
+            options={
+                'verbose_name': 'Product Search Index',
+                'verbose_name_plural': 'Product Search Index',
+                'db_table': 'products_product_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_productsearchindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiscountCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Name of the campaign', max_length=255)),
+                ('filters', models.JSONField(blank=True, default=dict, help_text='ProductFilter parameters selecting the products')),
+                ('discount_percentage', models.DecimalField(decimal_places=2, help_text='Discount percentage (0-100)', max_digits=5)),
+                ('starts_at', models.DateTimeField(help_text='When the discount is applied')),
+                ('ends_at', models.DateTimeField(help_text='When the discount is reverted')),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('active', 'Active'), ('finished', 'Finished')], default='scheduled', help_text='Campaign status', max_length=20)),
+                ('product_count', models.PositiveIntegerField(default=0, help_text='Number of discounted products')),
+                ('applied_at', models.DateTimeField(blank=True, help_text='When the discount was applied', null=True)),
+                ('reverted_at', models.DateTimeField(blank=True, help_text='When the discount was reverted', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When the campaign was created')),
+            ],
+            options={
+                'verbose_name': 'Discount Campaign',
+                'verbose_name_plural': 'Discount Campaigns',
+                'ordering': ['-starts_at', '-id'],
+                'indexes': [models.Index(fields=['status', 'starts_at'], name='campaign_status_starts_idx'), models.Index(fields=['status', 'ends_at'], name='campaign_status_ends_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DiscountCampaignItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('previous_discount', models.DecimalField(decimal_places=2, help_text='Discount percentage restored when the campaign ends', max_digits=5)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='products.discountcampaign')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='campaign_items', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Discount Campaign Item',
+                'verbose_name_plural': 'Discount Campaign Items',
+                'constraints': [models.UniqueConstraint(fields=('campaign', 'product'), name='unique_campaign_product')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('products', '0010_discountcampaign'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-last_updated'], name='product_last_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockhistory',
+            index=models.Index(fields=['-timestamp'], name='stockhistory_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryimportchunk',
+            name='failed_fingerprints',
+            field=models.CharField(blank=True, help_text='Path of the fingerprints of the rows that could not be applied', max_length=500),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_importchunk_failed_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='taskmetric',
+            name='peak_memory',
+            field=models.PositiveBigIntegerField(default=0, help_text='Peak Python memory allocated in bytes, 0 when not traced'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+from products.search import install_search_index, uninstall_search_index
+
+
+class Migration(migrations.Migration):
+    """
+    Create the product search index of the database in use: an FTS5 table kept in
+    sync by triggers on SQLite, a generated tsvector column with a GIN index on
+    Postgres, nothing elsewhere. The backend decides, so the SQL is not static.
+    """
+
+    dependencies = [
+        ('products', '0013_taskmetric_peak_memory_help'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
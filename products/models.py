@@ -1,6 +1,26 @@
+from decimal import Decimal
 import numpy as np
 from authentication.models import Profile
 from django.db import models
+from django.db.models import ExpressionWrapper, F, Value
+
+class ProductQuerySet(models.QuerySet):
+    """QuerySet for Product with a lightweight read path for API responses."""
+
+    READ_FIELDS = ('id', 'name', 'sku', 'price', 'quantity', 'last_updated', 'discount_percentage')
+
+    def as_rows(self) -> 'ProductQuerySet':
+        """
+        Return products as dicts of the columns shown by the API, with `discounted_price`
+        computed by the database. The embedding and profile columns are not fetched.
+        """
+        # Multiplying by 0.01 rather than dividing by 100 avoids SQLite integer division
+        discounted_price = ExpressionWrapper(
+            F('price') * (Value(100) - F('discount_percentage')) * Value(Decimal('0.01')),
+            output_field=models.DecimalField(max_digits=17, decimal_places=6)
+        )
+        return self.values(*self.READ_FIELDS).annotate(discounted_price=discounted_price)
+
 
 class Product(models.Model):
     """
@@ -30,10 +50,18 @@ class Product(models.Model):
     last_updated = models.DateTimeField(auto_now=True, help_text="Last updated timestamp")
     embedding = models.BinaryField(null=True, blank=True, help_text="Semantic embedding of the product name")
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['name']
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
+        indexes = [
+            # Keyset pagination of the product list seeks on (name, id)
+            models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+            # The admin lists the most recently updated products first
+            models.Index(fields=['-last_updated'], name='product_last_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.sku})"
@@ -71,6 +99,247 @@ class StockHistory(models.Model):
         ordering = ['-timestamp']
         verbose_name = 'Stock History'
         verbose_name_plural = 'Stock Histories'
+        indexes = [
+            models.Index(fields=['-timestamp'], name='stockhistory_timestamp_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product.sku} - {self.quantity} units at {self.timestamp}"
+
+class InventoryImportRun(models.Model):
+    """
+    Model tracking one nightly inventory import of a feed.
+    Used to skip rows unchanged since the last successful run and to resume crashed runs.
+    
+    Attributes:
+        source (str): Path or URL of the imported feed.
+        feed_fingerprint (str): SHA-256 of the feed contents.
+        row_fingerprints (str): Path of the sorted array of row fingerprints of the feed.
+        status (str): Whether the run is running, completed or failed.
+        started_at (datetime): When the run started.
+        finished_at (datetime): When the run completed.
+    """
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    source = models.CharField(max_length=500, help_text="Path or URL of the imported feed")
+    feed_fingerprint = models.CharField(max_length=64, help_text="SHA-256 of the feed contents")
+    row_fingerprints = models.CharField(max_length=500, blank=True, help_text="Path of the feed's row fingerprints")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING, help_text="Run status")
+    started_at = models.DateTimeField(auto_now_add=True, help_text="When the run started")
+    finished_at = models.DateTimeField(null=True, blank=True, help_text="When the run completed")
+
+    class Meta:
+        ordering = ['-started_at', '-id']
+        verbose_name = 'Inventory Import Run'
+        verbose_name_plural = 'Inventory Import Runs'
+
+    def __str__(self):
+        return f"{self.source} ({self.status}) at {self.started_at}"
+
+
+class InventoryImportChunk(models.Model):
+    """
+    Model recording one chunk of an inventory import run, acting as its checkpoint.
+    
+    Attributes:
+        run (InventoryImportRun): The run the chunk belongs to.
+        fingerprint (str): SHA-256 of the chunk's rows.
+        start (int): Byte offset of the chunk's first row in the feed.
+        end (int): Byte offset just past the chunk's last row.
+        rows (int): Number of rows in the chunk.
+        errors (int): Number of rows that could not be applied.
+        status (str): Whether the chunk is pending, skipped as unchanged or completed.
+        failed_fingerprints (str): Path of the fingerprints of the rows that could not be applied.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SKIPPED = 'skipped'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SKIPPED, 'Skipped'),
+        (STATUS_COMPLETED, 'Completed'),
+    ]
+
+    run = models.ForeignKey(InventoryImportRun, on_delete=models.CASCADE, related_name='chunks')
+    fingerprint = models.CharField(max_length=64, help_text="SHA-256 of the chunk's rows")
+    start = models.PositiveBigIntegerField(help_text="Byte offset of the chunk's first row")
+    end = models.PositiveBigIntegerField(help_text="Byte offset just past the chunk's last row")
+    rows = models.PositiveIntegerField(help_text="Number of rows in the chunk")
+    errors = models.PositiveIntegerField(default=0, help_text="Number of rows that could not be applied")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, help_text="Chunk status")
+    failed_fingerprints = models.CharField(
+        max_length=500, blank=True, help_text="Path of the fingerprints of the rows that could not be applied"
+    )
+
+    class Meta:
+        ordering = ['start']
+        verbose_name = 'Inventory Import Chunk'
+        verbose_name_plural = 'Inventory Import Chunks'
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'start'], name='unique_import_chunk_start'),
+        ]
+
+    def __str__(self):
+        return f"Chunk {self.start}-{self.end} of run {self.run_id} ({self.status})"
+
+
+class TaskMetric(models.Model):
+    """
+    Model recording the performance of one Celery task or pipeline stage execution.
+    
+    Attributes:
+        run_id (str): Id of the root Celery task, grouping all stages of one run.
+        name (str): Task or stage name, e.g. 'products.tasks.import_product_data' or 'parse_csv'.
+        kind (str): Whether the record is for a whole task or a stage within one.
+        status (str): Whether the task or stage succeeded.
+        started_at (datetime): When execution started.
+        wall_time (float): Elapsed seconds.
+        rows (int): Rows processed.
+        rows_per_second (float): Throughput.
+        query_count (int): Database queries executed.
+        query_time (float): Seconds spent in database queries.
+        peak_memory (int): Peak Python memory allocated during execution in bytes, 0 unless
+            TASK_METRICS_TRACE_MEMORY is set.
+    """
+    KIND_TASK = 'task'
+    KIND_STAGE = 'stage'
+    KIND_CHOICES = [
+        (KIND_TASK, 'Task'),
+        (KIND_STAGE, 'Stage'),
+    ]
+
+    run_id = models.CharField(max_length=255, db_index=True, help_text="Id of the root task of the run")
+    name = models.CharField(max_length=255, help_text="Task or stage name")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, help_text="Task or stage")
+    status = models.CharField(max_length=20, help_text="Execution status")
+    started_at = models.DateTimeField(help_text="When execution started")
+    wall_time = models.FloatField(help_text="Elapsed seconds")
+    rows = models.PositiveBigIntegerField(default=0, help_text="Rows processed")
+    rows_per_second = models.FloatField(default=0, help_text="Rows processed per second")
+    query_count = models.PositiveIntegerField(default=0, help_text="Database queries executed")
+    query_time = models.FloatField(default=0, help_text="Seconds spent in database queries")
+    peak_memory = models.PositiveBigIntegerField(default=0, help_text="Peak Python memory allocated in bytes, 0 when not traced")
+
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = 'Task Metric'
+        verbose_name_plural = 'Task Metrics'
+        indexes = [
+            models.Index(fields=['name', '-started_at'], name='taskmetric_name_started_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.rows} rows in {self.wall_time:.2f}s)"
+
+
+class DiscountCampaign(models.Model):
+    """
+    Model representing a discount applied to every product matching a filter for a period.
+
+    Attributes:
+        name (str): Name of the campaign.
+        filters (dict): ProductFilter parameters selecting the products.
+        discount_percentage (Decimal): Discount set on the matched products.
+        starts_at (datetime): When the discount is applied.
+        ends_at (datetime): When the discount is reverted.
+        status (str): Whether the campaign is scheduled, active or finished.
+        product_count (int): Number of products the discount was applied to.
+        applied_at (datetime): When the discount was applied.
+        reverted_at (datetime): When the discount was reverted.
+        created_at (datetime): When the campaign was created.
+    """
+    STATUS_SCHEDULED = 'scheduled'
+    STATUS_ACTIVE = 'active'
+    STATUS_FINISHED = 'finished'
+    STATUS_CHOICES = [
+        (STATUS_SCHEDULED, 'Scheduled'),
+        (STATUS_ACTIVE, 'Active'),
+        (STATUS_FINISHED, 'Finished'),
+    ]
+
+    name = models.CharField(max_length=255, help_text="Name of the campaign")
+    filters = models.JSONField(default=dict, blank=True, help_text="ProductFilter parameters selecting the products")
+    discount_percentage = models.DecimalField(max_digits=5, decimal_places=2, help_text="Discount percentage (0-100)")
+    starts_at = models.DateTimeField(help_text="When the discount is applied")
+    ends_at = models.DateTimeField(help_text="When the discount is reverted")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_SCHEDULED, help_text="Campaign status")
+    product_count = models.PositiveIntegerField(default=0, help_text="Number of discounted products")
+    applied_at = models.DateTimeField(null=True, blank=True, help_text="When the discount was applied")
+    reverted_at = models.DateTimeField(null=True, blank=True, help_text="When the discount was reverted")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="When the campaign was created")
+
+    class Meta:
+        ordering = ['-starts_at', '-id']
+        verbose_name = 'Discount Campaign'
+        verbose_name_plural = 'Discount Campaigns'
+        indexes = [
+            # The scheduler looks up due campaigns by status and time
+            models.Index(fields=['status', 'starts_at'], name='campaign_status_starts_idx'),
+            models.Index(fields=['status', 'ends_at'], name='campaign_status_ends_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.discount_percentage}% off, {self.status})"
+
+
+class DiscountCampaignItem(models.Model):
+    """
+    Model recording a product discounted by a campaign and the discount it had before.
+
+    Attributes:
+        campaign (DiscountCampaign): The campaign.
+        product (Product): The discounted product.
+        previous_discount (Decimal): Discount percentage restored when the campaign ends.
+    """
+    campaign = models.ForeignKey(DiscountCampaign, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='campaign_items')
+    previous_discount = models.DecimalField(
+        max_digits=5, decimal_places=2, help_text="Discount percentage restored when the campaign ends"
+    )
+
+    class Meta:
+        verbose_name = 'Discount Campaign Item'
+        verbose_name_plural = 'Discount Campaign Items'
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'product'], name='unique_campaign_product'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} in campaign {self.campaign_id}"
+
+
+class ProductSearchIndex(models.Model):
+    """
+    Read-only view of the SQLite FTS5 product search index.
+
+    The table, and the triggers keeping it in sync with Product, are created by
+    `products.search.SQLiteFTSSearchBackend` after migrate; the model only lets
+    searches join it to products.
+
+    Attributes:
+        product (Product): Indexed product; the FTS rowid is the product id.
+        name (str): Indexed product name.
+        sku (str): Indexed product SKU.
+    """
+    product = models.OneToOneField(
+        Product, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid',
+        db_constraint=False, related_name='search_index', help_text="Indexed product"
+    )
+    name = models.TextField(help_text="Indexed product name")
+    sku = models.TextField(help_text="Indexed product SKU")
+
+    class Meta:
+        managed = False
+        db_table = 'products_product_fts'
+        verbose_name = 'Product Search Index'
+        verbose_name_plural = 'Product Search Index'
 
     def __str__(self):
-        return f"{self.product.sku} - {self.quantity} units at {self.timestamp}"
\ No newline at end of file
+        return self.name
@@ -0,0 +1,191 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ProductCursorPagination(BasePagination):
+    """
+    Keyset pagination over products ordered by `(name, id)`.
+
+    Each page seeks straight to its first row with a `(name, id)` comparison
+    backed by the `product_name_id_idx` index, so deep pages cost the same as
+    the first one. Views can page in another order through `get_keyset_ordering`,
+    e.g. search results by rank. Clients pick the page size with `?page_size=`
+    up to PRODUCT_MAX_PAGE_SIZE and skip the exact total with `?count=false`.
+    """
+    ordering = ('name', 'id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None) -> List[Any]:
+        """Return the products of the page selected by the request's cursor."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        if view is not None and hasattr(view, 'get_keyset_ordering'):
+            self.ordering = view.get_keyset_ordering()
+        cursor = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        self.count = queryset.count() if self.include_count(request) else None
+
+        reverse = False
+        if cursor is not None:
+            position, reverse = cursor
+            queryset = queryset.filter(self.seek_condition(position, reverse))
+        if reverse:
+            queryset = queryset.reverse()
+
+        # One extra row tells whether there is another page in this direction
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        return self.page
+
+    def seek_condition(self, position: List, reverse: bool) -> Q:
+        """
+        Return the condition selecting rows after `position` in the ordering, or before it if `reverse`.
+
+        The leading field gets a separate inclusive bound so the database can
+        range-scan its index.
+        """
+        (first, *rest), (first_value, *rest_values) = self.ordering, position
+        descending = first.startswith('-')
+        first = first.lstrip('-')
+        after = 'lt' if descending != reverse else 'gt'
+        condition = Q(**{f'{first}__{after}e': first_value})
+
+        tie_break = Q(**{f'{first}__{after}': first_value})
+        equal = Q(**{first: first_value})
+        for field, value in zip(rest, rest_values):
+            field_after = 'lt' if field.startswith('-') != reverse else 'gt'
+            field = field.lstrip('-')
+            tie_break |= equal & Q(**{f'{field}__{field_after}': value})
+            equal &= Q(**{field: value})
+        return condition & tie_break
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema: Dict) -> Dict:
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request) -> int:
+        """Read `?page_size=`, falling back to PRODUCT_PAGE_SIZE and capped at PRODUCT_MAX_PAGE_SIZE."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return settings.PRODUCT_PAGE_SIZE
+        if page_size <= 0:
+            return settings.PRODUCT_PAGE_SIZE
+        return min(page_size, settings.PRODUCT_MAX_PAGE_SIZE)
+
+    def include_count(self, request) -> bool:
+        """Return False when the client opted out of the exact total with `?count=false`."""
+        value = request.query_params.get(self.count_query_param, '').lower()
+        return value not in ('false', '0', 'no')
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), True)
+
+    def get_position(self, product) -> List:
+        """Return the values of the ordering fields for a product instance or row dict."""
+        fields = [field.lstrip('-') for field in self.ordering]
+        if isinstance(product, dict):
+            return [product[field] for field in fields]
+        return [getattr(product, field) for field in fields]
+
+    def encode_cursor(self, position: List, reverse: bool) -> str:
+        """Return the URL of the page after (or, when reversed, before) the given position."""
+        cursor = json.dumps([position, reverse], separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(cursor.encode('utf-8'))
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def decode_cursor(self, request) -> Optional[Tuple[List, bool]]:
+        """Parse the `?cursor=` position, or return None for the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position, reverse = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if (
+                not isinstance(position, list) or len(position) != len(self.ordering)
+                or not isinstance(reverse, bool)
+                or not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in position)
+            ):
+                raise ValueError
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator using the planner's row estimate instead of `COUNT(*)` for unfiltered
+    querysets on Postgres, where an exact count scans the whole table.
+
+    Estimates below ADMIN_ESTIMATED_COUNT_THRESHOLD, filtered querysets and
+    other databases get an exact count.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where and not query.distinct:
+            estimate = self.estimate_rows(queryset.model._meta.db_table, queryset.db)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def estimate_rows(table: str, using: str) -> Optional[int]:
+        """Return the planner's row estimate of a table, or None if the database has none."""
+        connection = connections[using]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [table])
+            row = cursor.fetchone()
+        # reltuples is -1 for tables never analyzed
+        return row[0] if row and row[0] >= 0 else None
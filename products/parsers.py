@@ -0,0 +1,31 @@
+import json
+from typing import Iterator
+from rest_framework.parsers import BaseParser
+
+
+def iter_ndjson(stream) -> Iterator:
+    """
+    Lazily decode newline-delimited JSON.
+
+    Lines that are not valid JSON are yielded as their raw text so the caller
+    can report them per item instead of failing the whole stream.
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield line.decode('utf-8', errors='replace') if isinstance(line, bytes) else line
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON into a lazy iterator of decoded items,
+    so large uploads can be processed without reading the whole body.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return iter_ndjson(stream or [])
@@ -1,9 +1,13 @@
 # products/permissions.py
 from rest_framework import permissions
+from authentication.utils import get_user_groups
+
+INVENTORY_MANAGERS_GROUP = 'Inventory Managers'
 
 class IsInventoryManager(permissions.BasePermission):
     """
     Custom permission to allow access only to users in the 'Inventory Managers' group.
+    Group memberships are read from the per-user cache, so the check needs no query.
     """
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.groups.filter(name='Inventory Managers').exists()
\ No newline at end of file
+        return request.user.is_authenticated and INVENTORY_MANAGERS_GROUP in get_user_groups(request.user)
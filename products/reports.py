@@ -0,0 +1,64 @@
+import csv
+import gzip
+import json
+from typing import Dict, Iterable
+from .artifacts import read_artifact
+
+REPORT_COLUMNS = ['sku', 'status', 'old_quantity', 'new_quantity', 'error']
+
+
+def write_inventory_report(results_refs: Iterable[Dict], path: str) -> Dict[str, int]:
+    """
+    Stream nightly update results to a gzip-compressed CSV and aggregate them in one pass.
+
+    Only one result row is held in memory at a time, whatever the size of the feed.
+
+    Args:
+        results_refs (Iterable[Dict]): Artifact references of each chunk's update results.
+        path (str): Where to write the compressed CSV.
+
+    Returns:
+        Dict[str, int]: Counts of updated, unchanged, not found and invalid rows,
+        the total number of rows and the net quantity delta of updated rows.
+    """
+    stats = {'total': 0, 'updated': 0, 'unchanged': 0, 'not_found': 0, 'invalid': 0, 'quantity_delta': 0}
+    with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(REPORT_COLUMNS)
+        for results_ref in results_refs:
+            for result in read_artifact(results_ref):
+                stats['total'] += 1
+                error = result.get('error', '')
+                if result['status'] == 'success':
+                    stats['updated'] += 1
+                    stats['quantity_delta'] += result['new_quantity'] - result['old_quantity']
+                elif result['status'] == 'unchanged':
+                    stats['unchanged'] += 1
+                elif error == 'Product not found':
+                    stats['not_found'] += 1
+                else:
+                    stats['invalid'] += 1
+                    error = json.dumps(error)
+                writer.writerow([
+                    result['sku'],
+                    result['status'],
+                    result.get('old_quantity', ''),
+                    result.get('new_quantity', ''),
+                    error
+                ])
+    return stats
+
+
+def format_report_summary(stats: Dict[str, int]) -> str:
+    """Render the aggregate stats of a nightly run as a short plain-text email body."""
+    return (
+        'Inventory Update Summary:\n\n'
+        f"Rows processed: {stats['total']}\n"
+        f"Updated: {stats['updated']}\n"
+        f"Unchanged: {stats['unchanged']}\n"
+        f"Not found: {stats['not_found']}\n"
+        f"Invalid: {stats['invalid']}\n"
+        f"Net quantity change: {stats['quantity_delta']:+d}\n"
+        f"Skipped (unchanged since last run): {stats.get('skipped', 0)}\n\n"
+        'Per-SKU results are attached as a compressed CSV.\n'
+    )
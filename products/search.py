@@ -0,0 +1,198 @@
+import re
+from typing import List
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from .models import Product, ProductSearchIndex
+
+# Matches the token characters of both the FTS5 unicode61 tokenizer and the
+# Postgres 'simple' configuration: letters and digits.
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(query: str) -> List[str]:
+    """Split a search query into lowercase word tokens."""
+    return TOKEN_RE.findall(query.lower())
+
+
+def no_results(queryset: QuerySet) -> QuerySet:
+    """Return an empty result that can still be ordered by `search_rank`."""
+    return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class LikeSearchBackend:
+    """
+    Fallback backend matching every token as a substring of the name or SKU.
+    Cannot use an index; used on databases without a full-text backend.
+    """
+    fields = ('name', 'sku')
+
+    def install(self, using: str = 'default') -> None:
+        """Nothing to set up."""
+
+    def uninstall(self, using: str = 'default') -> None:
+        """Nothing to remove."""
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        """
+        Filter `queryset` to products matching every token of `query`.
+
+        Args:
+            queryset (QuerySet): Products, or rows from `as_rows()`.
+            query (str): Free-text search query.
+
+        Returns:
+            QuerySet: Matching products annotated with `search_rank`, best first.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return no_results(queryset)
+        for token in tokens:
+            condition = Q()
+            for field in self.fields:
+                condition |= Q(**{f'{field}__icontains': token})
+            queryset = queryset.filter(condition)
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).order_by('-search_rank', 'id')
+
+
+class SQLiteFTSSearchBackend:
+    """
+    SQLite FTS5 backend.
+
+    An external-content FTS5 table indexes the product name and SKU with a prefix
+    index. Triggers on the product table keep it in sync, including for bulk and
+    queryset writes. Searches join it through `ProductSearchIndex` and rank by BM25.
+
+    SQLite migrations that rebuild the product table drop its triggers; such a
+    migration must run `install_search_index` again afterwards.
+    """
+    table = ProductSearchIndex._meta.db_table
+
+    def install(self, using: str = 'default') -> None:
+        """
+        Create the FTS table and its sync triggers if missing, and rebuild the index then.
+        Idempotent, so it can run again after migrations that drop the triggers.
+        """
+        product_table = Product._meta.db_table
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [f'{self.table}_%']
+            )
+            if cursor.fetchone()[0] == 3:
+                return
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                f"name, sku, content='{product_table}', content_rowid='id', tokenize='unicode61', prefix='2 3')"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {self.table}_ai AFTER INSERT ON {product_table} BEGIN "
+                f"INSERT INTO {self.table}(rowid, name, sku) VALUES (new.id, new.name, new.sku); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {self.table}_ad AFTER DELETE ON {product_table} BEGIN "
+                f"INSERT INTO {self.table}({self.table}, rowid, name, sku) VALUES ('delete', old.id, old.name, old.sku); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {self.table}_au AFTER UPDATE OF name, sku ON {product_table} BEGIN "
+                f"INSERT INTO {self.table}({self.table}, rowid, name, sku) VALUES ('delete', old.id, old.name, old.sku); "
+                f"INSERT INTO {self.table}(rowid, name, sku) VALUES (new.id, new.name, new.sku); END"
+            )
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+
+    def uninstall(self, using: str = 'default') -> None:
+        """Drop the sync triggers and the FTS table."""
+        with connections[using].cursor() as cursor:
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {self.table}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        """Filter `queryset` to products matching every token of `query` as a prefix, ranked by BM25."""
+        tokens = tokenize(query)
+        if not tokens:
+            return no_results(queryset)
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        # Join the index rather than filtering with a subquery: bm25() is only cheap
+        # while scanning the MATCH results, not when re-running the match per row.
+        # It is lower for better matches; negate it so higher ranks are better.
+        condition = RawSQL(f"{self.table} MATCH %s", [match], output_field=BooleanField())
+        rank = RawSQL(f"-bm25({self.table})", [], output_field=FloatField())
+        return (
+            queryset.filter(search_index__isnull=False).filter(condition)
+            .annotate(search_rank=rank).order_by('-search_rank', 'id')
+        )
+
+
+class PostgresSearchBackend:
+    """
+    Postgres full-text backend.
+
+    A stored generated `tsvector` column over the name and SKU, with a GIN index,
+    is maintained by Postgres itself on every write. Queries use prefix matching
+    and are ranked with `ts_rank`.
+    """
+    column = 'search_vector'
+    index = 'product_search_vector_idx'
+
+    def install(self, using: str = 'default') -> None:
+        """Add the generated search column and its GIN index if missing."""
+        product_table = Product._meta.db_table
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {product_table} ADD COLUMN IF NOT EXISTS {self.column} tsvector "
+                f"GENERATED ALWAYS AS (to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(sku, ''))) STORED"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.index} ON {product_table} USING GIN ({self.column})"
+            )
+
+    def uninstall(self, using: str = 'default') -> None:
+        """Drop the search column, and its index with it."""
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {Product._meta.db_table} DROP COLUMN IF EXISTS {self.column}")
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        """Filter `queryset` to products matching every token of `query` as a prefix, ranked by `ts_rank`."""
+        tokens = tokenize(query)
+        if not tokens:
+            return no_results(queryset)
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        product_table = Product._meta.db_table
+        condition = RawSQL(
+            f"{product_table}.{self.column} @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField()
+        )
+        rank = RawSQL(
+            f"ts_rank({product_table}.{self.column}, to_tsquery('simple', %s))", [tsquery], output_field=FloatField()
+        )
+        return queryset.filter(condition).annotate(search_rank=rank).order_by('-search_rank', 'id')
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(using: str = 'default'):
+    """
+    Return the product search backend: PRODUCT_SEARCH_BACKEND if set, otherwise
+    the full-text backend of the database in use, or the LIKE fallback.
+    """
+    if settings.PRODUCT_SEARCH_BACKEND:
+        return import_string(settings.PRODUCT_SEARCH_BACKEND)()
+    return BACKENDS.get(connections[using].vendor, LikeSearchBackend)()
+
+
+def install_search_index(apps, schema_editor) -> None:
+    """Migration operation creating the search index of the database being migrated."""
+    alias = schema_editor.connection.alias
+    get_search_backend(alias).install(alias)
+
+
+def uninstall_search_index(apps, schema_editor) -> None:
+    """Migration operation removing the search index of the database being migrated."""
+    alias = schema_editor.connection.alias
+    get_search_backend(alias).uninstall(alias)
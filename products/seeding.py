@@ -0,0 +1,118 @@
+import random
+import time
+import zlib
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from .caching import invalidate_catalog
+from .models import Product, StockHistory
+
+# Dimensions of the all-MiniLM-L6-v2 embeddings stored by the real pipeline
+EMBEDDING_DIMENSIONS = 384
+# Stock history is spread over this many days before now
+HISTORY_DAYS = 30
+
+ADJECTIVES = (
+    'Wireless', 'Ergonomic', 'Portable', 'Compact', 'Premium', 'Smart', 'Classic', 'Heavy-Duty',
+    'Ultra-Slim', 'Waterproof', 'Rechargeable', 'Adjustable', 'Foldable', 'Insulated', 'Organic',
+)
+MATERIALS = (
+    'Black', 'White', 'Steel', 'Bamboo', 'Leather', 'Aluminum', 'Ceramic', 'Cotton', 'Carbon',
+    'Walnut', 'Glass', 'Silicone',
+)
+NOUNS = (
+    'Mouse', 'Keyboard', 'Headphones', 'Desk Lamp', 'Water Bottle', 'Backpack', 'Phone Case',
+    'Charger', 'Monitor Stand', 'Coffee Mug', 'Notebook', 'Speaker', 'Webcam', 'USB Hub',
+    'Chair Cushion', 'Yoga Mat', 'Kettle', 'Cutting Board', 'Travel Pillow', 'Fitness Tracker',
+)
+DISCOUNTS = (0, 0, 0, 0, 5, 10, 15, 25)
+
+
+def product_name(rng: random.Random) -> str:
+    """Return a product name such as 'Wireless Steel Mouse M420'."""
+    return (
+        f"{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {rng.choice(NOUNS)} "
+        f"{rng.choice('ABCMPSX')}{rng.randint(100, 999)}"
+    )
+
+
+def fake_embedding(text: str) -> np.ndarray:
+    """Return a unit-length pseudo-random embedding, always the same for the same text."""
+    rng = np.random.default_rng(zlib.crc32(text.encode('utf-8')))
+    embedding = rng.standard_normal(EMBEDDING_DIMENSIONS).astype(np.float32)
+    return embedding / np.linalg.norm(embedding)
+
+
+def next_seed_index(prefix: str) -> int:
+    """Return the number following the highest seeded SKU with `prefix`."""
+    last_sku = (
+        Product.objects.filter(sku__startswith=prefix).order_by('-sku').values_list('sku', flat=True).first()
+    )
+    return int(last_sku[len(prefix):]) + 1 if last_sku else 0
+
+
+def seed_products(
+    products: int, history: int = 0, batch_size: int = 5000, seed: int = 0,
+    embeddings: bool = True, prefix: str = 'SEED'
+) -> Dict:
+    """
+    Insert synthetic products and stock history with `bulk_create`.
+
+    SKUs are `prefix` followed by a zero-padded number continuing after the
+    highest existing one, so repeated runs add to the catalog. Names, prices,
+    quantities and history are drawn from `seed`; embeddings derive from names.
+
+    Args:
+        products (int): Number of products to create.
+        history (int): Number of StockHistory rows, spread over the new products
+            and the last HISTORY_DAYS days.
+        batch_size (int): Rows inserted per transaction.
+        seed (int): Random seed.
+        embeddings (bool): Whether to store fake name embeddings.
+        prefix (str): SKU prefix of the seeded products.
+
+    Returns:
+        Dict: Rows created and wall time.
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    first = next_seed_index(prefix)
+    product_ids: List[int] = []
+    for batch_start in range(first, first + products, batch_size):
+        batch = []
+        for i in range(batch_start, min(batch_start + batch_size, first + products)):
+            product = Product(
+                name=product_name(rng),
+                sku=f"{prefix}{i:08d}",
+                price=Decimal(rng.randint(199, 99999)) / 100,
+                quantity=rng.randint(0, 500),
+                discount_percentage=Decimal(rng.choice(DISCOUNTS))
+            )
+            if embeddings:
+                product.set_embedding(fake_embedding(product.name))
+            batch.append(product)
+        with transaction.atomic():
+            Product.objects.bulk_create(batch)
+        product_ids.extend(
+            Product.objects.filter(sku__gte=batch[0].sku, sku__lte=batch[-1].sku).values_list('id', flat=True)
+        )
+
+    now = timezone.now()
+    for batch_start in range(0, history if product_ids else 0, batch_size):
+        batch = [
+            StockHistory(product_id=rng.choice(product_ids), quantity=rng.randint(0, 500))
+            for _ in range(min(batch_size, history - batch_start))
+        ]
+        with transaction.atomic():
+            StockHistory.objects.bulk_create(batch)
+            # `timestamp` is auto_now_add, so it is only set to the wanted value afterwards
+            for entry in batch:
+                entry.timestamp = now - timedelta(seconds=rng.uniform(0, HISTORY_DAYS * 86400))
+            StockHistory.objects.bulk_update(batch, ['timestamp'], batch_size=1000)
+
+    if products:
+        invalidate_catalog()
+    return {'products': products, 'history': history if product_ids else 0, 'seconds': time.perf_counter() - start}
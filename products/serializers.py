@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Product
+from .filters import ProductFilter
+from .models import DiscountCampaign, Product, ProductQuerySet
 
 class ProductSerializer(serializers.ModelSerializer):
     """
@@ -31,22 +32,67 @@ class ProductSerializer(serializers.ModelSerializer):
         if value < 0:
             raise serializers.ValidationError("Quantity cannot be negative.")
         return value
+
+
+class ProductReadSerializer(serializers.BaseSerializer):
+    """
+    Read-only serializer rendering the same output as ProductSerializer.
+    Converts each product with a single function instead of a field tree, for
+    list responses. Accepts rows from `Product.objects.as_rows()` or instances.
+    """
+    price_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+    discount_field = serializers.DecimalField(max_digits=5, decimal_places=2)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Resolve the output timezone once rather than for every product
+        output_timezone = serializers.DateTimeField().default_timezone()
+        self.last_updated_field = serializers.DateTimeField(default_timezone=output_timezone)
+
+    def to_representation(self, product):
+        if not isinstance(product, dict):
+            product = {field: getattr(product, field) for field in ProductQuerySet.READ_FIELDS + ('discounted_price',)}
+        return {
+            'id': product['id'],
+            'name': product['name'],
+            'sku': product['sku'],
+            'price': self.price_field.to_representation(product['price']),
+            'quantity': product['quantity'],
+            'last_updated': self.last_updated_field.to_representation(product['last_updated']),
+            'discounted_price': product['discounted_price'],
+            'discount_percentage': self.discount_field.to_representation(product['discount_percentage']),
+        }
     
 
+class ProductBulkItemSerializer(serializers.Serializer):
+    """
+    Validates one item of a bulk product upsert with the rules of ProductSerializer,
+    but without its per-item SKU uniqueness query: the bulk service resolves
+    existing SKUs for a whole chunk at once.
+    """
+    name = serializers.CharField(max_length=255)
+    sku = serializers.CharField(max_length=50)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    # Left out of existing products' updates when omitted; defaults apply on creation
+    quantity = serializers.IntegerField(required=False)
+    discount_percentage = serializers.DecimalField(
+        max_digits=5, decimal_places=2, min_value=0, max_value=100, required=False
+    )
+
+    validate_sku = ProductSerializer.validate_sku
+    validate_price = ProductSerializer.validate_price
+    validate_quantity = ProductSerializer.validate_quantity
+
+
 class ShopifyWebhookSerializer(serializers.Serializer):
     """
     Serializer for Shopify inventory update webhook payload.
-    Validates SKU and inventory quantity.
+    Validates SKU and inventory quantity; whether the SKU exists is resolved
+    by the inventory update itself to avoid an extra query.
     """
     sku = serializers.CharField(max_length=50)
     inventory_quantity = serializers.IntegerField()
 
-    def validate_sku(self, value):
-        """Ensure SKU exists in the database."""
-        if not Product.objects.filter(sku=value).exists():
-            raise serializers.ValidationError("Product with this SKU does not exist.")
-        return value
-
     def validate_inventory_quantity(self, value):
         """Ensure inventory quantity is non-negative."""
         if value < 0:
@@ -64,4 +110,40 @@ class ProductDiscountSerializer(serializers.Serializer):
         min_value=0, 
         max_value=100,
         help_text="Discount percentage (0-100)"
-    )
\ No newline at end of file
+    )
+
+
+class DiscountCampaignSerializer(serializers.ModelSerializer):
+    """
+    Serializer for discount campaigns.
+    Filters use the product list's filter parameters, e.g. `{"name__icontains": "mouse", "price_max": 50}`.
+    """
+    discount_percentage = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0, max_value=100)
+
+    class Meta:
+        model = DiscountCampaign
+        fields = [
+            'id', 'name', 'filters', 'discount_percentage', 'starts_at', 'ends_at', 'status',
+            'product_count', 'applied_at', 'reverted_at', 'created_at'
+        ]
+        read_only_fields = ['status', 'product_count', 'applied_at', 'reverted_at', 'created_at']
+
+    def validate_filters(self, value):
+        """Ensure filters are known ProductFilter parameters with valid values."""
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Expected an object of product filters.")
+        filterset = ProductFilter(value, queryset=Product.objects.none())
+        unknown = sorted(set(value) - set(filterset.filters))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown filters: {', '.join(unknown)}.")
+        if not filterset.is_valid():
+            raise serializers.ValidationError(filterset.errors)
+        return value
+
+    def validate(self, attrs):
+        """Ensure the campaign ends after it starts."""
+        starts_at = attrs.get('starts_at', getattr(self.instance, 'starts_at', None))
+        ends_at = attrs.get('ends_at', getattr(self.instance, 'ends_at', None))
+        if starts_at and ends_at and ends_at <= starts_at:
+            raise serializers.ValidationError({'ends_at': "The campaign must end after it starts."})
+        return attrs
@@ -0,0 +1,369 @@
+from decimal import Decimal
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .caching import invalidate_products
+from .models import Product, StockHistory
+from .serializers import ProductBulkItemSerializer
+
+# Postgres can read the old quantity, conditionally update it and record history
+# in a single statement using data-modifying CTEs.
+POSTGRES_INVENTORY_UPDATE_SQL = """
+    WITH current_product AS (
+        SELECT id, quantity FROM {product_table} WHERE sku = %(sku)s FOR UPDATE
+    ), updated AS (
+        UPDATE {product_table} AS product
+        SET quantity = %(quantity)s, last_updated = %(now)s
+        FROM current_product
+        WHERE product.id = current_product.id AND current_product.quantity <> %(quantity)s
+        RETURNING product.id
+    ), history AS (
+        INSERT INTO {history_table} (product_id, quantity, timestamp)
+        SELECT id, %(quantity)s, %(now)s FROM updated
+    )
+    SELECT current_product.id, current_product.quantity, EXISTS (SELECT 1 FROM updated)
+    FROM current_product
+"""
+
+
+def update_inventory(sku: str, quantity: int) -> Dict:
+    """
+    Set a product's inventory quantity, recording stock history only when it changes.
+
+    Only the `quantity` and `last_updated` columns are written, so the embedding
+    and other columns are left untouched.
+
+    Args:
+        sku (str): SKU of the product to update.
+        quantity (int): The new inventory quantity.
+
+    Returns:
+        Dict: Result with `status` of 'success', 'unchanged' or 'error'.
+    """
+    if connection.vendor == 'postgresql':
+        row = _update_inventory_postgres(sku, quantity)
+    else:
+        row = _update_inventory_orm(sku, quantity)
+
+    if row is None:
+        return {'sku': sku, 'status': 'error', 'error': 'Product not found'}
+    product_id, old_quantity, changed = row
+    if changed:
+        # Queryset updates and raw SQL do not send model signals
+        transaction.on_commit(lambda: invalidate_products([product_id]))
+    return {
+        'sku': sku,
+        'status': 'success' if changed else 'unchanged',
+        'old_quantity': old_quantity,
+        'new_quantity': quantity
+    }
+
+
+def _update_inventory_postgres(sku: str, quantity: int):
+    """Apply the inventory update in one round trip. Returns (id, old_quantity, changed) or None."""
+    sql = POSTGRES_INVENTORY_UPDATE_SQL.format(
+        product_table=Product._meta.db_table,
+        history_table=StockHistory._meta.db_table
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {'sku': sku, 'quantity': quantity, 'now': timezone.now()})
+        return cursor.fetchone()
+
+
+def _update_inventory_orm(sku: str, quantity: int):
+    """Fallback for databases without data-modifying CTEs. Returns (id, old_quantity, changed) or None."""
+    with transaction.atomic():
+        row = Product.objects.select_for_update().filter(sku=sku).order_by().values_list('id', 'quantity').first()
+        if row is None:
+            return None
+        product_id, old_quantity = row
+        if old_quantity == quantity:
+            return product_id, old_quantity, False
+        Product.objects.filter(pk=product_id).update(quantity=quantity, last_updated=timezone.now())
+        StockHistory.objects.create(product_id=product_id, quantity=quantity)
+    return product_id, old_quantity, True
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Yield successive lists of at most `size` items without materialising the iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def validate_inventory_item(item) -> Tuple[Optional[str], Optional[int], Optional[Dict]]:
+    """
+    Cheaply validate a `{sku, inventory_quantity}` item without a serializer or database access.
+
+    Mirrors the rules and messages of ShopifyWebhookSerializer.
+
+    Args:
+        item: A decoded JSON object or CSV row.
+
+    Returns:
+        Tuple: (sku, quantity, None) if valid, otherwise (None, None, errors).
+    """
+    if not isinstance(item, dict):
+        return None, None, {'non_field_errors': ['Expected an object.']}
+
+    errors = {}
+    sku = item.get('sku')
+    if sku is None:
+        errors['sku'] = ['This field is required.']
+    elif not isinstance(sku, str) or not sku.strip():
+        errors['sku'] = ['This field may not be blank.' if isinstance(sku, str) else 'Not a valid string.']
+    elif len(sku.strip()) > 50:
+        errors['sku'] = ['Ensure this field has no more than 50 characters.']
+
+    quantity = item.get('inventory_quantity')
+    if quantity is None:
+        errors['inventory_quantity'] = ['This field is required.']
+    else:
+        try:
+            if isinstance(quantity, bool) or (isinstance(quantity, float) and not quantity.is_integer()):
+                raise ValueError
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            errors['inventory_quantity'] = ['A valid integer is required.']
+        else:
+            if quantity < 0:
+                errors['inventory_quantity'] = ['Inventory quantity cannot be negative.']
+
+    if errors:
+        return None, None, errors
+    return sku.strip(), quantity, None
+
+
+def bulk_update_inventory(items: Iterable, chunk_size: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Validate and apply many inventory updates, one chunk per transaction.
+
+    Each chunk resolves its SKUs with a single `in_bulk` lookup and writes changed
+    rows with `bulk_update` and `bulk_create(StockHistory)`, so a chunk costs a
+    handful of queries regardless of its size.
+
+    Args:
+        items (Iterable): `{sku, inventory_quantity}` items; may be a lazy stream.
+        chunk_size (Optional[int]): Items per transaction, defaults to INVENTORY_BATCH_CHUNK_SIZE.
+
+    Yields:
+        Dict: One result per item, in input order, shaped like `update_inventory` results.
+    """
+    for chunk in chunked(items, chunk_size or settings.INVENTORY_BATCH_CHUNK_SIZE):
+        yield from _bulk_update_inventory_chunk(chunk)
+
+
+def _bulk_update_inventory_chunk(chunk: List) -> List[Dict]:
+    """Apply one chunk of inventory items atomically."""
+    validated = [validate_inventory_item(item) for item in chunk]
+    skus = {sku for sku, _, errors in validated if errors is None}
+    results = []
+
+    with transaction.atomic():
+        products = (
+            Product.objects.select_for_update().order_by().only('id', 'sku', 'quantity')
+            .in_bulk(skus, field_name='sku')
+        )
+        now = timezone.now()
+        changed = {}
+        for item, (sku, quantity, errors) in zip(chunk, validated):
+            if errors is not None:
+                item_sku = item.get('sku', 'unknown') if isinstance(item, dict) else 'unknown'
+                results.append({'sku': item_sku, 'status': 'error', 'error': errors})
+                continue
+            product = products.get(sku)
+            if product is None:
+                results.append({'sku': sku, 'status': 'error', 'error': 'Product not found'})
+                continue
+            old_quantity = product.quantity
+            if old_quantity != quantity:
+                product.quantity = quantity
+                product.last_updated = now
+                changed[product.pk] = product
+            results.append({
+                'sku': sku,
+                'status': 'success' if old_quantity != quantity else 'unchanged',
+                'old_quantity': old_quantity,
+                'new_quantity': quantity
+            })
+
+        if changed:
+            Product.objects.bulk_update(changed.values(), ['quantity', 'last_updated'])
+            StockHistory.objects.bulk_create(
+                StockHistory(product_id=product.pk, quantity=product.quantity) for product in changed.values()
+            )
+            # bulk_update and bulk_create do not send model signals
+            changed_ids = list(changed)
+            transaction.on_commit(lambda: invalidate_products(changed_ids))
+    return results
+
+
+# Columns written by a bulk upsert; `i_profile` is only set on creation
+BULK_UPSERT_FIELDS = ('name', 'price', 'quantity', 'discount_percentage')
+# Values of optional columns left out of a bulk item that creates a product
+BULK_CREATE_DEFAULTS = {'quantity': 0, 'discount_percentage': Decimal('0.00')}
+
+
+def bulk_upsert_products(items: Iterable, profile=None, chunk_size: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Validate and create or update many products keyed by SKU, one chunk per transaction.
+
+    Items are validated in memory, existing SKUs of a chunk are resolved with
+    one query, and changed rows are written with `bulk_create(update_conflicts=True)`.
+    Products whose name is new get their embedding regenerated by one
+    `generate_product_embeddings` task per chunk, once the chunk commits.
+
+    Args:
+        items (Iterable): Product objects with name, sku, price and optionally
+            quantity and discount_percentage, which existing products keep when
+            left out; may be a lazy stream.
+        profile (Optional[Profile]): Profile recorded as the creator of new products.
+        chunk_size (Optional[int]): Items per transaction, defaults to PRODUCT_BULK_CHUNK_SIZE.
+
+    Yields:
+        Dict: One result per item, in input order, with `status` of 'created',
+        'updated', 'unchanged' or 'error'.
+    """
+    serializer = ProductBulkItemSerializer()
+    # SKUs of the whole payload, so a SKU repeated in a later chunk is rejected too
+    seen_skus = set()
+    for chunk in chunked(items, chunk_size or settings.PRODUCT_BULK_CHUNK_SIZE):
+        yield from _bulk_upsert_products_chunk(chunk, serializer, profile, seen_skus)
+
+
+def _validate_product_item(serializer: ProductBulkItemSerializer, item) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """Return (validated data, None) or (None, errors) for one bulk item."""
+    if not isinstance(item, dict):
+        return None, {'non_field_errors': ['Expected an object.']}
+    try:
+        return serializer.run_validation(item), None
+    except ValidationError as exc:
+        return None, exc.detail
+
+
+def _bulk_upsert_products_chunk(
+    chunk: List, serializer: ProductBulkItemSerializer, profile, seen_skus: set
+) -> List[Dict]:
+    """Apply one chunk of product upserts atomically, adding its SKUs to `seen_skus`."""
+    validated = [_validate_product_item(serializer, item) for item in chunk]
+    results = [None] * len(chunk)
+    rows = {}
+    for index, (item, (data, errors)) in enumerate(zip(chunk, validated)):
+        if errors is None and data['sku'] in seen_skus:
+            errors = {'sku': ['Duplicate SKU in this batch.']}
+        if errors is not None:
+            item_sku = item.get('sku', 'unknown') if isinstance(item, dict) else 'unknown'
+            results[index] = {'sku': item_sku, 'status': 'error', 'error': errors}
+            continue
+        seen_skus.add(data['sku'])
+        rows[data['sku']] = (index, data)
+
+    with transaction.atomic():
+        existing = {
+            row['sku']: row for row in
+            Product.objects.select_for_update().filter(sku__in=rows).order_by()
+            .values('id', 'sku', 'quantity', *BULK_UPSERT_FIELDS)
+        }
+        now = timezone.now()
+        renamed, kept_name, history = [], [], []
+        for sku, (index, data) in rows.items():
+            current = existing.get(sku)
+            # Fields left out of the item keep their current value, or the default for a new product
+            data = {**(current or BULK_CREATE_DEFAULTS), **data}
+            if current is not None and all(current[field] == data[field] for field in BULK_UPSERT_FIELDS):
+                results[index] = {'sku': sku, 'status': 'unchanged', 'id': current['id']}
+                continue
+            product = Product(sku=sku, last_updated=now, **{field: data[field] for field in BULK_UPSERT_FIELDS})
+            if current is None:
+                product.i_profile = profile
+                renamed.append(product)
+            else:
+                (renamed if current['name'] != data['name'] else kept_name).append(product)
+                if current['quantity'] != data['quantity']:
+                    history.append(StockHistory(product_id=current['id'], quantity=data['quantity']))
+            results[index] = {'sku': sku, 'status': 'updated' if current else 'created'}
+
+        update_fields = [*BULK_UPSERT_FIELDS, 'last_updated']
+        # A new name makes the stored embedding stale, so clear it with the write
+        if renamed:
+            Product.objects.bulk_create(
+                renamed, update_conflicts=True, unique_fields=['sku'], update_fields=update_fields + ['embedding']
+            )
+        if kept_name:
+            Product.objects.bulk_create(
+                kept_name, update_conflicts=True, unique_fields=['sku'], update_fields=update_fields
+            )
+        if history:
+            StockHistory.objects.bulk_create(history)
+
+        written = renamed + kept_name
+        if any(product.pk is None for product in written):
+            # Databases that cannot return ids from an upsert
+            ids = dict(Product.objects.filter(sku__in=[p.sku for p in written]).values_list('sku', 'id'))
+            for product in written:
+                product.pk = ids[product.sku]
+        for product in written:
+            results[rows[product.sku][0]]['id'] = product.pk
+
+        if written:
+            # bulk_create does not send model signals
+            written_ids = [product.pk for product in written]
+            renamed_ids = [product.pk for product in renamed]
+            transaction.on_commit(lambda: invalidate_products(written_ids))
+            if renamed_ids:
+                transaction.on_commit(lambda: _enqueue_embeddings(renamed_ids))
+    return results
+
+
+def _enqueue_embeddings(product_ids: List[int]) -> None:
+    # The tasks module imports this one
+    from .tasks import generate_product_embeddings
+    generate_product_embeddings.delay(product_ids)
+
+
+def _delete_products(product_ids: List[int]) -> None:
+    """
+    Delete products with Django's collector, one chunk of ids at a time.
+
+    Every `on_delete` rule and post_delete receiver runs, including those of
+    relations added later, and the receivers invalidate each deleted product
+    once the chunk commits. The embeddings are deferred since nothing reads them.
+    """
+    Product.objects.filter(pk__in=product_ids).defer('embedding').delete()
+
+
+def bulk_delete_products(skus: Iterable, chunk_size: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Delete many products by SKU, one chunk per transaction.
+
+    Args:
+        skus (Iterable): SKU strings, or objects with a `sku`; may be a lazy stream.
+        chunk_size (Optional[int]): SKUs per transaction, defaults to PRODUCT_BULK_CHUNK_SIZE.
+
+    Yields:
+        Dict: One result per SKU, in input order, with `status` of 'deleted' or 'error'.
+    """
+    for chunk in chunked(skus, chunk_size or settings.PRODUCT_BULK_CHUNK_SIZE):
+        chunk = [item.get('sku') if isinstance(item, dict) else item for item in chunk]
+        with transaction.atomic():
+            ids = dict(
+                Product.objects.filter(sku__in=[sku for sku in chunk if isinstance(sku, str)])
+                .values_list('sku', 'id')
+            )
+            if ids:
+                _delete_products(list(ids.values()))
+        deleted = set()
+        for sku in chunk:
+            if not isinstance(sku, str) or sku not in ids:
+                yield {'sku': sku if isinstance(sku, str) else 'unknown', 'status': 'error', 'error': 'Product not found'}
+            elif sku in deleted:
+                yield {'sku': sku, 'status': 'error', 'error': 'Duplicate SKU in this batch.'}
+            else:
+                deleted.add(sku)
+                yield {'sku': sku, 'status': 'deleted', 'id': ids[sku]}
@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .caching import TAG_INSIGHTS, invalidate_products, invalidate_tags
+from .models import Product, StockHistory
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_cache(sender, instance, **kwargs):
+    """Invalidate cached data of a saved or deleted product once the write commits."""
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_products([pk]))
+
+
+@receiver(post_save, sender=StockHistory)
+@receiver(post_delete, sender=StockHistory)
+def invalidate_insights_cache(sender, instance, **kwargs):
+    """Stock history feeds the trending products, so invalidate the insights."""
+    transaction.on_commit(lambda: invalidate_tags(TAG_INSIGHTS))
+
@@ -1,97 +1,285 @@
-import csv
-from io import StringIO
-from celery import chain
+import os
+from array import array
+from collections import Counter
+import numpy as np
+from celery import chain, chord
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage
 from django.conf import settings
-from .models import Product, StockHistory
-from .serializers import ShopifyWebhookSerializer
+from django.utils import timezone
+from .artifacts import cleanup_run, create_run_dir, read_artifact, write_artifact
+from .caching import embedding_key, trending_products_key
+from .campaigns import run_due_campaigns
+from .feeds import (
+    filter_unchanged_rows, fingerprint_feed, is_remote_feed, read_feed_chunk, resolve_feed_source,
+    row_fingerprint, save_row_fingerprints
+)
+from .instrumentation import instrument_stage
+from .models import InventoryImportChunk, InventoryImportRun, Product
+from .reports import format_report_summary, write_inventory_report
+from .services import bulk_update_inventory
+from .utils import get_embedding_model, get_trending_products
 
 @shared_task
-def import_product_data(csv_content):
-    """
-    Task 1: Import mock product data from CSV content.
-    Returns list of product data dictionaries.
-    """
-    product_data = []
-    csv_file = StringIO(csv_content)
-    reader = csv.DictReader(csv_file)
-    
-    for row in reader:
-        if 'sku' in row and 'inventory_quantity' in row:
-            product_data.append({
-                'sku': row['sku'],
-                'inventory_quantity': int(row['inventory_quantity'])
-            })
-    return product_data
+def import_product_data(path, start, end, run_dir, previous_fingerprints=None):
+    """
+    Task 1: Import one chunk of product data from a CSV feed.
+    Rows whose (sku, inventory_quantity) were already in the last successful
+    feed are skipped. Writes the product data dictionaries for the remaining
+    rows between the byte offsets to an artifact and returns its reference.
+    """
+    with instrument_stage('parse_csv') as stage:
+        product_data = [
+            {'sku': row['sku'], 'inventory_quantity': row['inventory_quantity']}
+            for row in read_feed_chunk(path, start, end)
+            if row.get('sku') is not None and row.get('inventory_quantity') is not None
+        ]
+        stage.rows = len(product_data)
+    with instrument_stage('filter_unchanged') as stage:
+        stage.rows = len(product_data)
+        product_data, skipped = filter_unchanged_rows(product_data, previous_fingerprints)
+    with instrument_stage('write_artifact') as stage:
+        rows_ref = write_artifact(run_dir, f"rows-{start}", product_data)
+        stage.rows = rows_ref['summary']['rows']
+    rows_ref['summary']['skipped'] = skipped
+    return rows_ref
 
 @shared_task
-def validate_and_update_inventory(product_data):
+def validate_and_update_inventory(rows_ref):
     """
     Task 2: Validate imported data and update inventory quantities.
-    Returns list of update results.
-    """
-    results = []
-    for data in product_data:
-        serializer = ShopifyWebhookSerializer(data=data)
-        if serializer.is_valid():
-            sku = serializer.validated_data['sku']
-            inventory_quantity = serializer.validated_data['inventory_quantity']
-            try:
-                product = Product.objects.get(sku=sku)
-                old_quantity = product.quantity
-                StockHistory.objects.create(product=product, quantity=inventory_quantity)
-                product.quantity = inventory_quantity
-                product.save()
-                results.append({
-                    'sku': sku,
-                    'status': 'success',
-                    'old_quantity': old_quantity,
-                    'new_quantity': inventory_quantity
-                })
-            except Product.DoesNotExist:
-                results.append({
-                    'sku': sku,
-                    'status': 'error',
-                    'error': 'Product not found'
-                })
-        else:
-            results.append({
-                'sku': data.get('sku', 'unknown'),
-                'status': 'error',
-                'error': serializer.errors
-            })
-    return results
+    Rows are checked without serializers, resolved with one `in_bulk` lookup per
+    batch and only changed quantities are written, in chunked transactions.
+    Writes the update results to an artifact and returns its reference with
+    per-status counts. Fingerprints of rows that failed are saved alongside so
+    they are retried by the next run.
+    """
+    statuses = Counter()
+    failed = array('Q')
+
+    def counted(results):
+        for row, result in zip(read_artifact(rows_ref), results):
+            statuses[result['status']] += 1
+            if result['status'] == 'error' and isinstance(row.get('sku'), str) and isinstance(row.get('inventory_quantity'), str):
+                failed.append(row_fingerprint(row['sku'], row['inventory_quantity']))
+            yield result
+
+    run_dir, name = os.path.split(rows_ref['artifact'])
+    name = name.replace('rows-', 'results-', 1).split('.')[0]
+    with instrument_stage('db_write') as stage:
+        results_ref = write_artifact(run_dir, name, counted(bulk_update_inventory(read_artifact(rows_ref))))
+        stage.rows = results_ref['summary']['rows']
+    results_ref['summary'].update(statuses)
+    results_ref['summary']['skipped'] = rows_ref['summary'].get('skipped', 0)
+    if failed:
+        results_ref['failed_fingerprints'] = os.path.join(run_dir, f"{name}-failed.npy")
+        np.save(results_ref['failed_fingerprints'], np.frombuffer(failed, dtype=np.uint64))
+    return results_ref
+
+@shared_task
+def checkpoint_inventory_chunk(results_ref, chunk_id):
+    """
+    Mark a chunk of an import run as done, so a resumed run does not repeat it.
+    The fingerprints of its failed rows are kept outside the run's artifacts,
+    which a crash deletes, until the run finishes.
+    Passes the results reference through to the report.
+    """
+    failed_fingerprints = ''
+    if results_ref.get('failed_fingerprints'):
+        failed_fingerprints = save_row_fingerprints(
+            np.load(results_ref['failed_fingerprints']), f"chunk-{chunk_id}-failed"
+        )
+    InventoryImportChunk.objects.filter(pk=chunk_id).update(
+        status=InventoryImportChunk.STATUS_COMPLETED,
+        errors=results_ref['summary'].get('error', 0),
+        failed_fingerprints=failed_fingerprints
+    )
+    return results_ref
 
 @shared_task
-def generate_and_email_report(results):
+def generate_and_email_report(results_refs, run_dir=None, downloaded_path=None, run_id=None, skipped_rows=0):
     """
     Task 3: Generate a report and email the summary.
+    Streams every chunk's results into a compressed CSV attachment while
+    aggregating them, marks the import run as completed and removes the run's
+    artifacts.
     """
-    subject = 'Nightly Inventory Update Report'
-    message = 'Inventory Update Summary:\n\n'
-    for result in results:
-        if result['status'] == 'success':
-            message += f"SKU: {result['sku']}, Updated from {result['old_quantity']} to {result['new_quantity']}\n"
-        else:
-            message += f"SKU: {result['sku']}, Error: {result['error']}\n"
-    
-    send_mail(
-        subject=subject,
-        message=message,
+    report_path = os.path.join(run_dir or settings.INVENTORY_ARTIFACT_DIR, 'inventory-report.csv.gz')
+    with instrument_stage('write_report') as stage:
+        stats = write_inventory_report(results_refs, report_path)
+        stage.rows = stats['total']
+    stats['skipped'] = skipped_rows + sum(ref['summary'].get('skipped', 0) for ref in results_refs)
+
+    email = EmailMessage(
+        subject='Nightly Inventory Update Report',
+        body=format_report_summary(stats),
         from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[settings.DEFAULT_FROM_EMAIL],  # Replace with admin email
-        fail_silently=False,
+        to=[settings.DEFAULT_FROM_EMAIL],  # Replace with admin email
     )
-    return {'status': 'Report emailed successfully'}
+    email.attach_file(report_path, mimetype='application/gzip')
+    with instrument_stage('send_email'):
+        email.send(fail_silently=False)
+
+    if run_id:
+        finish_inventory_run(run_id)
+    if run_dir:
+        cleanup_inventory_run(run_dir=run_dir, downloaded_path=downloaded_path)
+    else:
+        os.remove(report_path)
+    return {'status': 'Report emailed successfully', 'summary': stats}
+
+def finish_inventory_run(run_id):
+    """
+    Mark an import run as completed and make its row fingerprints the baseline
+    for the next run, excluding rows that failed so they are retried, including
+    those of chunks completed by earlier, crashed attempts of the run.
+    """
+    run = InventoryImportRun.objects.get(pk=run_id)
+    failed_paths = list(run.chunks.exclude(failed_fingerprints='').values_list('failed_fingerprints', flat=True))
+    if failed_paths and run.row_fingerprints:
+        failed = np.concatenate([np.load(path) for path in failed_paths])
+        np.save(run.row_fingerprints, np.setdiff1d(np.load(run.row_fingerprints), failed))
+
+    run.status = InventoryImportRun.STATUS_COMPLETED
+    run.finished_at = timezone.now()
+    run.save(update_fields=['status', 'finished_at'])
+
+    # Only the latest successful run is compared against, so older fingerprints can go,
+    # and failed-row fingerprints of this source are no longer needed
+    older_runs = InventoryImportRun.objects.filter(source=run.source).exclude(pk=run.pk)
+    failed_chunks = InventoryImportChunk.objects.filter(run__source=run.source).exclude(failed_fingerprints='')
+    paths = [
+        *older_runs.exclude(row_fingerprints='').values_list('row_fingerprints', flat=True),
+        *failed_chunks.values_list('failed_fingerprints', flat=True),
+    ]
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    older_runs.update(row_fingerprints='')
+    failed_chunks.update(failed_fingerprints='')
+
+@shared_task
+def cleanup_inventory_run(request=None, exc=None, traceback=None, run_dir=None, downloaded_path=None, run_id=None):
+    """
+    Remove the artifacts and downloaded feed of a nightly run.
+    Also used as the error callback when a chunk fails, in which case the run is
+    marked as failed and resumes from its completed chunks next time.
+    """
+    if run_id:
+        InventoryImportRun.objects.filter(pk=run_id).update(status=InventoryImportRun.STATUS_FAILED)
+    cleanup_run(run_dir)
+    if downloaded_path and os.path.exists(downloaded_path):
+        os.remove(downloaded_path)
+
+def start_inventory_run(source, path):
+    """
+    Fingerprint a feed and create its import run, or resume an unfinished run
+    of the same feed contents.
+    Chunks identical to a chunk of the last successful run that had no errors
+    are marked as skipped.
+    Returns the run and its previous successful run, if any.
+    """
+    with instrument_stage('fingerprint_feed') as stage:
+        feed_fingerprint, chunks, row_hashes = fingerprint_feed(path, settings.INVENTORY_IMPORT_CHUNK_SIZE)
+        stage.rows = sum(chunk['rows'] for chunk in chunks)
+    previous = InventoryImportRun.objects.filter(source=source, status=InventoryImportRun.STATUS_COMPLETED).first()
+    run = (
+        InventoryImportRun.objects.filter(source=source, feed_fingerprint=feed_fingerprint)
+        .exclude(status=InventoryImportRun.STATUS_COMPLETED).first()
+    )
+    if run is None:
+        run = InventoryImportRun.objects.create(source=source, feed_fingerprint=feed_fingerprint)
+        InventoryImportChunk.objects.bulk_create(InventoryImportChunk(run=run, **chunk) for chunk in chunks)
+    run.status = InventoryImportRun.STATUS_RUNNING
+    run.row_fingerprints = save_row_fingerprints(row_hashes, f"run-{run.pk}")
+    run.save(update_fields=['status', 'row_fingerprints'])
+
+    if previous is not None:
+        unchanged = previous.chunks.exclude(status=InventoryImportChunk.STATUS_PENDING).filter(errors=0)
+        run.chunks.filter(
+            status=InventoryImportChunk.STATUS_PENDING,
+            fingerprint__in=unchanged.values('fingerprint')
+        ).update(status=InventoryImportChunk.STATUS_SKIPPED)
+    return run, previous
+
+@shared_task
+def nightly_inventory_update(source):
+    """
+    Split the feed at `source` (file path or URL) into chunks and process them
+    in parallel, emailing a report once every chunk is done.
+    Only chunks and rows that changed since the last successful run are applied,
+    and chunks completed by a crashed run of the same feed are not repeated.
+    Only byte offsets and artifact references travel through the broker.
+    """
+    with instrument_stage('download_feed'):
+        path = resolve_feed_source(source)
+    run, previous = start_inventory_run(source, path)
+    previous_fingerprints = previous.row_fingerprints if previous else None
+    run_dir = create_run_dir()
+
+    pending = run.chunks.filter(status=InventoryImportChunk.STATUS_PENDING)
+    header = [
+        chain(
+            import_product_data.s(path, chunk.start, chunk.end, run_dir, previous_fingerprints),
+            validate_and_update_inventory.s(),
+            checkpoint_inventory_chunk.s(chunk.pk)
+        )
+        for chunk in pending
+    ]
+    skipped_rows = sum(run.chunks.filter(status=InventoryImportChunk.STATUS_SKIPPED).values_list('rows', flat=True))
+
+    downloaded_path = path if is_remote_feed(source) else None
+    report = generate_and_email_report.s(
+        run_dir=run_dir, downloaded_path=downloaded_path, run_id=run.pk, skipped_rows=skipped_rows
+    )
+    if not header:
+        report.delay([])
+        return
+    report.on_error(cleanup_inventory_run.s(run_dir=run_dir, downloaded_path=downloaded_path, run_id=run.pk))
+    chord(header)(report)
+
+@shared_task
+def update_trending_products():
+    """
+    Recompute the trending products and cache them for the insights endpoint.
+    The entry is tagged with the insights tag, so stock changes invalidate it.
+    """
+    trending_products = get_trending_products()
+    cache.set(trending_products_key(), trending_products, timeout=3600)
+    return {'summary': {'rows': len(trending_products)}}
+
+
+@shared_task
+def generate_product_embeddings(product_ids):
+    """
+    Generate the missing name embeddings of the given products.
+    Names are encoded in batches of EMBEDDING_BATCH_SIZE and stored with one bulk update.
+    """
+    products = list(
+        Product.objects.filter(pk__in=product_ids, embedding__isnull=True).only('id', 'sku', 'name').order_by()
+    )
+    if not products:
+        return {'summary': {'rows': 0}}
+    with instrument_stage('encode_embeddings') as stage:
+        embeddings = get_embedding_model().encode(
+            [product.name for product in products], batch_size=settings.EMBEDDING_BATCH_SIZE
+        )
+        stage.rows = len(products)
+    for product, embedding in zip(products, embeddings):
+        product.set_embedding(embedding)
+    # Only the embedding column changes, which no cached response shows
+    Product.objects.bulk_update(products, ['embedding'])
+    cache.set_many(
+        {embedding_key(product): product.embedding for product in products}, timeout=None
+    )
+    return {'summary': {'rows': len(products)}}
+
 
 @shared_task
-def nightly_inventory_update(csv_content):
+def run_discount_campaigns():
     """
-    Chain the three tasks for nightly execution.
+    Apply discount campaigns that have started and revert those that have ended.
+    Scheduled every minute by `schedule_discount_campaigns`.
     """
-    chain(
-        import_product_data.s(csv_content),
-        validate_and_update_inventory.s(),
-        generate_and_email_report.s()
-    )()
\ No newline at end of file
+    return {'summary': run_due_campaigns()}
@@ -1,17 +1,57 @@
-from functools import cache
-from django.test import TestCase
-from rest_framework.test import APITestCase
+from django.core.cache import cache, caches
+import csv
+import gzip
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+from django.conf import settings
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.views import APIView
 from rest_framework import status
 from django.urls import reverse
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
 from unittest.mock import patch
 import numpy as np
-from products.models import Product, StockHistory
-from products.serializers import ProductSerializer
+from products.campaigns import apply_campaign, revert_campaign, run_due_campaigns
+from products.models import (
+    DiscountCampaign, DiscountCampaignItem, InventoryImportChunk, InventoryImportRun, Product, StockHistory, TaskMetric
+)
+from products.benchmarks import compare_results, run_benchmark_suite
+from products.pagination import EstimatedCountPaginator
+from products.serializers import ProductReadSerializer, ProductSerializer
+from products.caching import (
+    TAG_INSIGHTS, embedding_key, get_catalog_version, get_tag_versions, insights_key, invalidate_tags, product_tag,
+    tag_version_key, trending_products_key
+)
+from products.artifacts import cleanup_run, create_run_dir, read_artifact, write_artifact
+from products.feeds import fingerprint_feed
+from products.instrumentation import StageTimer, instrument_stage
+from product_api.profiling import ProfileFormatter
+from products.search import LikeSearchBackend, get_search_backend
+from products.seeding import EMBEDDING_DIMENSIONS, fake_embedding, seed_products
+from products.services import bulk_update_inventory, update_inventory
+from products.views import ConditionalGetMixin
+from products.utils import claim_inventory_event
 from authentication.models import Profile
 from django.contrib.auth.models import User, Group
-from products.tasks import nightly_inventory_update, update_trending_products
+from products.tasks import (
+    checkpoint_inventory_chunk, cleanup_inventory_run, generate_product_embeddings, import_product_data,
+    nightly_inventory_update, start_inventory_run, validate_and_update_inventory, update_trending_products
+)
 import base64
 import hmac
 import hashlib
@@ -20,6 +60,7 @@ from decouple import config
 class ProductAPITestCase(APITestCase):
     def setUp(self):
         """Set up test data and authentication."""
+        cache.clear()
         # Create a user and profile
         self.user = User.objects.create_user(username='testuser', password='testpass')
         self.profile = Profile.objects.create(user=self.user)
@@ -73,14 +114,15 @@ class ProductAPITestCase(APITestCase):
         url = reverse('products:product-list-create')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        self.assertEqual(response.data[0]['sku'], 'SP001')
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['results'][0]['sku'], 'SP001')
 
         # Test filtering
         response = self.client.get(url, {'price_min': 50})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['sku'], 'SP002')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['sku'], 'SP002')
 
         # Test POST /api/products/
         data = {
@@ -95,6 +137,40 @@ class ProductAPITestCase(APITestCase):
         self.assertEqual(Product.objects.count(), 3)
         self.assertEqual(response.data['sku'], 'SP003')
 
+    def test_product_list_pagination(self):
+        """The product list is cursor-paginated on (name, id), forwards and backwards."""
+        Product.objects.bulk_create(
+            Product(name="Blue Wireless Mouse", sku=f"DUP{i}", price=19.99, quantity=1) for i in range(3)
+        )
+        expected = list(Product.objects.order_by('name', 'id').values_list('sku', flat=True))
+        url = reverse('products:product-list-create')
+
+        skus, pages = [], []
+        response = self.client.get(url, {'page_size': 2, 'count': 'false'})
+        while True:
+            self.assertIsNone(response.data['count'])
+            self.assertLessEqual(len(response.data['results']), 2)
+            skus += [product['sku'] for product in response.data['results']]
+            pages.append(response)
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(skus, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0].data['previous'])
+
+        response = self.client.get(pages[2].data['previous'])
+        self.assertEqual(response.data['results'], pages[1].data['results'])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(response.data['results'], pages[0].data['results'])
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response.data['count'], 5)
+        response = self.client.get(url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_product_detail(self):
         """Test retrieving, updating, and deleting a product."""
         url = reverse('products:product-detail', kwargs={'pk': self.product1.pk})
@@ -206,9 +282,965 @@ class ProductAPITestCase(APITestCase):
         #     )
         #     self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+class ProductReadPathTestCase(TestCase):
+    def setUp(self):
+        """Set up products with discounts that exercise decimal rounding."""
+        Product.objects.create(name="Blue Wireless Mouse", sku="SP001", price=Decimal('29.99'), quantity=5, discount_percentage=Decimal('10.00'))
+        Product.objects.create(name="Red Gaming Keyboard", sku="SP002", price=Decimal('59.99'), quantity=30)
+        Product.objects.create(name="USB-C Cable", sku="SP003", price=Decimal('25.00'), quantity=0, discount_percentage=Decimal('12.35'))
+
+    def test_read_serializer_output_is_byte_compatible(self):
+        """Rows rendered through as_rows() match ProductSerializer output byte for byte."""
+        full = JSONRenderer().render(ProductSerializer(Product.objects.order_by('name', 'id'), many=True).data)
+        fast = JSONRenderer().render(ProductReadSerializer(Product.objects.as_rows().order_by('name', 'id'), many=True).data)
+        self.assertEqual(fast, full)
+        self.assertEqual(
+            JSONRenderer().render(ProductReadSerializer(Product.objects.get(sku='SP003')).data),
+            JSONRenderer().render(ProductSerializer(Product.objects.get(sku='SP003')).data)
+        )
+
+    def test_as_rows_skips_embedding(self):
+        """The read path fetches only the columns shown by the API."""
+        row = Product.objects.as_rows().get(sku='SP003')
+        self.assertNotIn('embedding', row)
+        self.assertEqual(row['discounted_price'], Decimal('21.9125'))
+
+    def test_benchmark_command(self):
+        """The benchmark reports rows/sec of both paths and checks their output matches."""
+        out = StringIO()
+        call_command('benchmark', rows=20, repeat=1, stdout=out)
+        self.assertIn('Products: 23', out.getvalue())
+        self.assertIn('byte-for-byte identical', out.getvalue())
+        self.assertEqual(Product.objects.count(), 3)
+
+class ProductSearchTestCase(APITestCase):
+    def setUp(self):
+        """Set up products to search and an authenticated client."""
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('products:product-list-create')
+        self.mouse = Product.objects.create(name="Wireless Mouse", sku="MS-100", price=19.99, quantity=5)
+        self.long_mouse = Product.objects.create(
+            name="Blue Wireless Mouse With Extra Long Cable", sku="MS-200", price=24.99, quantity=5
+        )
+        self.keyboard = Product.objects.create(name="Red Gaming Keyboard", sku="KB-100", price=59.99, quantity=30)
+
+    def search(self, query, **params):
+        response = self.client.get(self.url, {'search': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [product['sku'] for product in response.data['results']]
+
+    def test_prefix_matching_on_name_and_sku(self):
+        """Every term must match the start of a word in the name or SKU."""
+        self.assertCountEqual(self.search('wire'), ['MS-100', 'MS-200'])
+        self.assertEqual(self.search('red keyb'), ['KB-100'])
+        self.assertEqual(self.search('kb'), ['KB-100'])
+        self.assertEqual(self.search('ireless'), [])
+        self.assertEqual(self.search('!!!'), [])
+        self.assertEqual(len(self.search('')), 3)
+
+    def test_results_are_ranked(self):
+        """Shorter, more specific matches rank first."""
+        self.assertEqual(self.search('mouse'), ['MS-100', 'MS-200'])
+        ranks = list(get_search_backend().search(Product.objects.as_rows(), 'mouse').values_list('search_rank', flat=True))
+        self.assertGreater(ranks[0], ranks[1])
+
+    def test_index_follows_writes(self):
+        """Saves, queryset updates, bulk inserts and deletes are reflected in search results."""
+        self.keyboard.name = "Red Mechanical Keyboard"
+        self.keyboard.save()
+        self.assertEqual(self.search('mechanical'), ['KB-100'])
+        self.assertEqual(self.search('gaming'), [])
+
+        Product.objects.filter(pk=self.mouse.pk).update(name="Wired Mouse")
+        self.assertEqual(self.search('wired'), ['MS-100'])
+        Product.objects.bulk_create([Product(name="Wired Headset", sku="HS-100", price=39.99, quantity=1)])
+        self.assertCountEqual(self.search('wired'), ['MS-100', 'HS-100'])
+
+        self.long_mouse.delete()
+        self.assertEqual(self.search('blue'), [])
+
+    def test_search_results_are_paginated_by_rank(self):
+        """Cursor pagination walks search results in rank order, forwards and backwards."""
+        Product.objects.bulk_create(
+            Product(name=f"Wireless Headset {i}", sku=f"HS-{i}", price=39.99, quantity=1) for i in range(3)
+        )
+        expected = list(get_search_backend().search(Product.objects.as_rows(), 'wireless').values_list('sku', flat=True))
+        self.assertEqual(len(expected), 5)
+
+        skus, pages = [], []
+        response = self.client.get(self.url, {'search': 'wireless', 'page_size': 2})
+        self.assertEqual(response.data['count'], 5)
+        while True:
+            skus += [product['sku'] for product in response.data['results']]
+            pages.append(response)
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(skus, expected)
+        response = self.client.get(pages[-1].data['previous'])
+        self.assertEqual(response.data['results'], pages[-2].data['results'])
+
+    def test_like_backend(self):
+        """The LIKE fallback matches substrings and can be selected by setting."""
+        self.assertEqual(
+            list(LikeSearchBackend().search(Product.objects.all(), 'ireless mouse').values_list('sku', flat=True)),
+            ['MS-100', 'MS-200']
+        )
+        with override_settings(PRODUCT_SEARCH_BACKEND='products.search.LikeSearchBackend'):
+            self.assertEqual(self.search('ireless'), ['MS-100', 'MS-200'])
+
+    def test_benchmark_command(self):
+        """The search benchmark times both backends on rolled-back synthetic products."""
+        out = StringIO()
+        call_command('benchmark', rows=20, repeat=1, search='benchmark product', stdout=out)
+        self.assertIn('Products: 23', out.getvalue())
+        self.assertIn('SQLiteFTSSearchBackend', out.getvalue())
+        self.assertEqual(Product.objects.count(), 3)
+
+class ProductExportTestCase(APITestCase):
+    def setUp(self):
+        """Set up products to export and an authenticated client."""
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('products:product-export')
+        Product.objects.create(name="Blue Wireless Mouse", sku="SP001", price=Decimal('29.99'), quantity=5, discount_percentage=Decimal('10.00'))
+        Product.objects.create(name="Red, \"Gaming\" Keyboard", sku="SP002", price=Decimal('59.99'), quantity=30)
+        Product.objects.create(name="USB-C Cable", sku="SP003", price=Decimal('25.00'), quantity=0)
+
+    @override_settings(PRODUCT_EXPORT_CHUNK_SIZE=2)
+    def test_ndjson_export_matches_list_representation(self):
+        """Each NDJSON line is the product as rendered by the list endpoint, in id order."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        expected = json.loads(JSONRenderer().render(
+            ProductReadSerializer(Product.objects.as_rows().order_by('id'), many=True).data
+        ))
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_csv_export_with_sparse_fields(self):
+        """`?fields=` selects and orders the CSV columns."""
+        response = self.client.get(self.url, {'output': 'csv', 'fields': 'sku,quantity,name', 'quantity_min': 1})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual(rows, [
+            ['sku', 'quantity', 'name'],
+            ['SP001', '5', 'Blue Wireless Mouse'],
+            ['SP002', '30', 'Red, "Gaming" Keyboard'],
+        ])
+
+    def test_csv_prices_match_list_representation(self):
+        """Computed discounted prices are written as the list endpoint renders them."""
+        response = self.client.get(self.url, {'output': 'csv', 'fields': 'sku,price,discounted_price', 'quantity_min': 1})
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual(rows[1:], [['SP001', '29.99', '26.991'], ['SP002', '59.99', '59.99']])
+
+    def test_gzip_export(self):
+        """Clients accepting gzip get a compressed stream."""
+        response = self.client.get(self.url, {'fields': 'sku'}, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8')
+        self.assertEqual(body, '{"sku":"SP001"}\n{"sku":"SP002"}\n{"sku":"SP003"}\n')
+
+    def test_invalid_parameters(self):
+        """Unknown fields and outputs are rejected."""
+        response = self.client.get(self.url, {'fields': 'sku,embedding'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('embedding', response.data['error'])
+        response = self.client.get(self.url, {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class ProductConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        """Set up a product, an authenticated client and a clean cache."""
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name="Blue Wireless Mouse", sku="SP001", price=29.99, quantity=5)
+        self.list_url = reverse('products:product-list-create')
+        self.detail_url = reverse('products:product-detail', kwargs={'pk': self.product.pk})
+
+    def test_unchanged_list_returns_not_modified(self):
+        """A list request with the current ETag gets 304 without querying products."""
+        response = self.client.get(self.list_url)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        other = self.client.get(self.list_url, {'count': 'false'})
+        self.assertNotEqual(other['ETag'], response['ETag'])
+
+    def test_unchanged_detail_returns_not_modified(self):
+        """A detail request with the current ETag or Last-Modified gets 304 after one lightweight query."""
+        response = self.client.get(self.detail_url)
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        not_modified = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(reverse('products:product-detail', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_writes_change_validators(self):
+        """Updates through the detail view and the inventory service invalidate list and detail ETags."""
+        list_etag = self.client.get(self.list_url)['ETag']
+        detail_etag = self.client.get(self.detail_url)['ETag']
+        data = {'name': 'Updated Mouse', 'sku': 'SP001', 'price': 34.99, 'quantity': 10, 'discount_percentage': 0}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(self.detail_url, data, format='json')
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['name'], 'Updated Mouse')
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        list_etag = self.client.get(self.list_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            update_inventory('SP001', 10)
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=list_etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        with self.captureOnCommitCallbacks(execute=True):
+            update_inventory('SP001', 11)
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=list_etag).status_code, status.HTTP_200_OK)
+
+    def test_views_without_validators_are_served_unchanged(self):
+        """The mixin's default validators leave the response alone."""
+        class PlainView(APIView):
+            permission_classes = []
+
+            def get(self, request, *args, **kwargs):
+                return Response({'ok': True})
+
+        class ConditionalView(ConditionalGetMixin, PlainView):
+            pass
+
+        response = ConditionalView.as_view()(APIRequestFactory().get('/', HTTP_IF_NONE_MATCH='*'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'ok': True})
+        self.assertFalse(response.has_header('ETag'))
+
+    @override_settings(PRODUCT_RESPONSE_CACHE_TIMEOUT=60)
+    def test_response_cache(self):
+        """With the response cache enabled, repeated requests skip the database until a write."""
+        first = self.client.get(self.list_url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.list_url)
+        self.assertEqual(cached.content, first.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            update_inventory('SP001', 42)
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.data['results'][0]['quantity'], 42)
+
+class TaggedCacheTestCase(TestCase):
+    def setUp(self):
+        """Set up two products and a clean cache."""
+        cache.clear()
+        self.product1 = Product.objects.create(name="Blue Wireless Mouse", sku="SP001", price=29.99, quantity=5)
+        self.product2 = Product.objects.create(name="Red Gaming Keyboard", sku="SP002", price=59.99, quantity=30)
+
+    def test_invalidating_a_tag_changes_only_its_keys(self):
+        """Keys embed their tag versions, so one version bump orphans every dependent key."""
+        key1, key2 = embedding_key(self.product1), embedding_key(self.product2)
+        self.assertTrue(key1.startswith('products:embedding:SP001:'))
+        self.assertEqual(embedding_key(self.product1), key1)
+        invalidate_tags(product_tag(self.product1.pk))
+        self.assertNotEqual(embedding_key(self.product1), key1)
+        self.assertEqual(embedding_key(self.product2), key2)
+
+    def test_writes_invalidate_through_signals_and_services(self):
+        """Model saves and inventory service writes invalidate the product, catalog and insights tags."""
+        insights, catalog = insights_key(), get_catalog_version()[0]
+        key2 = embedding_key(self.product2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product1.discount_percentage = 10
+            self.product1.save()
+        self.assertNotEqual(insights_key(), insights)
+        self.assertNotEqual(get_catalog_version()[0], catalog)
+        self.assertEqual(embedding_key(self.product2), key2)
+
+        insights = insights_key()
+        with self.captureOnCommitCallbacks(execute=True):
+            list(bulk_update_inventory([{'sku': 'SP002', 'inventory_quantity': 3}]))
+        self.assertNotEqual(insights_key(), insights)
+        self.assertNotEqual(embedding_key(self.product2), key2)
+
+        insights = insights_key()
+        with self.captureOnCommitCallbacks(execute=True):
+            update_inventory('SP002', 3)
+        self.assertEqual(insights_key(), insights)
+
+TWO_TIER_CACHES = {
+    'default': {
+        'BACKEND': 'product_api.cache.TwoTierCache',
+        'LOCATION': 'two-tier-test',
+        'OPTIONS': {
+            'L2_CACHE': 'redis', 'MAX_ENTRIES': 2, 'L1_TIMEOUT': 60,
+            'L1_KEY_PREFIXES': ['products:insights:', 'products:embedding:'], 'STATS_FLUSH_EVERY': 1,
+        },
+    },
+    'redis': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'two-tier-test-l2'},
+}
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class TwoTierCacheTestCase(APITestCase):
+    def setUp(self):
+        """Start from empty L1 and L2 tiers."""
+        cache.clear()
+        self.l2 = caches['redis']
+
+    def test_version_keyed_entries_are_served_from_l1(self):
+        """Eligible keys are read from the in-process tier after the first fetch."""
+        key = insights_key()
+        cache.set(key, {'statistics': {}})
+        self.l2.delete(key)
+        self.assertEqual(cache.get(key), {'statistics': {}})
+        self.assertEqual(cache.stats()['process']['l1_hits'], 1)
+
+        # Another worker invalidating the tag changes the key, so the L1 copy is never read again
+        self.l2.set(tag_version_key(TAG_INSIGHTS), 'bumped-elsewhere', timeout=None)
+        self.assertIsNone(cache.get(insights_key()))
+
+    def test_other_keys_always_go_to_l2(self):
+        """Mutable keys such as counters and tag versions are never held in L1."""
+        cache.set('shopify_webhook_metrics_received', 1)
+        self.l2.incr('shopify_webhook_metrics_received')
+        self.assertEqual(cache.get('shopify_webhook_metrics_received'), 2)
+        self.assertEqual(cache.stats()['process']['l1_hits'], 0)
+
+    def test_l1_is_bounded_by_size_and_ttl(self):
+        """The LRU evicts the least recently used entry and expires entries after L1_TIMEOUT."""
+        for sku in ('SP001', 'SP002', 'SP003'):
+            cache.set(f'products:embedding:{sku}', sku)
+        self.assertEqual(cache.stats()['process']['l1_entries'], 2)
+        cache.get('products:embedding:SP001')
+        self.assertEqual(cache.stats()['process']['l2_hits'], 1)
+
+        with patch('product_api.cache.time.monotonic', return_value=time.monotonic() + 61):
+            cache.get('products:embedding:SP003')
+        self.assertEqual(cache.stats()['process']['l2_hits'], 2)
+
+    def test_stats_endpoint_reports_hit_ratios(self):
+        """Hit ratios per tier are exposed through the API."""
+        cache.set('products:insights:1', 'payload')
+        cache.get('products:insights:1')
+        cache.get('products:insights:missing')
+        self.client.force_authenticate(user=User.objects.create_user(username='testuser', password='testpass'))
+        response = self.client.get(reverse('products:cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['cluster']['l1_hits'], 1)
+        self.assertEqual(response.data['cluster']['l1_hit_ratio'], 50.0)
+        self.assertEqual(response.data['cluster']['l2_misses'], 1)
+
+@override_settings(CACHES=TWO_TIER_CACHES, PROFILING_ENABLED=True)
+class RequestProfilingTestCase(APITestCase):
+    def setUp(self):
+        """Set up an authenticated client and a product."""
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        Product.objects.create(name="Mouse", sku="MS-1", price=10, quantity=5)
+
+    def test_server_timing_and_log(self):
+        """Responses carry SQL, cache and render timings, which are also logged."""
+        with self.assertLogs('product_api.profiling', level='INFO') as logs:
+            response = self.client.get(reverse('products:product-list-create'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(metrics[-1], 'total')
+        for metric in ('db', 'cache', 'serialize', 'render'):
+            self.assertIn(metric, metrics)
+
+        profile = logs.records[0].request_profile
+        self.assertEqual(profile['path'], reverse('products:product-list-create'))
+        self.assertGreater(profile['db_count'], 0)
+        self.assertGreater(profile['cache_misses'], 0)
+        self.assertNotIn('profile', profile)
+
+        # The configured formatter writes the metrics into the log line
+        line = ProfileFormatter().format(logs.records[0])
+        self.assertTrue(line.startswith(f"GET {reverse('products:product-list-create')} 200 "))
+        metrics = json.loads(line[line.index('{'):])
+        for field in ('db_count', 'db_ms', 'cache_hits', 'cache_misses', 'serialize_ms', 'render_ms', 'total_ms'):
+            self.assertIn(field, metrics)
+
+    def test_detail_serialization_is_timed(self):
+        """Detail responses time their serializer too."""
+        product = Product.objects.get(sku='MS-1')
+        response = self.client.get(reverse('products:product-detail', kwargs={'pk': product.pk}))
+        self.assertIn('serialize;', response['Server-Timing'])
+
+    def test_slow_requests_are_sampled_with_cprofile(self):
+        """Sampled requests over the threshold save their cProfile stats."""
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, ignore_errors=True)
+        with override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_SLOW_REQUEST_MS=0, PROFILING_OUTPUT_DIR=output_dir):
+            with self.assertLogs('product_api.profiling', level='INFO') as logs:
+                self.client.get(reverse('products:product-list-create'))
+        path = logs.records[0].request_profile['profile']
+        self.assertEqual(os.path.dirname(path), output_dir)
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+    def test_disabled(self):
+        """Without PROFILING_ENABLED nothing is measured."""
+        with override_settings(PROFILING_ENABLED=False):
+            response = self.client.get(reverse('products:product-list-create'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class ShopifyWebhookIdempotencyTestCase(APITestCase):
+    def setUp(self):
+        """Set up a product and a clean webhook cache."""
+        cache.clear()
+        self.url = reverse('products:shopify-inventory-webhook')
+        self.product = Product.objects.create(name="Blue Wireless Mouse", sku="SP001", price=29.99, quantity=5)
+
+    def post_webhook(self, payload, webhook_id, triggered_at=None):
+        headers = {'HTTP_X_SHOPIFY_WEBHOOK_ID': webhook_id}
+        if triggered_at:
+            headers['HTTP_X_SHOPIFY_TRIGGERED_AT'] = triggered_at
+        with patch('products.views.verify_shopify_webhook', return_value=True):
+            return self.client.post(self.url, payload, format='json', **headers)
+
+    def test_duplicate_delivery_is_suppressed(self):
+        """A retried delivery with the same webhook id does not write again."""
+        payload = {'sku': 'SP001', 'inventory_quantity': 40}
+        response = self.post_webhook(payload, 'delivery-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.post_webhook(payload, 'delivery-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'Duplicate webhook ignored')
+        self.assertEqual(StockHistory.objects.filter(product=self.product).count(), 1)
+
+    def test_out_of_order_event_is_suppressed(self):
+        """An event older than the last applied one for the SKU is acknowledged and ignored."""
+        self.post_webhook({'sku': 'SP001', 'inventory_quantity': 40}, 'delivery-2', '2025-07-26T12:00:00Z')
+        with self.assertNumQueries(0):
+            response = self.post_webhook({'sku': 'SP001', 'inventory_quantity': 90}, 'delivery-1', '2025-07-26T11:00:00Z')
+        self.assertEqual(response.data['status'], 'Stale webhook ignored')
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 40)
+
+        metrics = self.client.get(reverse('products:shopify-webhook-metrics'))
+        self.assertEqual(metrics.status_code, status.HTTP_401_UNAUTHORIZED)
+        user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=user)
+        metrics = self.client.get(reverse('products:shopify-webhook-metrics'))
+        self.assertEqual(metrics.data['received'], 2)
+        self.assertEqual(metrics.data['stale'], 1)
+        self.assertEqual(metrics.data['suppression_rate'], 50.0)
+
+    def test_older_event_cannot_overwrite_newer_event_time(self):
+        """Checking and recording an event time is one compare-and-set."""
+        newer = datetime(2025, 7, 26, 12, tzinfo=dt_timezone.utc)
+        older = datetime(2025, 7, 26, 11, tzinfo=dt_timezone.utc)
+        self.assertTrue(claim_inventory_event('SP001', newer))
+        # A delivery that arrived before the newer one was recorded still loses
+        self.assertFalse(claim_inventory_event('SP001', older))
+        self.assertTrue(claim_inventory_event('SP001', newer))
+        self.assertEqual(cache.get('shopify_inventory_event_SP001'), newer.timestamp())
+
+    def test_rejected_delivery_can_be_retried(self):
+        """Deliveries answered with an error release their webhook id for Shopify's retry."""
+        response = self.post_webhook({'sku': 'MISSING', 'inventory_quantity': 5}, 'delivery-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('sku', response.data)
+        response = self.post_webhook({'sku': 'SP001', 'inventory_quantity': -1}, 'delivery-2')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        Product.objects.create(name="Red Keyboard", sku="MISSING", price=10, quantity=0)
+        response = self.post_webhook({'sku': 'MISSING', 'inventory_quantity': 5}, 'delivery-1')
+        self.assertEqual(response.data['status'], 'Inventory updated successfully')
+        response = self.post_webhook({'sku': 'SP001', 'inventory_quantity': 7}, 'delivery-2')
+        self.assertEqual(response.data['status'], 'Inventory updated successfully')
+
+class InventoryUpdateServiceTestCase(TestCase):
+    def setUp(self):
+        """Set up a product to update."""
+        self.product = Product.objects.create(name="Blue Wireless Mouse", sku="SP001", price=29.99, quantity=5)
+
+    def test_update_changes_quantity_and_records_history(self):
+        """A changed quantity is written with a single history row and no full-row save."""
+        with self.assertNumQueries(5):  # savepoint, select, update, insert, release
+            result = update_inventory('SP001', 40)
+        self.assertEqual(result, {'sku': 'SP001', 'status': 'success', 'old_quantity': 5, 'new_quantity': 40})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 40)
+        self.assertEqual(StockHistory.objects.filter(product=self.product).count(), 1)
+
+    def test_unchanged_quantity_skips_writes(self):
+        """Re-sending the current quantity writes nothing."""
+        with self.assertNumQueries(3):  # savepoint, select, release
+            result = update_inventory('SP001', 5)
+        self.assertEqual(result['status'], 'unchanged')
+        self.assertFalse(StockHistory.objects.exists())
+
+    def test_unknown_sku(self):
+        """Unknown SKUs are reported instead of raising."""
+        self.assertEqual(update_inventory('NOPE', 5)['status'], 'error')
+
+class InventoryBatchUpdateTestCase(APITestCase):
+    def setUp(self):
+        """Set up an inventory manager, a few products and a clean cache."""
+        cache.clear()
+        self.user = User.objects.create_user(username='manager', password='testpass')
+        self.user.groups.add(Group.objects.create(name='Inventory Managers'))
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('products:inventory-batch-update')
+        for i in range(20):
+            Product.objects.create(name=f"Product {i}", sku=f"SP{i:03d}", price=10, quantity=5)
+
+    def read_lines(self, response):
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_batch_update_json(self):
+        """A JSON array is applied with a constant number of queries and per-item results."""
+        items = [{'sku': f"SP{i:03d}", 'inventory_quantity': 5 if i == 0 else i + 100} for i in range(20)]
+        items += [{'sku': 'MISSING', 'inventory_quantity': 1}, {'sku': 'SP001', 'inventory_quantity': -1}]
+        with self.assertNumQueries(6):  # groups lookup (then cached), savepoint, in_bulk, bulk_update, bulk_create, release
+            response = self.client.post(self.url, items, format='json')
+            lines = self.read_lines(response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        *results, summary = lines
+        self.assertEqual(summary['summary'], {'total': 22, 'success': 19, 'unchanged': 1, 'error': 2})
+        self.assertEqual(results[20]['error'], 'Product not found')
+        self.assertIn('inventory_quantity', results[21]['error'])
+        self.assertEqual(Product.objects.get(sku='SP019').quantity, 119)
+        self.assertEqual(StockHistory.objects.count(), 19)
+
+    @override_settings(INVENTORY_BATCH_CHUNK_SIZE=2)
+    def test_batch_update_ndjson(self):
+        """An NDJSON stream is accepted, with unparsable lines reported per item and results streamed per chunk."""
+        body = b'{"sku": "SP001", "inventory_quantity": 7}\nnot json\n{"sku": "SP002", "inventory_quantity": 8}\n'
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first_chunk = [json.loads(line) for line in next(iter(response.streaming_content)).splitlines()]
+        self.assertEqual([r['status'] for r in first_chunk], ['success', 'error'])
+        self.assertEqual(Product.objects.get(sku='SP002').quantity, 5)
+        lines = self.read_lines(response)
+        self.assertEqual([r['status'] for r in lines[:-1]], ['success'])
+        self.assertEqual(lines[-1]['summary']['total'], 3)
+        self.assertEqual(Product.objects.get(sku='SP002').quantity, 8)
+
+    def test_batch_update_requires_an_inventory_manager(self):
+        """The endpoint is a JWT API, not a Shopify webhook."""
+        self.client.force_authenticate(user=None)
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+class ProductBulkTestCase(APITestCase):
+    def setUp(self):
+        """Set up an inventory manager with a profile and a few products."""
+        cache.clear()
+        self.user = User.objects.create_user(username='manager', password='testpass')
+        self.user.groups.add(Group.objects.create(name='Inventory Managers'))
+        self.profile = Profile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('products:product-bulk')
+        for i in range(3):
+            product = Product(name=f"Product {i}", sku=f"SP{i:03d}", price=Decimal('10.00'), quantity=5)
+            product.set_embedding(np.ones(4))
+            product.save()
+
+    @patch('products.tasks.generate_product_embeddings.delay')
+    def test_bulk_upsert(self, mock_delay):
+        """Products are created or updated with a constant number of queries and per-item results."""
+        items = [
+            {'name': "Product 0", 'sku': 'SP000', 'price': '10.00', 'quantity': 5},
+            {'name': "Product 1", 'sku': 'SP001', 'price': '12.50', 'quantity': 7},
+            {'name': "Renamed Product", 'sku': 'SP002', 'price': '10.00', 'quantity': 5},
+        ]
+        items += [{'name': f"New Product {i}", 'sku': f"NEW{i:03d}", 'price': '5.00'} for i in range(20)]
+        items += [{'name': "Bad", 'sku': ' ', 'price': '-1'}, {'name': "Again", 'sku': 'NEW000', 'price': '1.00'}]
+        # groups check, savepoint, existing SKUs, 2 upserts, stock history, release
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(7):
+            response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['summary'], {'total': 25, 'created': 20, 'updated': 2, 'unchanged': 1, 'error': 2}
+        )
+        self.assertEqual(response.data['results'][3]['id'], Product.objects.get(sku='NEW000').pk)
+        self.assertEqual(set(response.data['results'][23]['error']), {'sku', 'price'})
+        self.assertEqual(response.data['results'][24]['error'], {'sku': ['Duplicate SKU in this batch.']})
+
+        self.assertEqual(Product.objects.get(sku='SP001').price, Decimal('12.50'))
+        self.assertEqual(StockHistory.objects.get().quantity, 7)
+        self.assertEqual(Product.objects.get(sku='NEW005').i_profile, self.profile)
+        # Renaming clears the stale embedding; other updates keep theirs
+        self.assertIsNone(Product.objects.get(sku='SP002').embedding)
+        self.assertIsNotNone(Product.objects.get(sku='SP001').embedding)
+        mock_delay.assert_called_once()
+        renamed = Product.objects.filter(sku__in=['SP002', *(f"NEW{i:03d}" for i in range(20))])
+        self.assertCountEqual(mock_delay.call_args.args[0], renamed.values_list('id', flat=True))
+
+    def test_bulk_upsert_keeps_omitted_fields(self):
+        """Updating an existing product leaves the quantity and discount it does not send untouched."""
+        Product.objects.filter(sku='SP000').update(quantity=42, discount_percentage=Decimal('15.00'))
+        items = [
+            {'name': "Product 0", 'sku': 'SP000', 'price': '11.00'},
+            {'name': "Product 1", 'sku': 'SP001', 'price': '10.00'},
+            {'name': "Fresh", 'sku': 'NEW000', 'price': '5.00'},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, items, format='json')
+        self.assertEqual([result['status'] for result in response.data['results']], ['updated', 'unchanged', 'created'])
+        product = Product.objects.get(sku='SP000')
+        self.assertEqual(
+            (product.price, product.quantity, product.discount_percentage), (Decimal('11.00'), 42, Decimal('15.00'))
+        )
+        new = Product.objects.get(sku='NEW000')
+        self.assertEqual((new.quantity, new.discount_percentage), (0, Decimal('0.00')))
+        self.assertFalse(StockHistory.objects.exists())
+
+    @override_settings(PRODUCT_BULK_CHUNK_SIZE=2)
+    def test_bulk_upsert_rejects_duplicates_across_chunks(self):
+        """A SKU repeated in a later chunk is reported instead of overwriting the first item."""
+        items = [
+            {'name': "Product 0", 'sku': 'SP000', 'price': '11.00'},
+            {'name': "Fresh", 'sku': 'NEW000', 'price': '5.00'},
+            {'name': "Product 0", 'sku': 'SP000', 'price': '99.00'},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, items, format='json')
+        self.assertEqual([result['status'] for result in response.data['results']], ['updated', 'created', 'error'])
+        self.assertEqual(response.data['results'][2]['error'], {'sku': ['Duplicate SKU in this batch.']})
+        self.assertEqual(Product.objects.get(sku='SP000').price, Decimal('11.00'))
+
+    def test_bulk_delete(self):
+        """SKUs are deleted in one transaction per chunk, with unknown SKUs reported."""
+        StockHistory.objects.create(product=Product.objects.get(sku='SP000'), quantity=5)
+        catalog_version = get_catalog_version()[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(self.url, ['SP000', {'sku': 'SP001'}, 'MISSING'], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['summary'], {'total': 3, 'deleted': 2, 'error': 1})
+        self.assertEqual(list(Product.objects.values_list('sku', flat=True)), ['SP002'])
+        self.assertFalse(StockHistory.objects.exists())
+        self.assertNotEqual(get_catalog_version()[0], catalog_version)
+
+    def test_rejects_non_list(self):
+        """The body must be a list."""
+        response = self.client.post(self.url, {'name': "Product", 'sku': 'X', 'price': '1'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('products.tasks.get_embedding_model')
+    def test_generate_product_embeddings(self, mock_get_model):
+        """Missing embeddings are encoded in one batch and cached."""
+        mock_get_model.return_value.encode.return_value = np.array([[0.5, 0.5], [1.0, 0.0]], dtype=np.float32)
+        Product.objects.filter(sku__in=['SP001', 'SP002']).update(embedding=None)
+        ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        self.assertEqual(generate_product_embeddings(ids), {'summary': {'rows': 2}})
+        self.assertEqual(mock_get_model.return_value.encode.call_count, 1)
+        product = Product.objects.get(sku='SP002')
+        np.testing.assert_array_equal(product.get_embedding(), [1.0, 0.0])
+        self.assertEqual(cache.get(embedding_key(product)), product.embedding)
+
+class DiscountCampaignTestCase(APITestCase):
+    def setUp(self):
+        """Set up an inventory manager and products, one already discounted."""
+        cache.clear()
+        self.user = User.objects.create_user(username='manager', password='testpass')
+        self.user.groups.add(Group.objects.create(name='Inventory Managers'))
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('products:discount-campaign-list-create')
+        self.mouse = Product.objects.create(name="Wireless Mouse", sku="MS-100", price=Decimal('20.00'), quantity=5)
+        self.gaming_mouse = Product.objects.create(
+            name="Gaming Mouse", sku="MS-200", price=Decimal('60.00'), quantity=5, discount_percentage=Decimal('5.00')
+        )
+        self.keyboard = Product.objects.create(name="Keyboard", sku="KB-100", price=Decimal('40.00'), quantity=5)
+        self.now = timezone.now()
+
+    def create_campaign(self, **kwargs):
+        return DiscountCampaign.objects.create(**{
+            'name': "Mouse week", 'filters': {'name__icontains': 'mouse'}, 'discount_percentage': Decimal('20.00'),
+            'starts_at': self.now - timedelta(minutes=1), 'ends_at': self.now + timedelta(days=7), **kwargs
+        })
+
+    def discounts(self):
+        return dict(Product.objects.values_list('sku', 'discount_percentage'))
+
+    def test_campaign_lifecycle(self):
+        """A campaign starting now is applied on creation and reverted by the scheduler when it ends."""
+        data = {
+            'name': "Mouse week", 'filters': {'name__icontains': 'mouse'}, 'discount_percentage': '20.00',
+            'starts_at': self.now - timedelta(minutes=1), 'ends_at': self.now + timedelta(days=7)
+        }
+        catalog_version, _ = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        campaign = DiscountCampaign.objects.get()
+        self.assertEqual(campaign.status, DiscountCampaign.STATUS_ACTIVE)
+        self.assertEqual(campaign.product_count, 2)
+        self.assertEqual(
+            self.discounts(), {'MS-100': Decimal('20.00'), 'MS-200': Decimal('20.00'), 'KB-100': Decimal('0.00')}
+        )
+        self.assertNotEqual(get_catalog_version()[0], catalog_version)
+
+        # A discount set by hand during the campaign is kept when it ends
+        Product.objects.filter(sku='MS-100').update(discount_percentage=Decimal('30.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            summary = run_due_campaigns(self.now + timedelta(days=8))
+        self.assertEqual(summary, {'applied': 0, 'reverted': 1, 'skipped': 0, 'rows': 1})
+        self.assertEqual(
+            self.discounts(), {'MS-100': Decimal('30.00'), 'MS-200': Decimal('5.00'), 'KB-100': Decimal('0.00')}
+        )
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, DiscountCampaign.STATUS_FINISHED)
+        self.assertFalse(DiscountCampaignItem.objects.filter(campaign=campaign).exists())
+
+    @patch('products.utils.compute_trending_products')
+    def test_campaigns_invalidate_insights(self, mock_compute_trending_products):
+        """Cached insights show the campaign's discounts once it is applied and reverted."""
+        mock_compute_trending_products.side_effect = lambda products: [products.get(sku='MS-100')]
+        url = reverse('products:product-insights')
+
+        def trending_discount():
+            return self.client.get(url).data['trending_products'][0]['discount_percentage']
+
+        self.assertEqual(trending_discount(), '0.00')
+        campaign = self.create_campaign()
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_campaign(campaign)
+        self.assertEqual(trending_discount(), '20.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            revert_campaign(campaign)
+        self.assertEqual(trending_discount(), '0.00')
+
+    def test_apply_is_set_based(self):
+        """Applying a campaign costs the same few statements whatever the number of products."""
+        Product.objects.bulk_create(
+            Product(name=f"Mouse {i}", sku=f"MS-{i:04d}", price=Decimal('10.00'), quantity=1) for i in range(50)
+        )
+        campaign = self.create_campaign()
+        with self.assertNumQueries(3):  # INSERT ... SELECT, UPDATE, campaign
+            self.assertEqual(apply_campaign(campaign), 52)
+        with self.assertNumQueries(2):  # UPDATE, campaign
+            self.assertEqual(revert_campaign(campaign), 52)
+        self.assertEqual(self.discounts()['MS-200'], Decimal('5.00'))
+
+    def test_scheduling_and_overlaps(self):
+        """Future campaigns wait, missed ones are skipped and active ones are not stacked."""
+        active = self.create_campaign(filters={'sku': 'MS-200'}, discount_percentage=Decimal('50.00'))
+        later = self.create_campaign(starts_at=self.now + timedelta(days=1))
+        missed = self.create_campaign(ends_at=self.now - timedelta(seconds=1), starts_at=self.now - timedelta(days=1))
+
+        self.assertEqual(run_due_campaigns(self.now), {'applied': 1, 'reverted': 0, 'skipped': 1, 'rows': 1})
+        summary = run_due_campaigns(self.now + timedelta(days=1))
+        self.assertEqual(summary, {'applied': 1, 'reverted': 0, 'skipped': 0, 'rows': 1})
+        later.refresh_from_db()
+        missed.refresh_from_db()
+        self.assertEqual(later.product_count, 1)
+        self.assertEqual(missed.status, DiscountCampaign.STATUS_FINISHED)
+        self.assertEqual(self.discounts()['MS-200'], Decimal('50.00'))
+        self.assertEqual(self.discounts()['MS-100'], Decimal('20.00'))
+
+        # Cancelling an active campaign reverts it
+        response = self.client.delete(reverse('products:discount-campaign-detail', kwargs={'pk': active.pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.discounts()['MS-200'], Decimal('5.00'))
+
+    def test_validation(self):
+        """Filters must be known product filters and the campaign must end after it starts."""
+        data = {
+            'name': "Sale", 'filters': {'colour': 'red'}, 'discount_percentage': '10.00',
+            'starts_at': self.now, 'ends_at': self.now + timedelta(days=1)
+        }
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('filters', response.data)
+        data.update(filters={'price_max': 'cheap'})
+        self.assertEqual(self.client.post(self.url, data, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        data.update(filters={}, ends_at=self.now - timedelta(days=1))
+        response = self.client.post(self.url, data, format='json')
+        self.assertIn('ends_at', response.data)
+
+class ProductAdminTestCase(TestCase):
+    def setUp(self):
+        """Set up an admin user and products with stock history."""
+        self.admin = User.objects.create_superuser(username='admin', password='testpass')
+        self.client.force_login(self.admin)
+        for i in range(10):
+            product = Product.objects.create(name=f"Product {i}", sku=f"SP{i:03d}", price=10 + i * 30, quantity=i * 20)
+            StockHistory.objects.create(product=product, quantity=i)
+        product.set_embedding(np.ones(4))
+        product.save()
+
+    def changelist(self, model, **params):
+        return self.client.get(reverse(f'admin:products_{model}_changelist'), params)
+
+    def test_changelists_use_a_constant_number_of_queries(self):
+        """Related objects are joined, so adding rows adds no queries."""
+        for model in ('product', 'stockhistory'):
+            with CaptureQueriesContext(connection) as before:
+                self.assertEqual(self.changelist(model).status_code, 200)
+            Product.objects.bulk_create(
+                Product(name=f"Extra {model} {i}", sku=f"EX-{model[:2]}{i}", price=1, quantity=1) for i in range(5)
+            )
+            StockHistory.objects.bulk_create(StockHistory(product=Product.objects.first(), quantity=i) for i in range(5))
+            with CaptureQueriesContext(connection) as after:
+                self.changelist(model)
+            self.assertEqual(len(after), len(before))
+
+    def test_product_filters_and_search(self):
+        """Range filters, the embedding flag and full-text search narrow the list."""
+        response = self.changelist('product', quantity_range='high', price_range='50-200')
+        self.assertEqual([p.sku for p in response.context['cl'].result_list], ['SP006', 'SP005'])
+        response = self.changelist('product', has_embedding='yes')
+        self.assertEqual([p.sku for p in response.context['cl'].result_list], ['SP009'])
+        self.assertContains(response, 'icon-yes.svg')
+        response = self.changelist('product', q='sp00')
+        self.assertEqual(response.context['cl'].result_count, 10)
+
+    def test_price_actions_invalidate_cached_data(self):
+        """Admin price changes bump last_updated and invalidate the products' cached data."""
+        product = Product.objects.get(sku='SP001')
+        Product.objects.filter(pk=product.pk).update(last_updated=timezone.now() - timedelta(days=1))
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('admin:products_product_changelist'),
+                {'action': 'increase_price_10_percent', '_selected_action': [product.pk]}
+            )
+        self.assertEqual(response.status_code, 302)
+        product.refresh_from_db()
+        self.assertEqual(product.price, Decimal('44.00'))
+        self.assertGreater(product.last_updated, timezone.now() - timedelta(minutes=1))
+        self.assertNotEqual(get_catalog_version()[0], version[0])
+
+    @override_settings(ADMIN_PRODUCT_INVALIDATION_THRESHOLD=3)
+    def test_price_actions_on_large_selections_invalidate_the_catalog(self):
+        """Selections over the threshold bump the catalog and insights, not one tag per product."""
+        pks = list(Product.objects.values_list('pk', flat=True)[:5])
+        versions = get_tag_versions([TAG_INSIGHTS, product_tag(pks[0])])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('admin:products_product_changelist'),
+                {'action': 'decrease_price_10_percent', '_selected_action': pks}
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Product.objects.get(sku='SP001').price, Decimal('36.00'))
+        self.assertEqual(Product.objects.get(sku='SP009').price, Decimal('280.00'))
+        self.assertNotEqual(get_tag_versions([TAG_INSIGHTS])[TAG_INSIGHTS], versions[TAG_INSIGHTS])
+        self.assertEqual(get_tag_versions([product_tag(pks[0])]), {product_tag(pks[0]): versions[product_tag(pks[0])]})
+
+    def test_estimated_count_paginator(self):
+        """Unfiltered listings use the row estimate once it passes the threshold."""
+        with patch.object(EstimatedCountPaginator, 'estimate_rows', return_value=2_000_000):
+            self.assertEqual(EstimatedCountPaginator(Product.objects.all(), 25).count, 2_000_000)
+            self.assertEqual(EstimatedCountPaginator(Product.objects.filter(quantity__gte=100), 25).count, 5)
+        with patch.object(EstimatedCountPaginator, 'estimate_rows', return_value=50):
+            self.assertEqual(EstimatedCountPaginator(Product.objects.all(), 25).count, 10)
+        self.assertIsNone(EstimatedCountPaginator.estimate_rows(Product._meta.db_table, 'default'))
+
+class SeedAndBenchmarkSuiteTestCase(TransactionTestCase):
+    def setUp(self):
+        """Keep import artifacts in temporary directories."""
+        cache.clear()
+        artifact_dir, fingerprint_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, artifact_dir, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, fingerprint_dir, ignore_errors=True)
+        artifact_settings = override_settings(
+            INVENTORY_ARTIFACT_DIR=artifact_dir, INVENTORY_FINGERPRINT_DIR=fingerprint_dir
+        )
+        artifact_settings.enable()
+        self.addCleanup(artifact_settings.disable)
+
+    def test_seed_products(self):
+        """Seeding creates products with name embeddings and history spread over past days."""
+        out = StringIO()
+        call_command('seed_products', products=25, history=60, batch_size=10, stdout=out)
+        self.assertIn('Created 25 products and 60 stock history rows', out.getvalue())
+        products = Product.objects.filter(sku__startswith='SEED')
+        self.assertEqual(products.count(), 25)
+        product = products.first()
+        np.testing.assert_array_equal(product.get_embedding(), fake_embedding(product.name))
+        self.assertEqual(len(product.get_embedding()), EMBEDDING_DIMENSIONS)
+        self.assertEqual(StockHistory.objects.filter(product__in=products).count(), 60)
+        self.assertLess(
+            StockHistory.objects.order_by('timestamp').first().timestamp, timezone.now() - timedelta(days=1)
+        )
+
+        # Later runs continue the SKU sequence
+        seed_products(5, embeddings=False)
+        self.assertTrue(Product.objects.filter(sku='SEED00000029', embedding__isnull=True).exists())
+
+    @override_settings(DEBUG=True)
+    def test_benchmark_suite(self):
+        """The suite reports percentiles, queries and memory per scenario and deletes its committed data."""
+        results = run_benchmark_suite(
+            sizes=[30], scenarios=['list', 'search', 'webhook', 'nightly_import'], repeat=3, pipeline_repeat=2
+        )
+        self.assertEqual(Product.objects.count(), 0)
+        self.assertEqual(StockHistory.objects.count(), 0)
+        self.assertEqual(InventoryImportRun.objects.count(), 0)
+        self.assertFalse(User.objects.filter(username='benchmark-suite-user').exists())
+
+        # The deletion is committed and invalidated, so no cached page lists the seeded catalog
+        self.client.force_login(User.objects.create_user(username='testuser'))
+        with override_settings(PRODUCT_RESPONSE_CACHE_TIMEOUT=60):
+            run_benchmark_suite(sizes=[5], scenarios=['list'], repeat=1)
+            response = self.client.get(reverse('products:product-list-create'))
+        self.assertEqual(response.data['results'], [])
+        for name in ('list', 'search', 'webhook', 'nightly_import'):
+            result = results['results']['30'][name]
+            self.assertNotIn('error', result)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['peak_memory'], 0)
+        self.assertEqual(results['database'], connection.vendor)
+
+        comparison = compare_results(results, json.loads(json.dumps(results)))
+        self.assertEqual({row['scenario'] for row in comparison}, {'list', 'search', 'webhook', 'nightly_import'})
+        self.assertTrue(all(row['ratio'] == 1 for row in comparison))
+
+    def test_benchmark_suite_refuses_shared_databases(self):
+        """Without DEBUG the suite only runs against a dedicated database alias."""
+        with self.assertRaisesMessage(CommandError, 'enable DEBUG'):
+            call_command('benchmark_suite', sizes='10', scenarios='list')
+        with self.assertRaisesMessage(ValueError, "Unknown database alias 'bench'"):
+            run_benchmark_suite(sizes=[10], scenarios=['list'], database='bench')
+        self.assertEqual(Product.objects.count(), 0)
+
+    @override_settings(DEBUG=True)
+    def test_benchmark_suite_command(self):
+        """Results are written as JSON and failing scenarios are reported, not raised."""
+        output = os.path.join(settings.INVENTORY_ARTIFACT_DIR, 'results.json')
+        out = StringIO()
+        with patch('products.tasks.get_embedding_model', side_effect=OSError('model unavailable')):
+            call_command(
+                'benchmark_suite', sizes='20', scenarios='list,generate_embeddings', repeat=2,
+                pipeline_repeat=1, embedding_rows=5, output=output, stdout=out
+            )
+        with open(output) as file:
+            results = json.load(file)
+        self.assertIn('p95_ms', results['results']['20']['list'])
+        self.assertEqual(results['results']['20']['generate_embeddings'], {'error': 'OSError: model unavailable'})
+        self.assertIn('OSError: model unavailable', out.getvalue())
+
+
 class CeleryTaskTestCase(TestCase):
     def setUp(self):
         """Set up test data for Celery tasks."""
+        artifact_dir, fingerprint_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, artifact_dir, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, fingerprint_dir, ignore_errors=True)
+        artifact_settings = override_settings(
+            INVENTORY_ARTIFACT_DIR=artifact_dir, INVENTORY_FINGERPRINT_DIR=fingerprint_dir
+        )
+        artifact_settings.enable()
+        self.addCleanup(artifact_settings.disable)
         self.user = User.objects.create_user(username='testuser', password='testpass')
         self.profile = Profile.objects.create(user=self.user)
         self.product1 = Product.objects.create(
@@ -236,24 +1268,189 @@ class CeleryTaskTestCase(TestCase):
             timestamp=timezone.now()
         )
 
-    @patch('products.tasks.send_mail')
-    def test_nightly_inventory_update(self, mock_send_mail):
+    def test_nightly_inventory_update(self):
         """Test nightly inventory update Celery task."""
-        csv_content = "sku,inventory_quantity\nSP001,100\nSP002,50\n"
-        nightly_inventory_update(csv_content)
+        feed_path = self.write_feed("sku,inventory_quantity\nSP001,100\nSP002,50\n")
+        nightly_inventory_update(feed_path)
         self.product1.refresh_from_db()
         self.product2.refresh_from_db()
         self.assertEqual(self.product1.quantity, 100)
         self.assertEqual(self.product2.quantity, 50)
         self.assertEqual(StockHistory.objects.filter(product=self.product1).count(), 3)
-        self.assertTrue(mock_send_mail.called)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def write_feed(self, content):
+        """Write a CSV feed to a temporary file and return its path."""
+        feed = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        feed.write(content)
+        feed.close()
+        self.addCleanup(os.remove, feed.name)
+        return feed.name
+
+    @override_settings(INVENTORY_IMPORT_CHUNK_SIZE=2)
+    def test_nightly_inventory_update_chunks(self):
+        """The feed is split into byte-range chunks and every row is reported once."""
+        feed_path = self.write_feed("sku,inventory_quantity\nSP001,100\nSP002,50\nSP003,1\nSP001,7\nSP002,-1\n")
+        self.assertEqual(len(fingerprint_feed(feed_path, 2)[1]), 3)
+        nightly_inventory_update(feed_path)
+        self.product1.refresh_from_db()
+        self.assertEqual(self.product1.quantity, 7)
+
+        email = mail.outbox[0]
+        self.assertIn('Rows processed: 5', email.body)
+        self.assertIn('Updated: 3', email.body)
+        self.assertIn('Not found: 1', email.body)
+        self.assertIn('Invalid: 1', email.body)
+        self.assertIn('Net quantity change: +22', email.body)
+        filename, content, _ = email.attachments[0]
+        self.assertEqual(filename, 'inventory-report.csv.gz')
+        rows = list(csv.reader(gzip.decompress(content).decode('utf-8').splitlines()))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[3][:2], ['SP003', 'error'])
+        self.assertEqual(os.listdir(settings.INVENTORY_ARTIFACT_DIR), [])
+
+    @override_settings(INVENTORY_IMPORT_CHUNK_SIZE=2)
+    def test_nightly_inventory_update_applies_only_changes(self):
+        """A re-run skips unchanged chunks and rows but retries rows that failed."""
+        feed_path = self.write_feed("sku,inventory_quantity\nSP001,100\nSP002,50\nSP003,1\nSP001,7\nSP002,60\n")
+        nightly_inventory_update(feed_path)
+        self.assertEqual(InventoryImportRun.objects.get().status, InventoryImportRun.STATUS_COMPLETED)
+
+        with open(feed_path, 'w') as f:
+            f.write("sku,inventory_quantity\nSP001,100\nSP002,50\nSP003,1\nSP001,7\nSP002,61\n")
+        Product.objects.create(name="USB-C Cable", sku="SP003", price=9.99, quantity=0)
+        nightly_inventory_update(feed_path)
+
+        run = InventoryImportRun.objects.first()
+        self.assertEqual(run.status, InventoryImportRun.STATUS_COMPLETED)
+        self.assertEqual(
+            list(run.chunks.values_list('status', flat=True)),
+            [InventoryImportChunk.STATUS_SKIPPED, InventoryImportChunk.STATUS_COMPLETED, InventoryImportChunk.STATUS_COMPLETED]
+        )
+        self.assertIn('Rows processed: 2', mail.outbox[1].body)  # SP003 retried, SP002 changed
+        self.assertIn('Skipped (unchanged since last run): 3', mail.outbox[1].body)
+        self.assertEqual(Product.objects.get(sku='SP003').quantity, 1)
+        self.assertEqual(Product.objects.get(sku='SP002').quantity, 61)
+
+    def test_nightly_inventory_update_resumes_crashed_run(self):
+        """Chunks completed by a crashed run of the same feed are not repeated."""
+        feed_path = self.write_feed("sku,inventory_quantity\nSP001,100\nSP002,50\n")
+        feed_fingerprint, chunks, _ = fingerprint_feed(feed_path, 1)
+        crashed = InventoryImportRun.objects.create(
+            source=feed_path, feed_fingerprint=feed_fingerprint, status=InventoryImportRun.STATUS_FAILED
+        )
+        InventoryImportChunk.objects.create(run=crashed, status=InventoryImportChunk.STATUS_COMPLETED, **chunks[0])
+        InventoryImportChunk.objects.create(run=crashed, **chunks[1])
+
+        with override_settings(INVENTORY_IMPORT_CHUNK_SIZE=1):
+            nightly_inventory_update(feed_path)
+        crashed.refresh_from_db()
+        self.assertEqual(crashed.status, InventoryImportRun.STATUS_COMPLETED)
+        self.product1.refresh_from_db()
+        self.product2.refresh_from_db()
+        self.assertEqual(self.product1.quantity, 5)
+        self.assertEqual(self.product2.quantity, 50)
+
+    @override_settings(INVENTORY_IMPORT_CHUNK_SIZE=1)
+    def test_resumed_run_retries_rows_failed_before_the_crash(self):
+        """Rows that failed in chunks checkpointed by a crashed attempt are retried by the next run."""
+        feed_path = self.write_feed("sku,inventory_quantity\nSP003,4\nSP001,100\n")
+        run, _ = start_inventory_run(feed_path, feed_path)
+        chunks = list(run.chunks.all())
+        run_dir = create_run_dir()
+        checkpoint_inventory_chunk(
+            validate_and_update_inventory(import_product_data(feed_path, chunks[0].start, chunks[0].end, run_dir)),
+            chunks[0].pk
+        )
+        # The second chunk crashes: the run fails and its artifacts are deleted
+        cleanup_inventory_run(run_dir=run_dir, run_id=run.pk)
+        self.assertTrue(os.path.exists(InventoryImportChunk.objects.get(pk=chunks[0].pk).failed_fingerprints))
+
+        nightly_inventory_update(feed_path)
+        run.refresh_from_db()
+        self.assertEqual(run.status, InventoryImportRun.STATUS_COMPLETED)
+        self.assertFalse(run.chunks.exclude(failed_fingerprints='').exists())
+
+        # SP003 now exists; the unchanged feed must retry it rather than skip it
+        Product.objects.create(name="USB-C Cable", sku="SP003", price=9.99, quantity=0)
+        nightly_inventory_update(feed_path)
+        self.assertEqual(Product.objects.get(sku='SP003').quantity, 4)
+
+    @override_settings(INVENTORY_BATCH_CHUNK_SIZE=100, TASK_METRICS_ENABLED=False)
+    def test_validate_and_update_inventory_bulk(self):
+        """Rows are applied set-based: query count does not grow with the number of rows."""
+        Product.objects.bulk_create(
+            Product(name=f"Product {i}", sku=f"BULK{i:03d}", price=10, quantity=1) for i in range(100)
+        )
+        rows = [{'sku': 'SP001', 'inventory_quantity': 'many'}]
+        rows += [{'sku': f"BULK{i:03d}", 'inventory_quantity': str(i)} for i in range(100)]
+        run_dir = create_run_dir()
+        self.addCleanup(cleanup_run, run_dir)
+        with self.assertNumQueries(10):  # two chunks of savepoint, in_bulk, bulk_update, bulk_create, release
+            results_ref = validate_and_update_inventory(write_artifact(run_dir, 'rows-0', rows))
+        self.assertEqual(results_ref['summary'], {'rows': 101, 'success': 99, 'unchanged': 1, 'error': 1, 'skipped': 0})
+        results = list(read_artifact(results_ref))
+        self.assertEqual(len(results), 101)
+        self.assertEqual(results[0]['error'], {'inventory_quantity': ['A valid integer is required.']})
+        self.assertEqual(results[2]['status'], 'unchanged')
+        self.assertEqual(Product.objects.get(sku='BULK099').quantity, 99)
+        self.assertEqual(StockHistory.objects.filter(product__sku__startswith='BULK').count(), 99)
+
+    def test_nightly_inventory_update_records_metrics(self):
+        """Each task and pipeline stage is recorded, with stages grouped under their task's run."""
+        feed_path = self.write_feed("sku,inventory_quantity\nSP001,100\nSP002,50\n")
+        result = nightly_inventory_update.delay(feed_path)
+
+        tasks = TaskMetric.objects.filter(kind=TaskMetric.KIND_TASK)
+        self.assertEqual(
+            set(tasks.values_list('name', flat=True)),
+            {
+                'products.tasks.nightly_inventory_update', 'products.tasks.import_product_data',
+                'products.tasks.validate_and_update_inventory', 'products.tasks.checkpoint_inventory_chunk',
+                'products.tasks.generate_and_email_report'
+            }
+        )
+        self.assertEqual(tasks.get(name='products.tasks.nightly_inventory_update').run_id, result.id)
+        self.assertTrue(TaskMetric.objects.filter(run_id=result.id, name='fingerprint_feed').exists())
+        db_write = TaskMetric.objects.get(name='db_write')
+        self.assertEqual(db_write.run_id, tasks.get(name='products.tasks.validate_and_update_inventory').run_id)
+        self.assertEqual(db_write.rows, 2)
+        self.assertGreater(db_write.query_count, 0)
+        # Memory is only traced when asked for, as tracing slows the tasks down
+        self.assertEqual(db_write.peak_memory, 0)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertTrue(TaskMetric.objects.filter(name='send_email', status='SUCCESS').exists())
+
+        out = StringIO()
+        call_command('task_metrics', run_id=result.id, stdout=out)
+        self.assertIn(f'Run {result.id}', out.getvalue())
+        self.assertIn('fingerprint_feed', out.getvalue())
+        self.assertIn('Trends over the last', out.getvalue())
+
+    @override_settings(TASK_METRICS_TRACE_MEMORY=True)
+    def test_task_metrics_measure_each_level_separately(self):
+        """A task's queries leave out its stages' metric records; memory peaks are per stage."""
+        task = StageTimer('outer', TaskMetric.KIND_TASK, run_id='run').start()
+        with instrument_stage('allocating'):
+            buffer = bytearray(8 * 2 ** 20)
+            del buffer
+        with instrument_stage('querying'):
+            Product.objects.count()
+        task.stop('SUCCESS')
+
+        metrics = {metric.name: metric for metric in TaskMetric.objects.all()}
+        self.assertEqual(metrics['outer'].query_count, 1)
+        self.assertEqual(metrics['querying'].query_count, 1)
+        self.assertGreaterEqual(metrics['allocating'].peak_memory, 8 * 2 ** 20)
+        self.assertGreaterEqual(metrics['outer'].peak_memory, 8 * 2 ** 20)
+        self.assertLess(metrics['querying'].peak_memory, 2 ** 20)
 
     @patch('products.utils.compute_trending_products')
     def test_update_trending_products(self, mock_compute_trending_products):
         """Test trending products update Celery task."""
         mock_compute_trending_products.return_value = [self.product1]
         update_trending_products()
-        trending_products = cache.get('trending_products')
+        trending_products = cache.get(trending_products_key())
         self.assertIsNotNone(trending_products)
         self.assertEqual(len(trending_products), 1)
         self.assertEqual(trending_products[0]['sku'], 'SP001')
\ No newline at end of file
@@ -1,17 +1,25 @@
 from django.urls import path
-from .views import ProductDiscountView, ProductInsightsView, ProductListCreateView, ProductDetailView, ProductSearchView, ShopifyInventoryWebhookView
+from .views import CacheStatsView, DiscountCampaignDetailView, DiscountCampaignListCreateView, InventoryBatchUpdateView, ProductDiscountView, ProductInsightsView, ProductListCreateView, ProductBulkView, ProductDetailView, ProductExportView, ProductSearchView, ShopifyInventoryWebhookView, ShopifyWebhookMetricsView
 
 app_name = 'products'
 
 urlpatterns = [
     path('products/', ProductListCreateView.as_view(), name='product-list-create'),
+    path('products/bulk/', ProductBulkView.as_view(), name='product-bulk'),
+    path('products/export/', ProductExportView.as_view(), name='product-export'),
+    path('products/inventory/batch/', InventoryBatchUpdateView.as_view(), name='inventory-batch-update'),
     path('products/<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
     path('products/<int:pk>/discount/', ProductDiscountView.as_view(), name='product-discount'),
+    path('discount-campaigns/', DiscountCampaignListCreateView.as_view(), name='discount-campaign-list-create'),
+    path('discount-campaigns/<int:pk>/', DiscountCampaignDetailView.as_view(), name='discount-campaign-detail'),
     
     path('webhooks/shopify/inventory/', ShopifyInventoryWebhookView.as_view(), name='shopify-inventory-webhook'),
+    path('webhooks/shopify/metrics/', ShopifyWebhookMetricsView.as_view(), name='shopify-webhook-metrics'),
     
     path('products/search/', ProductSearchView.as_view(), name='product-search'),
     path('products/insights/', ProductInsightsView.as_view(), name='product-insights'),
 
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+
 ]
     
\ No newline at end of file
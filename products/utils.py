@@ -1,16 +1,24 @@
-from typing import List, Tuple, Optional
+import threading
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional
+from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_datetime
+from datetime import datetime, timedelta
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
 from decouple import config
+from django_redis.cache import RedisCache
 import hmac
 import hashlib
 import base64
+from product_api.profiling import timed
+from .caching import embedding_key
 from .models import Product
+from .serializers import ProductReadSerializer
 
 def verify_shopify_webhook(data: bytes, hmac_header: str) -> bool:
     """
@@ -32,6 +40,129 @@ def verify_shopify_webhook(data: bytes, hmac_header: str) -> bool:
     computed_hmac = base64.b64encode(digest).decode('utf-8')
     return hmac.compare_digest(computed_hmac, hmac_header)
 
+def claim_shopify_webhook(webhook_id: str) -> bool:
+    """
+    Record a Shopify webhook delivery id so retries of the same delivery can be suppressed.
+
+    Args:
+        webhook_id (str): Value of the X-Shopify-Webhook-Id header.
+
+    Returns:
+        bool: True if this is the first delivery with this id, False if it was already seen.
+    """
+    if not webhook_id:
+        return True
+    return cache.add(f"shopify_webhook_{webhook_id}", 1, timeout=settings.SHOPIFY_WEBHOOK_DEDUP_TTL)
+
+def release_shopify_webhook(webhook_id: str) -> None:
+    """Forget a claimed webhook id so that Shopify's retry is processed again."""
+    if webhook_id:
+        cache.delete(f"shopify_webhook_{webhook_id}")
+
+def parse_shopify_event_time(request) -> Optional[datetime]:
+    """
+    Extract the time a Shopify inventory event was triggered.
+
+    Args:
+        request (Request): The incoming webhook request.
+
+    Returns:
+        Optional[datetime]: The payload's `updated_at`, falling back to the
+        X-Shopify-Triggered-At header, or None if neither can be parsed.
+    """
+    for value in (request.data.get('updated_at'), request.META.get('HTTP_X_SHOPIFY_TRIGGERED_AT')):
+        if isinstance(value, str):
+            try:
+                event_time = parse_datetime(value)
+            except ValueError:
+                event_time = None
+            if event_time is not None:
+                if timezone.is_naive(event_time):
+                    event_time = timezone.make_aware(event_time)
+                return event_time
+    return None
+
+# Stores ARGV[1] unless the key holds a later time, refreshing the TTL; returns 1 if stored
+INVENTORY_EVENT_SCRIPT = """
+local last = redis.call('GET', KEYS[1])
+if last and tonumber(last) > tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+# Serializes the fallback compare-and-set of caches local to this process
+_inventory_event_lock = threading.Lock()
+
+def claim_inventory_event(sku: str, event_time: Optional[datetime]) -> bool:
+    """
+    Record an inventory event as the latest seen for a SKU, unless a later one was.
+
+    The trigger time is kept in one cache key per SKU expiring after
+    SHOPIFY_WEBHOOK_DEDUP_TTL. On Redis the comparison and the write are one Lua
+    script, so of two concurrent out-of-order deliveries the older one cannot
+    pass or overwrite the newer time. Other caches, used in development and
+    tests, are only shared within a process and are compared under a lock.
+    Events at the same time are both accepted, so a retried delivery goes through.
+
+    Args:
+        sku (str): The product SKU.
+        event_time (Optional[datetime]): When the incoming event was triggered.
+
+    Returns:
+        bool: False if a later event has already been seen for this SKU.
+    """
+    if event_time is None:
+        return True
+    key = f"shopify_inventory_event_{sku}"
+    timestamp = event_time.timestamp()
+    shared = getattr(cache, 'l2', cache)
+    if isinstance(shared, RedisCache):
+        client = shared.client
+        stored = client.get_client(write=True).eval(
+            INVENTORY_EVENT_SCRIPT, 1, str(client.make_key(key)), repr(timestamp), settings.SHOPIFY_WEBHOOK_DEDUP_TTL
+        )
+        return bool(stored)
+    with _inventory_event_lock:
+        last_seen = cache.get(key)
+        if last_seen is not None and last_seen > timestamp:
+            return False
+        cache.set(key, timestamp, timeout=settings.SHOPIFY_WEBHOOK_DEDUP_TTL)
+        return True
+
+def record_webhook_metric(name: str) -> None:
+    """
+    Increment a Shopify webhook counter.
+
+    Args:
+        name (str): One of 'received', 'processed', 'duplicate' or 'stale'.
+    """
+    cache_key = f"shopify_webhook_metrics_{name}"
+    try:
+        cache.incr(cache_key)
+    except ValueError:
+        if not cache.add(cache_key, 1, timeout=None):
+            cache.incr(cache_key)
+
+def get_webhook_metrics() -> Dict[str, float]:
+    """
+    Return Shopify webhook counters and the share of deliveries that were suppressed.
+
+    Returns:
+        Dict[str, float]: Counts per outcome plus `suppression_rate` as a percentage.
+    """
+    names = ['received', 'processed', 'duplicate', 'stale']
+    values = cache.get_many([f"shopify_webhook_metrics_{name}" for name in names])
+    metrics = {name: values.get(f"shopify_webhook_metrics_{name}", 0) for name in names}
+    suppressed = metrics['duplicate'] + metrics['stale']
+    metrics['suppression_rate'] = round(suppressed / metrics['received'] * 100, 2) if metrics['received'] else 0
+    return metrics
+
+@lru_cache(maxsize=1)
+def get_embedding_model() -> SentenceTransformer:
+    """Return the Sentence-Transformer model, loaded once per process."""
+    return SentenceTransformer('all-MiniLM-L6-v2')
+
 def generate_product_embedding(product: Product, model: SentenceTransformer) -> np.ndarray:
     """
     Generate or retrieve a product's embedding, caching the result.
@@ -43,16 +174,18 @@ def generate_product_embedding(product: Product, model: SentenceTransformer) ->
     Returns:
         np.ndarray: The product's embedding.
     """
-    cache_key = f"product_embedding_{product.sku}"
+    cache_key = embedding_key(product)
     cached_embedding = cache.get(cache_key)
     if cached_embedding:
         return np.frombuffer(cached_embedding, dtype=np.float32)
 
     product_embedding = product.get_embedding()
     if product_embedding is None:
-        product_embedding = model.encode(product.name)
+        with timed('encode'):
+            product_embedding = model.encode(product.name)
         product.set_embedding(product_embedding)
-        product.save()
+        # Only the embedding column changes, which no cached response shows
+        Product.objects.filter(pk=product.pk).update(embedding=product.embedding)
         cache.set(cache_key, product_embedding.tobytes(), timeout=None)
     
     return product_embedding
@@ -72,8 +205,9 @@ def compute_similarity(query: str, products: List[Product], threshold: float = 0
     if not query:
         return products
 
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    query_embedding = model.encode(query)
+    model = get_embedding_model()
+    with timed('encode'):
+        query_embedding = model.encode(query)
     results = []
 
     for product in products:
@@ -87,6 +221,7 @@ def compute_similarity(query: str, products: List[Product], threshold: float = 0
     results.sort(key=lambda x: x[1], reverse=True)
     return [product for product, _ in results]
 
+@timed('trending')
 def compute_trending_products(products: List[Product], days: int = 7, threshold: float = -20) -> List[Product]:
     """
     Identify trending products based on stock changes over a given period.
@@ -139,4 +274,16 @@ def compute_trending_products(products: List[Product], days: int = 7, threshold:
     trending_cluster = max(cluster_changes, key=lambda c: -sum(t['percentage_change'] for t in c) if c else 0)
     trending_products = [t['product'] for t in trending_cluster if t['percentage_change'] < threshold]
     
-    return trending_products[:5]
\ No newline at end of file
+    return trending_products[:5]
+
+def get_trending_products() -> List[Dict]:
+    """
+    Compute the trending products and serialize them for the insights response.
+
+    Returns:
+        List[Dict]: Serialized trending products.
+    """
+    products = Product.objects.defer('embedding').prefetch_related('stock_history')
+    trending_products = compute_trending_products(products)
+    with timed('serialize'):
+        return ProductReadSerializer(trending_products, many=True).data
@@ -1,48 +1,203 @@
-from typing import List
+import re
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.filters import SearchFilter
+from rest_framework.parsers import JSONParser
 from django_filters.rest_framework import DjangoFilterBackend
+from product_api.profiling import timed
 
-from .models import Product, StockHistory
-from .serializers import ProductDiscountSerializer, ProductSerializer, ShopifyWebhookSerializer
-from .filters import ProductFilter
+from .caching import cache_response, get_cached_response, get_catalog_version, insights_key, make_etag, trending_products_key
+from .campaigns import revert_campaign
+from .models import DiscountCampaign, Product
+from .serializers import DiscountCampaignSerializer, ProductDiscountSerializer, ProductReadSerializer, ProductSerializer, ShopifyWebhookSerializer
+from .filters import ProductFilter, ProductSearchFilter
+from .exports import EXPORT_FORMATS, export_products, iter_ndjson_lines, parse_export_fields
+from .pagination import ProductCursorPagination
 from .permissions import IsInventoryManager
+from .parsers import NDJSONParser
+from .services import bulk_delete_products, bulk_update_inventory, bulk_upsert_products, update_inventory
+from .tasks import run_discount_campaigns
 from django.core.cache import cache
-from .utils import verify_shopify_webhook, compute_similarity, compute_trending_products
+from django.db import transaction
+from django.utils import timezone
+from .utils import (
+    verify_shopify_webhook, compute_similarity, claim_shopify_webhook,
+    release_shopify_webhook, parse_shopify_event_time, claim_inventory_event,
+    record_webhook_metric, get_webhook_metrics, get_trending_products
+)
 
 
 
-class ProductListCreateView(generics.ListCreateAPIView):
+class ConditionalGetMixin:
+    """
+    Adds ETag and Last-Modified validators to GET responses.
+    Requests whose validators still match get 304 Not Modified before any
+    serialization, and the optional response cache is keyed by the ETag.
+    """
+
+    def get_validators(self, request, *args, **kwargs) -> Tuple[Optional[str], Optional[datetime]]:
+        """
+        Return the ETag and last modification time of the resource, or (None, None) if unknown.
+        The default knows neither, so responses are served without validators.
+        """
+        return None, None
+
+    def get(self, request, *args, **kwargs) -> Response:
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        if etag is None:
+            return super().get(request, *args, **kwargs)
+
+        etag = quote_etag(etag)
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            data = get_cached_response(etag)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = super().get(request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache_response(etag, response.data)
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ProductListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     """
     API endpoint for listing and creating products.
-    Supports filtering and searching.
+    Supports filtering and full-text search on name and SKU.
+    Results are cursor-paginated on `(name, id)`, or on `(-search_rank, id)` when searching.
+    Listing reads plain rows with the discounted price computed in SQL.
     """
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     # permission_classes = [IsInventoryManager]
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    pagination_class = ProductCursorPagination
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter]
     filterset_class = ProductFilter
-    search_fields = ['name', 'sku']  # Fields to search on
+    search_fields = ['name', 'sku']  # Fields indexed by the search backend
+
+    def get_queryset(self):
+        """Return row dicts for listing and model instances for creation."""
+        if self.request.method == 'GET':
+            return Product.objects.as_rows()
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        """Use the lightweight read-only serializer for listing."""
+        if self.request.method == 'GET':
+            return ProductReadSerializer
+        return super().get_serializer_class()
+
+    def get_keyset_ordering(self) -> Tuple[str, ...]:
+        """Page search results by rank and everything else by name."""
+        if ProductSearchFilter().is_searching(self.request):
+            return ('-search_rank', 'id')
+        return ('name', 'id')
+
+    def get_validators(self, request, *args, **kwargs) -> Tuple[Optional[str], Optional[datetime]]:
+        """Derive the list's validators from the catalog version and the full query string."""
+        version, last_modified = get_catalog_version()
+        etag = make_etag('product-list', version, request.get_full_path(), request.accepted_renderer.format)
+        return etag, last_modified
+
+    def list(self, request, *args, **kwargs) -> Response:
+        """List a page of products, timing their serialization."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        with timed('serialize'):
+            data = self.get_serializer(page, many=True).data
+        return self.get_paginated_response(data)
 
     def perform_create(self, serializer: ProductSerializer) -> None:
         """Set the created_by field to the authenticated user's profile."""
         serializer.save(i_profile=self.request.user.profile)
 
-class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProductExportView(generics.GenericAPIView):
+    """
+    API endpoint streaming the catalog as NDJSON (`?output=ndjson`, default) or CSV (`?output=csv`).
+    `?fields=sku,quantity` selects columns, the list filters apply, and the
+    response is gzipped when the client accepts it. Rows are streamed in id
+    order, so memory use does not grow with the catalog.
+    """
+    queryset = Product.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ProductFilter
+    # permission_classes = [IsInventoryManager]
+    content_types = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+    accepts_gzip = re.compile(r'\bgzip\b')
+
+    def get(self, request, *args, **kwargs):
+        """Stream the filtered products in the requested format."""
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"Unknown output '{output}'. Available: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            fields = parse_export_fields(request.query_params.get('fields', ''))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        compress = bool(self.accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            export_products(queryset, output, fields, settings.PRODUCT_EXPORT_CHUNK_SIZE, compress=compress),
+            content_type=self.content_types[output]
+        )
+        response['Content-Disposition'] = f'attachment; filename="products.{output}"'
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class ProductDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint for retrieving, updating, and deleting a single product.
+    Supports conditional GET on the product's `last_updated`.
     """
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     # permission_classes = [IsInventoryManager]
 
+    def get_validators(self, request, *args, **kwargs) -> Tuple[Optional[str], Optional[datetime]]:
+        """Derive the product's validators from its `last_updated`, without loading the row."""
+        last_updated = (
+            self.get_queryset().filter(pk=kwargs['pk']).values_list('last_updated', flat=True).first()
+        )
+        if last_updated is None:
+            return None, None
+        etag = make_etag('product-detail', kwargs['pk'], last_updated.isoformat(), request.accepted_renderer.format)
+        return etag, last_updated
+
+    def retrieve(self, request, *args, **kwargs) -> Response:
+        """Return the product, timing its serialization."""
+        instance = self.get_object()
+        with timed('serialize'):
+            data = self.get_serializer(instance).data
+        return Response(data)
+
 
 class ShopifyInventoryWebhookView(APIView):
     """
     Webhook endpoint for Shopify inventory updates.
     Validates payload and updates product inventory quantity.
+    Retried deliveries (same X-Shopify-Webhook-Id) and events older than the
+    last one seen for the SKU are acknowledged without touching the database.
+    Deliveries that are not applied (bad payload, unknown SKU, errors) release
+    their webhook id, so Shopify's retry is processed.
     """
     permission_classes = []  # No authentication required for webhooks
 
@@ -52,19 +207,127 @@ class ShopifyInventoryWebhookView(APIView):
         if not verify_shopify_webhook(request.body, hmac_header):
             return Response({'error': 'Invalid webhook signature'}, status=status.HTTP_401_UNAUTHORIZED)
 
+        record_webhook_metric('received')
+        webhook_id = request.META.get('HTTP_X_SHOPIFY_WEBHOOK_ID', '')
+        if not claim_shopify_webhook(webhook_id):
+            record_webhook_metric('duplicate')
+            return Response({'status': 'Duplicate webhook ignored'}, status=status.HTTP_200_OK)
+
+        event_time = parse_shopify_event_time(request)
+        raw_sku = request.data.get('sku')
+        if isinstance(raw_sku, str) and not claim_inventory_event(raw_sku, event_time):
+            record_webhook_metric('stale')
+            return Response({'status': 'Stale webhook ignored'}, status=status.HTTP_200_OK)
+
+        try:
+            response = self.update_inventory(request)
+        except Exception:
+            # Let Shopify's retry of this delivery through again
+            release_shopify_webhook(webhook_id)
+            raise
+        if not status.is_success(response.status_code):
+            release_shopify_webhook(webhook_id)
+        return response
+
+    def update_inventory(self, request) -> Response:
+        """Validate the payload and apply the inventory update."""
         serializer = ShopifyWebhookSerializer(data=request.data)
         if serializer.is_valid():
             sku = serializer.validated_data['sku']
             inventory_quantity = serializer.validated_data['inventory_quantity']
-            try:
-                product = Product.objects.get(sku=sku)
-                StockHistory.objects.create(product=product, quantity=inventory_quantity)
-                product.quantity = inventory_quantity
-                product.save()
-                return Response({'status': 'Inventory updated successfully'}, status=status.HTTP_200_OK)
-            except Product.DoesNotExist:
-                return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
+            result = update_inventory(sku, inventory_quantity)
+            if result['status'] == 'error':
+                return Response(
+                    {'sku': ['Product with this SKU does not exist.']}, status=status.HTTP_400_BAD_REQUEST
+                )
+            record_webhook_metric('processed')
+            return Response({'status': 'Inventory updated successfully'}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class InventoryBatchUpdateView(APIView):
+    """
+    API endpoint for applying many inventory levels in one request, for inventory
+    managers authenticated with a JWT (Shopify deliveries go to the webhook).
+    Accepts a JSON array or an NDJSON stream of `{sku, inventory_quantity}` items
+    and streams back an NDJSON result per item, in input order, followed by a
+    `{"summary": ...}` line. Each chunk is committed before its results are sent.
+    """
+    permission_classes = [IsInventoryManager]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request, *args, **kwargs):
+        """Validate and apply a batch of inventory updates."""
+        items = request.data
+        if isinstance(items, (dict, str)) or not hasattr(items, '__iter__'):
+            return Response({'error': 'Expected a list of items.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        lines = iter_ndjson_lines(self.with_summary(bulk_update_inventory(items)), settings.INVENTORY_BATCH_CHUNK_SIZE)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+    @staticmethod
+    def with_summary(results: Iterator[Dict]) -> Iterator[Dict]:
+        """Pass the results through, then yield the count of each status."""
+        summary = {'total': 0, 'success': 0, 'unchanged': 0, 'error': 0}
+        for result in results:
+            summary['total'] += 1
+            summary[result['status']] += 1
+            yield result
+        yield {'summary': summary}
+
+
+class ProductBulkView(APIView):
+    """
+    API endpoint for creating, updating and deleting many products in one request.
+    POST upserts a JSON array or NDJSON stream of products keyed by SKU; DELETE
+    removes a list of SKUs. Both return a result per item, in input order.
+    """
+    permission_classes = [IsInventoryManager]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request, *args, **kwargs) -> Response:
+        """Validate and create or update a batch of products."""
+        items = request.data
+        if isinstance(items, (dict, str)) or not hasattr(items, '__iter__'):
+            return Response({'error': 'Expected a list of products.'}, status=status.HTTP_400_BAD_REQUEST)
+        profile = getattr(request.user, 'profile', None)
+        return self.summarize(bulk_upsert_products(items, profile=profile), ('created', 'updated', 'unchanged'))
+
+    def delete(self, request, *args, **kwargs) -> Response:
+        """Delete a batch of products by SKU."""
+        skus = request.data
+        if isinstance(skus, (dict, str)) or not hasattr(skus, '__iter__'):
+            return Response({'error': 'Expected a list of SKUs.'}, status=status.HTTP_400_BAD_REQUEST)
+        return self.summarize(bulk_delete_products(skus), ('deleted',))
+
+    def summarize(self, results, statuses) -> Response:
+        results = list(results)
+        summary = {'total': len(results), **{name: 0 for name in statuses}, 'error': 0}
+        for result in results:
+            summary[result['status']] += 1
+        return Response({'summary': summary, 'results': results}, status=status.HTTP_200_OK)
+
+
+class ShopifyWebhookMetricsView(APIView):
+    """
+    API endpoint exposing Shopify webhook counters and the duplicate/stale suppression rate.
+    """
+
+    def get(self, request, *args, **kwargs) -> Response:
+        """Return webhook delivery metrics."""
+        return Response(get_webhook_metrics(), status=status.HTTP_200_OK)
+
+
+class CacheStatsView(APIView):
+    """
+    API endpoint exposing hit counts and hit ratios of each cache tier.
+    """
+
+    def get(self, request, *args, **kwargs) -> Response:
+        """Return cache tier statistics for this process and across all processes."""
+        if not hasattr(cache, 'stats'):
+            return Response({'error': 'The default cache does not report statistics'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(cache.stats(), status=status.HTTP_200_OK)
     
 
 class ProductSearchView(generics.ListAPIView):
@@ -72,14 +335,15 @@ class ProductSearchView(generics.ListAPIView):
     API endpoint for semantic product search using Sentence-Transformers.
     Ranks results by similarity to the query (?q=...).
     """
-    serializer_class = ProductSerializer
+    serializer_class = ProductReadSerializer
     # permission_classes = [IsInventoryManager]
 
     def get_queryset(self) -> List[Product]:
         """Return products ranked by semantic similarity to the query."""
         query = self.request.query_params.get('q', '')
-        products = Product.objects.all()
-        return compute_similarity(query, products)
+        if not query:
+            return Product.objects.as_rows()
+        return compute_similarity(query, Product.objects.all())
 
 
 class ProductInsightsView(generics.GenericAPIView):
@@ -91,30 +355,24 @@ class ProductInsightsView(generics.GenericAPIView):
 
     def get(self, request, *args, **kwargs) -> Response:
         """Return cached or computed product insights."""
-        cache_key = 'product_insights'
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
+        return Response(cache.get_or_set(insights_key(), self.compute_insights, timeout=3600))
 
+    def compute_insights(self) -> dict:
+        """Compute low-stock statistics and trending products."""
         total_products = Product.objects.count()
         low_stock_threshold = 10
         low_stock_products = Product.objects.filter(quantity__lt=low_stock_threshold).count()
         low_stock_percentage = (low_stock_products / total_products * 100) if total_products > 0 else 0
 
-        trending_products = compute_trending_products(Product.objects.prefetch_related('stock_history').all())
-
-        data = {
+        return {
             'statistics': {
                 'total_products': total_products,
                 'low_stock_products': low_stock_products,
                 'low_stock_percentage': round(low_stock_percentage, 2),
             },
-            'trending_products': ProductSerializer(trending_products, many=True).data
+            'trending_products': cache.get_or_set(trending_products_key(), get_trending_products, timeout=3600)
         }
 
-        cache.set(cache_key, data, timeout=3600)  # Cache for 1 hour
-        return Response(data)
-
     
 class ProductDiscountView(generics.GenericAPIView):
     """
@@ -136,11 +394,39 @@ class ProductDiscountView(generics.GenericAPIView):
         if serializer.is_valid():
             product.discount_percentage = serializer.validated_data['discount_percentage']
             product.save()
+            return Response(ProductSerializer(product).data, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            # Clear cached product data
-            cache.delete(f"product_embedding_{product.sku}")
-            cache.delete('product_insights')
-            cache.delete('trending_products')
 
-            return Response(ProductSerializer(product).data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+class DiscountCampaignListCreateView(generics.ListCreateAPIView):
+    """
+    API endpoint for listing and scheduling discount campaigns.
+    A campaign discounts every product matching its filters between its start
+    and end; the scheduled `run_discount_campaigns` task applies and reverts it.
+    """
+    queryset = DiscountCampaign.objects.all()
+    serializer_class = DiscountCampaignSerializer
+    permission_classes = [IsInventoryManager]
+
+    def perform_create(self, serializer: DiscountCampaignSerializer) -> None:
+        """Apply campaigns starting now right away instead of at the next scheduled run."""
+        campaign = serializer.save()
+        if campaign.starts_at <= timezone.now():
+            transaction.on_commit(run_discount_campaigns.delay)
+
+
+class DiscountCampaignDetailView(generics.RetrieveDestroyAPIView):
+    """
+    API endpoint for retrieving and cancelling a discount campaign.
+    Cancelling an active campaign reverts its discounts first.
+    """
+    queryset = DiscountCampaign.objects.all()
+    serializer_class = DiscountCampaignSerializer
+    permission_classes = [IsInventoryManager]
+
+    def perform_destroy(self, instance: DiscountCampaign) -> None:
+        with transaction.atomic():
+            campaign = DiscountCampaign.objects.select_for_update().get(pk=instance.pk)
+            if campaign.status == DiscountCampaign.STATUS_ACTIVE:
+                revert_campaign(campaign)
+            campaign.delete()